@@ -3,11 +3,19 @@ import numpy as np
 import ezdxf
 import os
 import sys
+import csv
+import json
+import re
+import queue
+import sqlite3
 import time
+import hashlib
 import threading
 import random
 import subprocess
-from datetime import datetime
+import concurrent.futures
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
 import tkinter as tk
 from tkinter import filedialog, simpledialog, messagebox
 from PIL import ImageFont, ImageDraw, Image
@@ -20,11 +28,3105 @@ except ImportError:
     SERIAL_AVAILABLE = False
 
 
+def _app_dir():
+    """설정·캐시 파일을 둘 폴더 (exe / 런처 exec / 직접 실행 모두 대응)"""
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    path = globals().get('__file__')
+    if path:
+        return os.path.dirname(os.path.abspath(path))
+    if sys.argv and sys.argv[0]:
+        return os.path.dirname(os.path.abspath(sys.argv[0]))
+    return os.getcwd()
+
+
+APP_DIR = _app_dir()
+
+
+def _write_json(path, data):
+    """임시 파일에 쓴 뒤 교체 (쓰는 도중 종료돼도 기존 파일 보존)"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+# ──────────────────────────────────────────────
+# 프레임 소스 (카메라 / 동영상 / 이미지 폴더 / 합성)
+# ──────────────────────────────────────────────
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff')
+
+
+def read_image(path):
+    """한글 경로도 읽을 수 있도록 np.fromfile + imdecode 로 이미지 로드 (실패 시 None)"""
+    try:
+        image_data = np.fromfile(path, dtype=np.uint8)
+        return cv2.imdecode(image_data, cv2.IMREAD_COLOR)
+    except (OSError, ValueError, cv2.error):
+        return None
+
+
+class FrameSource:
+    """VisionInspector 가 사용하는 프레임 공급원
+
+    cv2.VideoCapture 와 같은 read(image=None) / get / set / isOpened / release 를 제공한다.
+    read() 는 image 버퍼가 주어지고 크기가 맞으면 그 버퍼에 채워서 돌려준다.
+    fps > 0 이면 그 속도에 맞춰 read() 가 대기한다.
+    """
+
+    is_camera = False
+
+    def __init__(self, name, fps=0.0):
+        self.name = name
+        self.fps = fps
+        self._next_t = 0.0
+
+    def _pace(self):
+        if self.fps <= 0:
+            return
+        now = time.perf_counter()
+        if self._next_t > now:
+            time.sleep(self._next_t - now)
+        self._next_t = max(now, self._next_t) + 1.0 / self.fps
+
+    @staticmethod
+    def _into(image, frame):
+        """frame 을 image 버퍼에 복사 (크기가 다르면 frame 그대로)"""
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return image
+        return frame
+
+    def isOpened(self):
+        return True
+
+    def read(self, image=None):
+        raise NotImplementedError
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """DirectShow USB 카메라"""
+
+    is_camera = True
+
+    def __init__(self, cap, idx):
+        super().__init__(f"camera:{idx}")
+        self.idx = idx
+        self._cap = cap
+
+    @classmethod
+    def open(cls, idx, width=1920, height=1080):
+        """카메라 하나만 열고 첫 프레임이 정상인지 확인 (실패 시 None)"""
+        tmp_cap = cv2.VideoCapture(idx, cv2.CAP_DSHOW)
+        if not tmp_cap.isOpened():
+            tmp_cap.release()
+            return None
+
+        tmp_cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        tmp_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        ret, frame = tmp_cap.read()
+        if ret and frame is not None:
+            return cls(tmp_cap, idx)
+
+        tmp_cap.release()
+        return None
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self, image=None):
+        if image is not None:
+            return self._cap.read(image)
+        return self._cap.read()
+
+    def get(self, prop):
+        return self._cap.get(prop)
+
+    def set(self, prop, value):
+        return self._cap.set(prop, value)
+
+    def release(self):
+        self._cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """녹화된 동영상 파일 재생 (끝나면 처음부터 반복)"""
+
+    def __init__(self, path, fps=None, loop=True):
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            cap.release()
+            raise ValueError(f"동영상을 열 수 없습니다: {path}")
+        if fps is None:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        super().__init__(path, fps)
+        self._cap = cap
+        self.loop = loop
+
+    def read(self, image=None):
+        self._pace()
+        ret, frame = self._cap.read(image) if image is not None else self._cap.read()
+        if not ret and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self._cap.read(image) if image is not None else self._cap.read()
+        return ret, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return self._cap.get(prop)
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirSource(FrameSource):
+    """폴더 안의 이미지를 파일명 순서대로 목표 FPS 로 재생 (반복)"""
+
+    def __init__(self, path, fps=None, loop=True):
+        files = sorted(
+            os.path.join(path, f) for f in os.listdir(path)
+            if f.lower().endswith(IMAGE_EXTS)
+        )
+        if not files:
+            raise ValueError(f"이미지가 없는 폴더입니다: {path}")
+        super().__init__(path, 30.0 if fps is None else fps)
+        self.files = files
+        self.loop = loop
+        self._pos = 0
+        self._shape = None
+
+    def read(self, image=None):
+        self._pace()
+        for _ in range(len(self.files)):
+            if self._pos >= len(self.files):
+                if not self.loop:
+                    return False, None
+                self._pos = 0
+            frame = read_image(self.files[self._pos])
+            self._pos += 1
+            if frame is not None:
+                self._shape = frame.shape
+                return True, self._into(image, frame)
+        return False, None
+
+    def get(self, prop):
+        if self._shape is not None and prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self._shape[1])
+        if self._shape is not None and prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self._shape[0])
+        return super().get(prop)
+
+
+class SyntheticSource(FrameSource):
+    """카메라 없이 쓰는 합성 영상 (그라데이션 배경 위로 움직이는 부품 모양)"""
+
+    def __init__(self, width=1920, height=1080, fps=0.0):
+        super().__init__(f"synthetic:{width}x{height}", fps)
+        self.width, self.height = width, height
+        self._n = 0
+        yy, xx = np.mgrid[0:height, 0:width]
+        self._bg = np.dstack([
+            (xx * 255 // max(1, width - 1)),
+            (yy * 255 // max(1, height - 1)),
+            np.full_like(xx, 96),
+        ]).astype(np.uint8)
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height)
+        return super().get(prop)
+
+    def read(self, image=None):
+        self._pace()
+        if image is None or image.shape != self._bg.shape:
+            image = np.empty_like(self._bg)
+        np.copyto(image, self._bg)
+        # 움직이는 부품 모양 (원 + 사각형)
+        self._n += 1
+        cx = self.width // 2 + int(self.width * 0.1 * np.sin(self._n * 0.05))
+        cy = self.height // 2
+        r = self.height // 5
+        cv2.circle(image, (cx, cy), r, (40, 40, 40), -1)
+        cv2.rectangle(image, (cx - r // 2, cy - r // 2), (cx + r // 2, cy + r // 2),
+                      (200, 200, 200), -1)
+        return True, image
+
+
+def open_frame_source(spec, fps=None):
+    """문자열로 프레임 소스 생성
+
+    camera:N / synthetic[:WxH] / 동영상 파일 경로 / 이미지 폴더 경로.
+    fps 가 None 이면 동영상은 파일 FPS, 폴더·합성은 30 FPS 로 재생하고 0 이면 최대 속도.
+    """
+    if spec.startswith('camera:'):
+        idx = int(spec.split(':', 1)[1])
+        src = CameraSource.open(idx)
+        if src is None:
+            raise ValueError(f"카메라 {idx} 를 열 수 없습니다.")
+        return src
+    if spec.startswith('synthetic'):
+        w, h = 1920, 1080
+        if ':' in spec:
+            w, h = (int(v) for v in spec.split(':', 1)[1].lower().split('x'))
+        return SyntheticSource(w, h, 30.0 if fps is None else fps)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec, fps)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, fps)
+    raise ValueError(f"알 수 없는 영상 소스: {spec}")
+
+
+# ──────────────────────────────────────────────
+# 카메라 검색 (병렬·제한 시간, 장치 정보 캐시)
+# ──────────────────────────────────────────────
+def query_camera_names():
+    """Windows 장치 관리자에서 카메라 이름을 가져옴"""
+    try:
+        command = (
+            "Get-PnpDevice -Class Camera -Status OK "
+            "| Select-Object -ExpandProperty FriendlyName"
+        )
+        result = subprocess.run(
+            ["powershell", "-NoProfile", "-Command", command],
+            capture_output=True,
+            text=True,
+            timeout=3,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+        return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+    except (OSError, subprocess.SubprocessError):
+        return []
+
+
+class CameraDiscovery:
+    """카메라 번호 검색과 장치 정보(이름·해상도) 캐시
+
+    후보 번호를 모두 동시에 열어 보고, 지난번에 정상 동작한 번호를 가장 먼저 채택한다.
+    전체에 제한 시간이 있어 응답 없는 번호(지난번 번호 포함) 때문에 기다리지 않는다.
+    결과는 camera_map.json 에 저장해 다음 실행 때 사용한다.
+    """
+
+    MAX_INDEX = 6
+
+    def __init__(self, path=None, timeout=4.0, opener=None):
+        self.path = path or os.path.join(APP_DIR, 'camera_map.json')
+        self.timeout = timeout
+        self.opener = opener or CameraSource.open
+        self.last_good = None
+        self.devices = {}      # {번호: {'name', 'width', 'height', 'last_ok'}}
+        self.names = []
+        self._names_thread = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.last_good = data.get('last_good')
+            self.devices = {int(k): v for k, v in data.get('devices', {}).items()}
+            self.names = list(data.get('names', []))
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def save(self):
+        with self._lock:
+            data = {
+                'last_good': self.last_good,
+                'devices': {str(k): v for k, v in self.devices.items()},
+                'names': self.names,
+            }
+        try:
+            _write_json(self.path, data)
+        except OSError:
+            pass
+
+    def remember(self, idx, source):
+        """정상 동작한 카메라 번호와 해상도를 기록"""
+        w = int(source.get(cv2.CAP_PROP_FRAME_WIDTH))
+        h = int(source.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        with self._lock:
+            self.last_good = idx
+            self.devices[idx] = {
+                'name': self.names[idx] if idx < len(self.names) else self.devices.get(idx, {}).get('name'),
+                'width': w,
+                'height': h,
+                'last_ok': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        self.save()
+
+    def device_name(self, idx):
+        if idx is not None and idx < len(self.names):
+            return self.names[idx]
+        return self.devices.get(idx, {}).get('name')
+
+    def connect(self, start_idx=0):
+        """(source, idx) 반환. 모두 실패하면 (None, None)"""
+        order = [(start_idx + i) % self.MAX_INDEX for i in range(self.MAX_INDEX)]
+        # 지난번 정상 카메라가 최우선 (열리면 다른 후보보다 먼저 채택)
+        if self.last_good in order:
+            order.remove(self.last_good)
+            order.insert(0, self.last_good)
+
+        # 후보를 모두 동시에 열고, 같은 제한 시간 안에서 우선순위 순서로 첫 성공을 채택
+        # (응답 없는 장치가 종료를 막지 않도록 데몬 스레드 사용)
+        futures = {idx: self._probe_async(idx) for idx in order}
+        deadline = time.perf_counter() + self.timeout
+        chosen = None
+        for idx in order:
+            fut = futures[idx]
+            try:
+                src = fut.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except Exception:
+                src = None
+            if src is not None:
+                chosen = (src, idx)
+                break
+
+        # 선택되지 않은 카메라는 (늦게 열리더라도) 모두 해제
+        for idx, fut in futures.items():
+            if chosen is not None and idx == chosen[1]:
+                continue
+            fut.add_done_callback(self._release_unused)
+
+        if chosen is None:
+            return None, None
+        self.remember(chosen[1], chosen[0])
+        return chosen
+
+    def _probe_async(self, idx):
+        fut = concurrent.futures.Future()
+
+        def _worker():
+            try:
+                fut.set_result(self.opener(idx))
+            except Exception as ex:
+                fut.set_exception(ex)
+
+        threading.Thread(target=_worker, daemon=True).start()
+        return fut
+
+    @staticmethod
+    def _release_unused(fut):
+        try:
+            src = fut.result()
+        except Exception:
+            return
+        if src is not None:
+            src.release()
+
+    def refresh_names_async(self, on_done=None):
+        """장치 이름 목록을 백그라운드에서 갱신 (이미 진행 중이면 무시)"""
+        if self._names_thread is not None and self._names_thread.is_alive():
+            return
+
+        def _worker():
+            names = query_camera_names()
+            if names:
+                with self._lock:
+                    self.names = names
+                    for idx, dev in self.devices.items():
+                        if idx < len(names):
+                            dev['name'] = names[idx]
+                self.save()
+            if on_done is not None:
+                on_done(self.names)
+
+        self._names_thread = threading.Thread(target=_worker, daemon=True)
+        self._names_thread.start()
+
+
+# ──────────────────────────────────────────────
+# 캘리브레이션 프로필 (카메라·해상도별, calibration.json)
+# ──────────────────────────────────────────────
+class CalibrationStore:
+    """카메라·해상도별 px/mm 캘리브레이션 저장소
+
+    기준 길이 측정 (px, mm) 을 여러 개 모아 px = s·mm 의 최소제곱해
+    s = Σpx·mm / Σmm² 로 배율을 정한다. 긴 기준일수록 가중이 커진다.
+    """
+
+    MAX_REFS = 50
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(APP_DIR, 'calibration.json')
+        self.profiles = {}     # {키: {'camera', 'width', 'height', 'refs', 'scale', 'rms_mm', 'updated'}}
+        self._load()
+
+    @staticmethod
+    def key(camera, width, height):
+        return f"{camera}@{width}x{height}"
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.profiles = {k: v for k, v in data.get('profiles', {}).items() if v.get('scale', 0) > 0}
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def save(self):
+        try:
+            _write_json(self.path, {'profiles': self.profiles})
+        except OSError:
+            pass
+
+    @staticmethod
+    def fit(refs):
+        """기준 [(px, mm), ...] → (배율 px/mm, 잔차 RMS mm)"""
+        px = np.array([r[0] for r in refs], dtype=np.float64)
+        mm = np.array([r[1] for r in refs], dtype=np.float64)
+        scale = float(px @ mm / (mm @ mm))
+        rms = float(np.sqrt(np.mean((px / scale - mm) ** 2)))
+        return scale, rms
+
+    def get(self, camera, width, height):
+        return self.profiles.get(self.key(camera, width, height))
+
+    def add_reference(self, camera, width, height, px, mm):
+        """기준 측정 하나를 더하고 다시 맞춘 프로필 반환"""
+        key = self.key(camera, width, height)
+        prof = self.profiles.setdefault(key, {'camera': camera, 'width': width, 'height': height, 'refs': []})
+        prof['refs'] = (prof['refs'] + [[float(px), float(mm)]])[-self.MAX_REFS:]
+        prof['scale'], prof['rms_mm'] = self.fit(prof['refs'])
+        prof['updated'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.save()
+        return prof
+
+    def reset(self, camera, width, height):
+        """프로필 삭제. 지운 것이 있으면 True"""
+        if self.profiles.pop(self.key(camera, width, height), None) is None:
+            return False
+        self.save()
+        return True
+
+    def derive(self, camera, width):
+        """같은 카메라의 다른 해상도 프로필을 가로 해상도 비율로 환산 → (배율, 원본 프로필) 또는 None
+
+        가로 화소 수가 같은 시야를 덮는다고 가정하므로(비닝·축소 모드), 잘라내는 모드에서는 근사값이다.
+        """
+        same = [p for p in self.profiles.values() if p.get('camera') == camera and p.get('width')]
+        if not same:
+            return None
+        src = max(same, key=lambda p: p.get('updated', ''))
+        return src['scale'] * width / src['width'], src
+
+
+# ──────────────────────────────────────────────
+# 렌즈 왜곡 보정 (체커보드 캘리브레이션, remap 표 디스크 캐시)
+# ──────────────────────────────────────────────
+LENS_BOARD = (9, 6)         # 체커보드 내부 코너 수 (가로, 세로) 기본값
+LENS_DETECT_DIM = 1000      # 코너 검색은 이 크기 이하로 줄여서 하고, 서브픽셀은 원본에서
+
+
+def find_board_corners(gray, board):
+    """체커보드 내부 코너 (N, 1, 2) float32, 못 찾으면 None"""
+    f = min(1.0, LENS_DETECT_DIM / max(gray.shape))
+    small = cv2.resize(gray, None, fx=f, fy=f, interpolation=cv2.INTER_AREA) if f < 1.0 else gray
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH | cv2.CALIB_CB_NORMALIZE_IMAGE | cv2.CALIB_CB_FAST_CHECK
+    found, corners = cv2.findChessboardCorners(small, board, flags=flags)
+    if not found:
+        return None
+    corners = (corners / f).astype(np.float32)
+    win = max(5, int(round(5 / f)))
+    cv2.cornerSubPix(gray, corners, (win, win), (-1, -1),
+                     (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 1e-3))
+    return corners
+
+
+def calibrate_lens(images, board=LENS_BOARD, progress=None):
+    """체커보드 사진들로 카메라 행렬·왜곡 계수를 구해 LensCorrector 반환
+
+    해상도가 첫 사진과 다른 사진과 코너를 못 찾은 사진은 건너뛴다 (3장 미만이면 ValueError).
+    """
+    objp = np.zeros((board[0] * board[1], 3), dtype=np.float32)
+    objp[:, :2] = np.mgrid[0:board[0], 0:board[1]].T.reshape(-1, 2)
+    size = None
+    obj_pts, img_pts = [], []
+    for i, img in enumerate(images):
+        if progress:
+            progress("코너 검색", i / max(1, len(images)))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        if size is None:
+            size = (w, h)
+        elif (w, h) != size:
+            continue
+        gray = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        corners = find_board_corners(gray, board)
+        if corners is not None:
+            obj_pts.append(objp)
+            img_pts.append(corners)
+    if len(img_pts) < 3:
+        raise ValueError(f"체커보드({board[0]}x{board[1]})를 찾은 사진이 {len(img_pts)}장입니다. "
+                         f"최소 3장이 필요합니다.")
+    if progress:
+        progress("보정 계산", 0.9)
+    rms, K, dist, _, _ = cv2.calibrateCamera(obj_pts, img_pts, size, None, None)
+    return LensCorrector(K, dist, size, rms=rms, images=len(img_pts))
+
+
+def lens_profile_path(camera, width, height):
+    """카메라·해상도별 렌즈 보정 파일 (APP_DIR/lens/*.npz)"""
+    key = CalibrationStore.key(camera, width, height)
+    return os.path.join(APP_DIR, 'lens', hashlib.sha1(key.encode('utf-8')).hexdigest()[:16] + '.npz')
+
+
+class LensCorrector:
+    """카메라 행렬·왜곡 계수와 미리 계산한 고정소수점(CV_16SC2) remap 표
+
+    보정 후 카메라 행렬을 K 그대로 두어 화면 중심 부근의 px/mm 배율이 보정 전과 같게 유지된다.
+    """
+
+    def __init__(self, K, dist, size, rms=0.0, images=0, maps=None):
+        self.K = np.asarray(K, dtype=np.float64)
+        self.dist = np.asarray(dist, dtype=np.float64)
+        self.size = (int(size[0]), int(size[1]))
+        self.rms = float(rms)
+        self.images = int(images)
+        if maps is None:
+            maps = cv2.initUndistortRectifyMap(self.K, self.dist, None, self.K, self.size, cv2.CV_16SC2)
+        self.map1, self.map2 = maps
+
+    def matches(self, frame):
+        return frame.shape[1] == self.size[0] and frame.shape[0] == self.size[1]
+
+    def undistort(self, frame, dst=None):
+        """프레임 전체 보정 (remap 한 번)"""
+        return cv2.remap(frame, self.map1, self.map2, cv2.INTER_LINEAR, dst=dst)
+
+    def undistort_points(self, pts):
+        """원본 프레임 좌표 (N, 2) → 왜곡을 편 좌표 (N, 2)"""
+        src = np.asarray(pts, dtype=np.float64).reshape(-1, 1, 2)
+        criteria = (cv2.TERM_CRITERIA_COUNT | cv2.TERM_CRITERIA_EPS, 20, 1e-6)
+        if hasattr(cv2, 'undistortPointsIter'):      # OpenCV 4.x
+            out = cv2.undistortPointsIter(src, self.K, self.dist, None, self.K, criteria)
+        else:                                        # OpenCV 5: undistortPoints 가 criteria 를 받음
+            out = cv2.undistortPoints(src, self.K, self.dist, R=None, P=self.K, criteria=criteria)
+        return out.reshape(-1, 2)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            np.savez(f, K=self.K, dist=self.dist, size=np.array(self.size), rms=self.rms,
+                     images=self.images, map1=self.map1, map2=self.map2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """저장된 보정 (remap 표 포함) 을 읽음. 없거나 손상됐으면 None"""
+        try:
+            with np.load(path) as data:
+                return cls(data['K'], data['dist'], data['size'], rms=float(data['rms']),
+                           images=int(data['images']), maps=(data['map1'], data['map2']))
+        except Exception:
+            # 잘린 파일은 zipfile.BadZipFile·EOFError 등 여러 형태로 나오므로 모두 보정 없음으로 처리
+            return None
+
+
+# ──────────────────────────────────────────────
+# 프레임 캡처 스레드 (링 버퍼)
+# ──────────────────────────────────────────────
+class FrameGrabber:
+    """카메라 프레임을 별도 스레드에서 읽어 미리 할당된 링 버퍼에 보관
+
+    생산자(캡처 스레드)는 최신 슬롯과 소비자가 사용 중인 슬롯을 피해서 쓰고,
+    소비자(UI 스레드)는 latest()로 가장 최근 프레임을 복사 없이 받아간다.
+    슬롯 인덱스 교환은 GIL 하의 단일 대입이므로 락이 필요 없다.
+    """
+
+    def __init__(self, cap, ring_size=4):
+        self.cap = cap
+        self.ring_size = max(3, ring_size)
+        self._ring = [None] * self.ring_size
+        self._seqs = [0] * self.ring_size
+        self._stamps = [0.0] * self.ring_size
+        self._latest = -1          # 마지막으로 완성된 슬롯
+        self._reading = -1         # 소비자가 잡고 있는 슬롯
+        self._seq = 0
+        self._consumed_seq = 0
+        self._new_frame = threading.Event()
+        self._running = False
+        self._thread = None
+        self.on_frame = None        # 새 프레임마다 캡처 스레드에서 호출 (연속 저장용, 짧게 끝나야 함)
+
+        # 통계 (UI 프레임율과 카메라 프레임율을 분리해서 보기 위함)
+        self.frames_captured = 0
+        self.frames_dropped = 0     # 소비되기 전에 덮어쓴 프레임 수
+        self.read_errors = 0
+        self.read_ms = 0.0          # cap.read() 소요 시간 (EMA)
+        self.age_ms = 0.0           # 소비 시점의 프레임 나이
+        self.capture_fps = 0.0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        self._running = False
+        self._new_frame.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _next_slot(self):
+        for k in range(1, self.ring_size + 1):
+            slot = (self._latest + k) % self.ring_size
+            if slot != self._latest and slot != self._reading:
+                return slot
+        return 0
+
+    def _loop(self):
+        last_pub = None
+        while self._running:
+            slot = self._next_slot()
+            buf = self._ring[slot]
+            t0 = time.perf_counter()
+            try:
+                if buf is not None:
+                    ret, frame = self.cap.read(buf)
+                else:
+                    ret, frame = self.cap.read()
+            except cv2.error:
+                ret, frame = False, None
+            t1 = time.perf_counter()
+
+            if not ret or frame is None:
+                self.read_errors += 1
+                time.sleep(0.005)
+                continue
+
+            self._ring[slot] = frame
+            self._seq += 1
+            self._seqs[slot] = self._seq
+            self._stamps[slot] = t1
+
+            # 이전 최신 프레임이 소비되지 않았다면 드롭으로 집계
+            if self._latest >= 0 and self._seqs[self._latest] > self._consumed_seq:
+                self.frames_dropped += 1
+            self._latest = slot
+            self._new_frame.set()
+            on_frame = self.on_frame
+            if on_frame is not None:
+                on_frame(frame)
+
+            self.frames_captured += 1
+            self.read_ms = self.read_ms * 0.9 + (t1 - t0) * 1000 * 0.1
+            if last_pub is not None and t1 > last_pub:
+                self.capture_fps = self.capture_fps * 0.9 + (1.0 / (t1 - last_pub)) * 0.1
+            last_pub = t1
+
+    def latest(self):
+        """가장 최근 프레임과 시퀀스 번호 (복사 없음, 다음 호출 전까지 유효)"""
+        while True:
+            slot = self._latest
+            self._reading = slot
+            if slot == self._latest:
+                break
+        if slot < 0:
+            return None, 0
+        seq = self._seqs[slot]
+        if seq > self._consumed_seq:
+            self._consumed_seq = seq
+            self.age_ms = (time.perf_counter() - self._stamps[slot]) * 1000
+        return self._ring[slot], seq
+
+    def wait(self, last_seq, timeout=0.015):
+        """새 프레임이 들어오거나 timeout 이 지날 때까지 대기"""
+        if self._seq != last_seq:
+            return True
+        self._new_frame.clear()
+        if self._seq != last_seq:
+            return True
+        return self._new_frame.wait(timeout)
+
+
+# ──────────────────────────────────────────────
+# 정밀저울 프로토콜 (증분 프레임 파서 / 읽기 스레드 / 구독)
+# ──────────────────────────────────────────────
+# 단위 → g 환산 (단위 없이 숫자만 보내는 저울은 g 로 간주, 개수·% 등 무게가 아닌 단위는 무시)
+SCALE_UNITS = {'': 1.0, 'g': 1.0, 'kg': 1000.0, 'mg': 0.001, 'ct': 0.2,
+               'lb': 453.59237, 'oz': 28.349523125}
+
+_SCALE_TERM = re.compile(rb'[\r\n]')
+# 숫자: "1,234.5" / "1,234,567" 은 천 단위 쉼표, 쉼표 하나뿐이면 소수점 쉼표("12,34").
+# 앞뒤에 숫자·구분자가 더 붙은 것("1.234,5")은 잘못 읽지 않도록 맞추지 않는다
+_NUM = (rb'([-+]?)\s*(?<![\d.,])(\d{1,3}(?:,\d{3})+\.\d+|\d{1,3}(?:,\d{3}){2,}|\d+(?:[.,]\d+)?)(?![\d.,])'
+        rb'\s*([A-Za-z%]*)')
+# 프로토콜 줄은 앞에 잡음 바이트가 붙어도 찾도록 search (안정 표시를 잃지 않게)
+# Mettler Toledo SICS:  "S S      12.34 g" (안정) / "S D      12.34 g" (변동) / "S +" "S -" (과부하)
+_SICS_LINE = re.compile(rb'S[IR]?\s+([SD])\s+' + _NUM)
+# A&D 표준 형식:  "ST,+00012.34  g" (안정) / "US,..." (불안정) / "OL,..." (과부하)
+_AND_LINE = re.compile(rb'(ST|US|QT|WT|OL)\s*,\s*' + _NUM)
+# 프로토콜 머리가 있는데 위 형식으로 읽히지 않으면 일반 형식으로 넘기지 않음
+_PROTOCOL_HEAD = re.compile(rb'(ST|US|QT|WT|OL)\s*,|S[IR]?\s+[SD+-](\s|$)')
+# 그 밖 (Ohaus 등): 숫자 + 단위, 불안정이면 뒤에 '?'
+_GENERIC_LINE = re.compile(_NUM + rb'\s*(\?)?')
+
+
+class WeightReading:
+    """저울 값 하나 (grams 는 g 환산값, stable 은 저울이 안정 표시를 보내지 않으면 None)"""
+    __slots__ = ('grams', 'value', 'unit', 'stable', 't')
+
+    def __init__(self, grams, value, unit, stable, t=None):
+        self.grams = grams
+        self.value = value
+        self.unit = unit
+        self.stable = stable
+        self.t = time.perf_counter() if t is None else t
+
+    def __repr__(self):
+        return f"WeightReading({self.value}{self.unit}, stable={self.stable})"
+
+
+def parse_scale_line(line):
+    """한 줄(줄 끝 제외, bytes) → WeightReading. 무게가 아니거나 과부하·오류 응답이면 None"""
+    line = line.strip()
+    m = _AND_LINE.search(line)
+    if m:
+        head, sign, num, unit = m.groups()
+        if head == b'OL':
+            return None
+        stable = head != b'US'
+    else:
+        m = _SICS_LINE.search(line)
+        if m:
+            flag, sign, num, unit = m.groups()
+            stable = flag == b'S'
+        else:
+            if _PROTOCOL_HEAD.search(line):
+                return None
+            m = _GENERIC_LINE.search(line)
+            if not m:
+                return None
+            sign, num, unit, unstable = m.groups()
+            stable = False if unstable else None
+    unit = unit.decode('ascii').lower()
+    factor = SCALE_UNITS.get(unit)
+    if factor is None:
+        return None
+    if b'.' in num or num.count(b',') > 1:
+        num = num.replace(b',', b'')
+    value = float(num.replace(b',', b'.'))
+    if sign == b'-':
+        value = -value
+    return WeightReading(value * factor, value, unit or 'g', stable)
+
+
+class ScaleFrameParser:
+    """바이트 스트림 → WeightReading (증분, 버퍼 상한)
+
+    feed() 는 새로 들어온 바이트에서만 줄 끝(CR/LF)을 찾고, 줄 끝 없이 max_frame 바이트가
+    넘게 쌓이면 앞부분을 버려 버퍼가 끝없이 커지지 않게 한다. 앞이 잘린 그 줄은
+    머리(안정 표시)가 없을 수 있으므로 줄 끝이 오면 통째로 버린다.
+    """
+
+    def __init__(self, max_frame=64):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._truncated = False
+        self.frames = 0        # 해석한 줄 수
+        self.rejected = 0      # 무게로 해석하지 못한 줄 수
+        self.dropped = 0       # 줄 끝이 없어 버린 바이트 수
+
+    def feed(self, data):
+        readings = []
+        start = 0
+        for m in _SCALE_TERM.finditer(data):
+            end = m.start()
+            if self._buf:
+                self._buf += data[start:end]
+                line = bytes(self._buf)
+                self._buf.clear()
+            else:
+                line = data[start:end]
+            start = end + 1
+            if self._truncated:
+                self._truncated = False
+                self.dropped += len(line)
+                continue
+            if not line.strip():
+                continue
+            self.frames += 1
+            reading = parse_scale_line(line)
+            if reading is None:
+                self.rejected += 1
+            else:
+                readings.append(reading)
+        self._buf += data[start:]
+        excess = len(self._buf) - self.max_frame
+        if excess > 0:
+            del self._buf[:excess]
+            self.dropped += excess
+            self._truncated = True
+        return readings
+
+
+class WeightFeed:
+    """무게 갱신 발행/구독 (실제 저울·시뮬레이션 공통 경로)
+
+    구독 콜백은 읽기 스레드에서 불리므로 짧게 끝내야 한다 (값 저장·플래그 정도).
+    """
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.latest = None
+        self.updates = 0
+
+    def subscribe(self, callback):
+        """callback(reading) 등록. 해제 함수를 반환"""
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+        def _unsubscribe():
+            with self._lock:
+                self._subscribers = [c for c in self._subscribers if c is not callback]
+        return _unsubscribe
+
+    def publish(self, reading):
+        self.latest = reading
+        self.updates += 1
+        for callback in self._subscribers:
+            callback(reading)
+
+    def feed_bytes(self, parser, data):
+        """원시 바이트를 파서에 넣고 나온 값을 모두 발행"""
+        for reading in parser.feed(data):
+            self.publish(reading)
+
+
+class ScaleReader:
+    """시리얼 저울 읽기 스레드
+
+    바이트가 올 때까지 read(1) 로 대기하다가 도착하면 버퍼에 쌓인 것을 한 번에 읽어
+    파서에 넘긴다. stop() 은 포트를 닫아 대기 중인 read 를 바로 깨운다.
+    """
+
+    def __init__(self, port, feed, baud=9600, timeout=0.5, on_error=None, opener=None):
+        self.port = port
+        self.feed = feed
+        self.parser = ScaleFrameParser()
+        self.on_error = on_error
+        opener = opener or (lambda: serial.Serial(port, baudrate=baud, bytesize=8,
+                                                  parity='N', stopbits=1, timeout=timeout))
+        self._serial = opener()      # 열기 실패는 호출한 쪽으로 그대로 전달
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        try:
+            self._serial.close()
+        except Exception:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _loop(self):
+        ser = self._serial
+        while self._running:
+            try:
+                data = ser.read(1)
+                if not data:
+                    continue
+                waiting = ser.in_waiting
+                if waiting:
+                    data += ser.read(waiting)
+                self.feed.feed_bytes(self.parser, data)
+            except Exception as ex:
+                if self._running:
+                    self._running = False
+                    if self.on_error is not None:
+                        self.on_error(str(ex))
+                break
+
+
+class SimulatedScale:
+    """가상 저울: A&D 형식 줄을 만들어 실제 저울과 같은 파서·발행 경로로 흘림"""
+
+    def __init__(self, feed, base=12.34, noise=0.05, interval=0.5):
+        self.feed = feed
+        self.parser = ScaleFrameParser()
+        self.base = base
+        self.noise = noise
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # 발행 중인 값이 다음 소스의 reset() 과 겹치지 않도록 스레드가 끝날 때까지 기다림
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            value = self.base + random.uniform(-self.noise, self.noise)
+            self.feed.feed_bytes(self.parser, f"ST,{value:+09.2f}  g\r\n".encode('ascii'))
+            self._stop.wait(self.interval)
+
+
+class WeightStabilizer:
+    """무게 흐름에서 올림·안정·내림을 찾는 이동 창 (값 추가·제거 모두 O(1))
+
+    창 길이는 window_s 와 "관측한 수신 간격 × (min_samples - 1) × 1.5" 중 긴 쪽이라서
+    2 Hz 이하로 보내는 저울도 창 안에 min_samples 개가 들어온다 (max_span_s 까지).
+    그보다 드물게 오는 값(인쇄 키를 누를 때만 보내는 저울)은 앞 값과의 간격이 창보다 길어
+    창에 하나뿐이므로 저울이 보낸 안정 표시만 믿는다 (시작 후 첫 값은 간격을 모르므로 제외).
+    창 안의 값으로 평균·분산을 누적 합으로 유지하고, update() 는 이벤트
+    'load' (빈 상태에서 올라감), 'settled' (움직이다 자리잡음), 'unload' (빈 상태로 돌아감)
+    또는 None 을 돌려준다. 'settled' 는 올릴 때마다 한 번이고, 안정값에서 change_g 이상
+    벗어났다가 다시 자리잡으면 (부품 추가 등) 또 나온다. 읽기 스레드 하나에서만 호출한다.
+    """
+
+    def __init__(self, window_s=1.0, min_samples=3, tol_g=0.05, empty_g=0.5, change_g=0.5,
+                 max_span_s=5.0):
+        self.window_s = window_s
+        self.max_span_s = max_span_s
+        self.min_samples = min_samples
+        self.tol_g = tol_g            # 안정 판정 표준편차 한계
+        self.empty_g = empty_g        # 이 값 미만이면 빈 저울
+        self.change_g = change_g      # 안정 후 이만큼 바뀌면 다시 변동으로
+        self.reset()
+
+    def reset(self):
+        self.state = 'empty'          # 'empty' / 'moving' / 'stable'
+        self.value = None             # 마지막으로 자리잡은 평균값 (g)
+        self.interval = None          # 수신 간격 (s, 지수 평균)
+        self.span = self.window_s     # 현재 창 길이 (s)
+        self._last_t = None
+        self._sparse = False          # 이번 값이 앞 값과 창 길이보다 멀리 떨어져 옴
+        self._window = deque()
+        self._ref = 0.0               # 누적 합의 기준값 (큰 값끼리 빼는 오차 방지)
+        self._s1 = self._s2 = 0.0
+
+    def _track_interval(self, t):
+        self._sparse = self._last_t is not None and t - self._last_t > self.span
+        if self._last_t is not None and t > self._last_t:
+            dt = t - self._last_t
+            self.interval = dt if self.interval is None else self.interval * 0.8 + dt * 0.2
+            need = (self.min_samples - 1) * self.interval * 1.5
+            self.span = max(self.window_s, min(need, self.max_span_s))
+        self._last_t = t
+
+    def _push(self, t, x):
+        self._track_interval(t)
+        if not self._window:
+            self._ref = x
+        d = x - self._ref
+        self._window.append((t, d))
+        self._s1 += d
+        self._s2 += d * d
+        limit = t - self.span
+        while self._window[0][0] < limit:
+            _, d = self._window.popleft()
+            self._s1 -= d
+            self._s2 -= d * d
+
+    def _rebase(self, ref):
+        """누적 합을 새 기준값으로 다시 계산 (올릴 때만, 오래 쌓인 반올림 오차도 정리)"""
+        values = [self._ref + d for _, d in self._window]
+        self._ref = ref
+        self._window = deque((t, v - ref) for (t, _), v in zip(self._window, values))
+        self._s1 = sum(d for _, d in self._window)
+        self._s2 = sum(d * d for _, d in self._window)
+
+    def stats(self):
+        """(표본 수, 평균, 표준편차)"""
+        n = len(self._window)
+        if n == 0:
+            return 0, None, None
+        mean = self._s1 / n
+        return n, self._ref + mean, max(self._s2 / n - mean * mean, 0.0) ** 0.5
+
+    def update(self, reading):
+        x = reading.grams
+        self._push(reading.t, x)
+        if abs(x) < self.empty_g:
+            if self.state == 'empty':
+                return None
+            self.state = 'empty'
+            return 'unload'
+
+        event = None
+        if self.state == 'empty':
+            self.state = 'moving'
+            self._rebase(x)
+            event = 'load'
+        elif self.state == 'stable':
+            if abs(x - self.value) > self.change_g:
+                self.state = 'moving'
+            return None
+
+        n, mean, std = self.stats()
+        if n == 1 and self._sparse:
+            # 드물게 보내는 저울: 저울의 안정 표시를 그대로 따름
+            settled = reading.stable is True
+        else:
+            settled = n >= self.min_samples and std <= self.tol_g and reading.stable is not False
+        if settled and abs(mean) >= self.empty_g:
+            self.state = 'stable'
+            self.value = round(mean, 4)
+            return 'settled'
+        return event
+
+
+# ──────────────────────────────────────────────
+# 측정 기록 (무게 + 측정값 로그)
+# ──────────────────────────────────────────────
+LOG_DIR = os.path.join(APP_DIR, 'logs')
+WEIGHT_LOG_KEEP = 200     # 화면용으로 메모리에 남길 최근 기록 수
+LOG_COLUMNS = ('time', 'trigger', 'weight_g', 'stable', 'scale_source', 'camera', 'resolution',
+               'px_per_mm', 'calibration', 'dxf', 'image')
+_LOG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY, time TEXT NOT NULL, trigger TEXT, weight_g REAL, stable INTEGER,
+    scale_source TEXT, camera TEXT, resolution TEXT, px_per_mm REAL, calibration TEXT, dxf TEXT,
+    image TEXT);
+CREATE INDEX IF NOT EXISTS records_time ON records(time);
+CREATE TABLE IF NOT EXISTS measurements (
+    record_id INTEGER NOT NULL REFERENCES records(id), idx INTEGER NOT NULL,
+    mode TEXT, value_mm REAL, PRIMARY KEY (record_id, idx));
+"""
+
+
+def _log_paths(log_dir, day):
+    """일자별 (CSV, SQLite) 파일 경로"""
+    stem = os.path.join(log_dir, day.strftime('%Y-%m-%d'))
+    return stem + '.csv', stem + '.sqlite'
+
+
+def _log_row(record):
+    """기록 dict → LOG_COLUMNS 순서의 값 (시간은 정렬되는 ISO 문자열)"""
+    stable = record.get('stable')
+    return (record['time'].isoformat(timespec='milliseconds'), record.get('trigger'),
+            record.get('weight_g'), None if stable is None else int(stable), record.get('scale_source'),
+            record.get('camera'), record.get('resolution'), record.get('px_per_mm'),
+            record.get('calibration'), record.get('dxf'), record.get('image'))
+
+
+class MeasurementLogger:
+    """기록을 큐에 넣기만 하고, 쓰기 스레드가 모아서 일자별 CSV + SQLite 에 저장
+
+    log() 는 바로 돌아온다. 기록 하나는 time(datetime), trigger('manual' / 'auto'), weight_g, stable,
+    scale_source, camera, resolution, px_per_mm, calibration, dxf, measurements([(mode, value_mm), ...])
+    를 가진다. canvas(화면 이미지 배열)가 있으면 logs/날짜/시각.jpg 로 저장하고 image 에 상대 경로를 남긴다.
+    SQLite 에 먼저 쓰고 성공한 기록만 CSV 에 덧붙인다. written / failed 는 SQLite 기준이고
+    CSV 만 실패한 기록은 csv_failed 로 따로 센다. 오류는 error 에 남긴다 (다음 쓰기가 성공하면 지움).
+    """
+
+    def __init__(self, log_dir=LOG_DIR, flush_interval=0.5, batch_max=256):
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self.batch_max = batch_max
+        self.written = 0
+        self.failed = 0
+        self.csv_failed = 0
+        self.error = None
+        self._queue = queue.Queue()
+        self._day = None
+        self._db = None
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        self._queue.put(record)
+
+    def close(self, timeout=5.0):
+        """남은 기록을 모두 쓰고 쓰기 스레드 종료"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _loop(self):
+        q = self._queue
+        while True:
+            # 첫 기록이 오면 flush_interval 동안 더 모아서 한 번에 씀
+            batch = [q.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_max:
+                remain = deadline - time.perf_counter()
+                if remain <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remain))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            if stop:
+                batch.pop()
+            if batch:
+                self._write(batch)
+            if stop:
+                break
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _write(self, batch):
+        by_day = {}
+        for record in batch:
+            by_day.setdefault(record['time'].date(), []).append(record)
+        errors = []
+        for day, records in by_day.items():
+            csv_path, db_path = _log_paths(self.log_dir, day)
+            for record in records:
+                try:
+                    self._write_canvas(record)
+                except (OSError, cv2.error) as ex:
+                    record.pop('canvas', None)
+                    errors.append(f"이미지: {ex}")
+            # SQLite 가 기준 저장소: 여기서 실패하면 CSV 에도 쓰지 않아 두 파일이 어긋나지 않게 함
+            try:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self._insert_db(day, db_path, records)
+            except (OSError, sqlite3.Error) as ex:
+                errors.append(f"DB: {ex}")
+                self.failed += len(records)
+                if self._db is not None:
+                    self._db.close()
+                    self._db, self._day = None, None
+                continue
+            self.written += len(records)
+            try:
+                self._append_csv(csv_path, records)
+            except OSError as ex:
+                errors.append(f"CSV: {ex}")
+                self.csv_failed += len(records)
+        self.error = "; ".join(errors) or None
+
+    def _write_canvas(self, record):
+        canvas = record.pop('canvas', None)
+        if canvas is None:
+            return
+        t = record['time']
+        rel = os.path.join(t.strftime('%Y-%m-%d'), t.strftime('%H%M%S_%f')[:-3] + '.jpg')
+        ok, buffer = cv2.imencode('.jpg', canvas, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+        if not ok:
+            raise OSError(f"이미지 인코딩 실패: {rel}")
+        os.makedirs(os.path.join(self.log_dir, os.path.dirname(rel)), exist_ok=True)
+        with open(os.path.join(self.log_dir, rel), 'wb') as f:
+            f.write(buffer.tobytes())
+        record['image'] = rel
+
+    @staticmethod
+    def _append_csv(path, records):
+        with open(path, 'a', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(LOG_COLUMNS + ('measurements',))
+            for record in records:
+                meas = ";".join(f"{mode}={value:.4f}" for mode, value in record.get('measurements', ()))
+                writer.writerow(_log_row(record) + (meas,))
+
+    def _insert_db(self, day, path, records):
+        if self._day != day:
+            # 날짜가 바뀌면 새 파일로 (연결은 쓰기 스레드 안에서만 사용)
+            if self._db is not None:
+                self._db.close()
+            self._db = sqlite3.connect(path)
+            self._db.executescript(_LOG_SCHEMA)
+            self._day = day
+        db = self._db
+        with db:
+            for record in records:
+                cur = db.execute(f"INSERT INTO records ({', '.join(LOG_COLUMNS)}) "
+                                 f"VALUES ({', '.join('?' * len(LOG_COLUMNS))})", _log_row(record))
+                db.executemany("INSERT INTO measurements VALUES (?, ?, ?, ?)",
+                               [(cur.lastrowid, i, mode, value)
+                                for i, (mode, value) in enumerate(record.get('measurements', ()))])
+
+
+def shift_range(start, end, day=None):
+    """교대 근무 구간: shift_range('22:00', '06:00') → (오늘 22:00, 내일 06:00) datetime"""
+    day = day or datetime.now().date()
+    t0 = datetime.combine(day, datetime.strptime(start, '%H:%M').time())
+    t1 = datetime.combine(day, datetime.strptime(end, '%H:%M').time())
+    if t1 <= t0:
+        t1 += timedelta(days=1)
+    return t0, t1
+
+
+def query_log(start, end, log_dir=LOG_DIR):
+    """[start, end) 구간의 기록을 시간순 dict 목록으로 (자정을 넘는 구간은 일자별 파일을 이어서 조회)"""
+    lo, hi = start.isoformat(timespec='milliseconds'), end.isoformat(timespec='milliseconds')
+    rows = []
+    day = start.date()
+    while day <= end.date():
+        _, db_path = _log_paths(log_dir, day)
+        day += timedelta(days=1)
+        if not os.path.exists(db_path):
+            continue
+        db = sqlite3.connect(db_path)
+        try:
+            meas = {}
+            for rid, mode, value in db.execute(
+                    "SELECT m.record_id, m.mode, m.value_mm FROM measurements m "
+                    "JOIN records r ON r.id = m.record_id WHERE r.time >= ? AND r.time < ? "
+                    "ORDER BY m.record_id, m.idx", (lo, hi)):
+                meas.setdefault(rid, []).append((mode, value))
+            for rid, *values in db.execute(
+                    f"SELECT id, {', '.join(LOG_COLUMNS)} FROM records "
+                    "WHERE time >= ? AND time < ? ORDER BY time", (lo, hi)):
+                record = dict(zip(LOG_COLUMNS, values))
+                if record['stable'] is not None:
+                    record['stable'] = bool(record['stable'])
+                record['measurements'] = meas.get(rid, [])
+                rows.append(record)
+        finally:
+            db.close()
+    return rows
+
+
+def export_log(path, start, end, log_dir=LOG_DIR):
+    """구간 기록을 측정값마다 열이 있는 표로 저장 (.parquet 이면 Parquet). 행 수 반환"""
+    rows = []
+    for record in query_log(start, end, log_dir):
+        for i, (mode, value) in enumerate(record.pop('measurements'), 1):
+            record[f'm{i}_mode'] = mode
+            record[f'm{i}_mm'] = value
+        rows.append(record)
+    _write_batch_table(path, rows, 'parquet' if path.lower().endswith('.parquet') else 'csv')
+    return len(rows)
+
+
+# ──────────────────────────────────────────────
+# 이미지 저장 (인코더 스레드 풀)
+# ──────────────────────────────────────────────
+SAVE_DIR = os.path.join(APP_DIR, 'captures')
+SAVE_PATTERN = "{prefix}_{time:%Y%m%d_%H%M%S}_{seq:04d}"   # 자동 이름 (prefix, time, seq)
+BURST_COUNT = 10
+SAVE_CLOSE_TIMEOUT = 60.0   # 종료할 때 남은 저장을 기다리는 최대 시간 (s)
+# 형식 → (확장자, imencode 옵션). WebP 품질 100 초과는 무손실
+IMAGE_FORMATS = {
+    'jpg': ('.jpg', [int(cv2.IMWRITE_JPEG_QUALITY), 95]),
+    'png': ('.png', [int(cv2.IMWRITE_PNG_COMPRESSION), 1]),
+    'webp': ('.webp', [int(cv2.IMWRITE_WEBP_QUALITY), 101]),
+}
+
+
+class ImageSaver:
+    """이미지를 인코더 스레드 풀로 저장 (호출한 쪽은 버퍼 복사만 하고 바로 돌아옴)
+
+    submit() 은 미리 잡아 둔 버퍼(최대 max_buffers 장, 크기가 같으면 재사용)에 복사해
+    대기열에 넣는다. 버퍼가 모두 인코딩 대기 중이면 그 요청은 버리고 dropped 로 센다
+    (UI·캡처 스레드가 디스크를 기다리지 않도록). 연속 저장은 force=True 로 장수만큼
+    버퍼를 더 잡고, 인코딩이 끝나면 max_buffers 를 넘는 버퍼는 놓아준다.
+    cv2.imencode 는 GIL 을 놓으므로 스레드 수만큼 병렬로 인코딩된다.
+    """
+
+    def __init__(self, out_dir=SAVE_DIR, fmt='jpg', pattern=SAVE_PATTERN, workers=2, max_buffers=8):
+        if fmt not in IMAGE_FORMATS:
+            raise ValueError(f"지원하지 않는 이미지 형식: {fmt} ({', '.join(IMAGE_FORMATS)})")
+        try:
+            pattern.format(prefix="", time=datetime.now(), seq=0)
+        except (KeyError, IndexError, ValueError) as ex:
+            raise ValueError(f"저장 이름 규칙 오류: {pattern} ({ex})") from ex
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.pattern = pattern
+        self.max_buffers = max_buffers
+        self.saved = 0
+        self.dropped = 0
+        self.failed = 0
+        self.error = None
+        self.last_path = None
+        self._seq = 0
+        self._allocated = 0
+        self._free = []
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._threads = [threading.Thread(target=self._loop, daemon=True) for _ in range(max(1, workers))]
+        for t in self._threads:
+            t.start()
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def _take(self, image, force):
+        with self._lock:
+            while self._free:
+                buf = self._free.pop()
+                if buf.shape == image.shape and buf.dtype == image.dtype:
+                    return buf
+                self._allocated -= 1      # 해상도가 바뀐 버퍼는 버림
+            if self._allocated >= self.max_buffers and not force:
+                self.dropped += 1
+                return None
+            self._allocated += 1
+        return np.empty_like(image)
+
+    def submit(self, image, prefix="검사결과", fmt=None, force=False):
+        """이미지를 복사해 저장 대기열에 넣고 저장될 경로를 반환 (버퍼가 없으면 None)"""
+        fmt = fmt or self.fmt
+        buf = self._take(image, force)
+        if buf is None:
+            return None
+        np.copyto(buf, image)
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        name = self.pattern.format(prefix=prefix, time=datetime.now(), seq=seq)
+        path = os.path.join(self.out_dir, name + IMAGE_FORMATS[fmt][0])
+        self._queue.put((buf, path, fmt))
+        return path
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            buf, path, fmt = item
+            try:
+                ext, params = IMAGE_FORMATS[fmt]
+                ok, data = cv2.imencode(ext, buf, params)
+                if not ok:
+                    raise OSError(f"이미지 인코딩 실패: {os.path.basename(path)}")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as f:
+                    f.write(data)
+                with self._lock:
+                    self.saved += 1
+                self.last_path = path
+                self.error = None
+            except (OSError, cv2.error) as ex:
+                with self._lock:
+                    self.failed += 1
+                self.error = str(ex)
+            finally:
+                with self._lock:
+                    if self._allocated > self.max_buffers:
+                        self._allocated -= 1
+                    else:
+                        self._free.append(buf)
+                self._queue.task_done()
+
+    def flush(self, timeout=None):
+        """대기 중인 저장이 모두 끝날 때까지 기다림 (timeout 초 안에 끝나면 True)"""
+        q = self._queue
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remain = None if deadline is None else deadline - time.perf_counter()
+                if remain is not None and remain <= 0:
+                    return False
+                q.all_tasks_done.wait(remain)
+        return True
+
+    def close(self, timeout=SAVE_CLOSE_TIMEOUT):
+        """남은 저장을 최대 timeout 초 기다린 뒤 인코더 스레드 종료. 저장하지 못한 장수 반환
+
+        무손실 WebP 연속 저장은 수십 초 걸릴 수 있고, 멈춘 네트워크 폴더 쓰기는 끝나지 않을 수 있다.
+        시간이 지나면 아직 시작하지 않은 요청은 버리고, 쓰는 중인 스레드는 (데몬이라) 기다리지 않는다.
+        """
+        deadline = time.perf_counter() + timeout
+        unsaved = 0
+        if not self.flush(timeout):
+            unsaved = self.pending
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._queue.task_done()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(max(0.0, deadline - time.perf_counter()))
+        return unsaved
+
+
+# ──────────────────────────────────────────────
+# DXF 오버레이 캐시
+# ──────────────────────────────────────────────
+def simplify_polyline(pts, closed, eps):
+    """Douglas–Peucker 단순화 (eps 는 도면 단위). 점이 2개 이하면 그대로 반환"""
+    if len(pts) <= 2:
+        return pts
+    approx = cv2.approxPolyDP(pts.reshape(-1, 1, 2), eps, closed).reshape(-1, 2)
+    return approx if len(approx) >= 2 else pts
+
+
+class ContourGridIndex:
+    """윤곽선 바운딩 박스에 대한 균일 격자 공간 인덱스 (도면 좌표계)
+
+    셀마다 걸치는 윤곽선 번호를 CSR(셀 시작 위치 + 번호 배열) 형태로 보관한다.
+    너무 많은 셀에 걸치는 큰 윤곽선(외곽 테두리 등)은 따로 두고 항상 후보로 본다.
+    """
+
+    MAX_CELLS_PER_CONTOUR = 64
+
+    def __init__(self, bboxes, max_dim=256):
+        # bboxes: (N, 4) float32 [x1, y1, x2, y2]
+        self.bboxes = bboxes
+        n = len(bboxes)
+        if n == 0:
+            self.gx = self.gy = 0
+            return
+        self.x0, self.y0 = bboxes[:, 0].min(), bboxes[:, 1].min()
+        span_x = max(float(bboxes[:, 2].max() - self.x0), 1e-6)
+        span_y = max(float(bboxes[:, 3].max() - self.y0), 1e-6)
+        # 셀 하나에 윤곽선이 몇 개 정도 들어가도록 격자 크기 결정
+        dim = int(min(max_dim, max(1, np.sqrt(n))))
+        self.cell = max(span_x, span_y) / dim
+        self.gx = int(span_x / self.cell) + 1
+        self.gy = int(span_y / self.cell) + 1
+
+        ix0, iy0, ix1, iy1 = self._cells(bboxes[:, 0], bboxes[:, 1], bboxes[:, 2], bboxes[:, 3])
+        nx = ix1 - ix0 + 1
+        ny = iy1 - iy0 + 1
+        per = nx * ny
+        large = per > self.MAX_CELLS_PER_CONTOUR
+        self.large = np.flatnonzero(large)
+
+        ids = np.flatnonzero(~large)
+        per = per[ids]
+        total = int(per.sum())
+        owner = np.repeat(ids, per)
+        start = np.repeat(np.cumsum(per) - per, per)
+        k = np.arange(total) - start
+        nx_o = nx[owner]
+        cell = (iy0[owner] + k // nx_o) * self.gx + (ix0[owner] + k % nx_o)
+
+        order = np.argsort(cell, kind='stable')
+        self.items = owner[order].astype(np.int32)
+        self.starts = np.searchsorted(cell[order], np.arange(self.gx * self.gy + 1))
+
+    def _cells(self, x1, y1, x2, y2):
+        ix0 = np.clip(((x1 - self.x0) / self.cell).astype(np.int64), 0, self.gx - 1)
+        iy0 = np.clip(((y1 - self.y0) / self.cell).astype(np.int64), 0, self.gy - 1)
+        ix1 = np.clip(((x2 - self.x0) / self.cell).astype(np.int64), 0, self.gx - 1)
+        iy1 = np.clip(((y2 - self.y0) / self.cell).astype(np.int64), 0, self.gy - 1)
+        return ix0, iy0, ix1, iy1
+
+    def query(self, x1, y1, x2, y2):
+        """영역과 겹치는 윤곽선 번호 (오름차순)"""
+        b = self.bboxes
+        if len(b) == 0:
+            return np.empty(0, dtype=np.int64)
+        ix0, iy0, ix1, iy1 = (int(v) for v in self._cells(
+            np.array(x1), np.array(y1), np.array(x2), np.array(y2)))
+        if (ix1 - ix0 + 1) * (iy1 - iy0 + 1) * 4 >= self.gx * self.gy:
+            # 화면이 도면 대부분을 덮으면 격자를 거치지 않고 바로 박스 검사
+            cand = None
+        else:
+            rows = [self.items[self.starts[r * self.gx + ix0]:self.starts[r * self.gx + ix1 + 1]]
+                    for r in range(iy0, iy1 + 1)]
+            rows.append(self.large)
+            cand = np.unique(np.concatenate(rows))
+            b = b[cand]
+        hit = (b[:, 0] <= x2) & (b[:, 2] >= x1) & (b[:, 1] <= y2) & (b[:, 3] >= y1)
+        return np.flatnonzero(hit) if cand is None else cand[hit]
+
+
+class DxfOverlayCache:
+    """DXF 윤곽선을 하나의 연속 float32 배열로 보관하고, 뷰가 바뀔 때만 래스터화
+
+    변환(회전·배율·이동)은 전체 점에 대해 한 번의 행렬곱으로 처리하고,
+    결과는 선이 그려진 픽셀 인덱스로 캐시해 매 프레임 색만 입힌다.
+    화면 밖 윤곽선은 격자 인덱스로 걸러 변환·그리기 대상에서 뺀다.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._key = None
+        self._mask = None
+        self._idx = np.empty(0, dtype=np.intp)
+        self.level = None
+        self.vertex_count = 0
+        self.visible_count = 0
+        self.level_stats = {}         # LOD → (원본 정점 수, 단순화 후 정점 수)
+        self.set_contours([])
+
+    def set_contours(self, contours, lods=None, layer_ids=None):
+        """contours: [(ctype, pts), ...], lods: 곡선별 LOD 배열 튜플 (없으면 None)
+        layer_ids: 윤곽선별 레이어 번호 (숨긴 레이어는 set_hidden_layers 로 지정)"""
+        self._contours = contours
+        self._layer_ids = None if layer_ids is None else np.asarray(layer_ids)
+        self._layer_visible = None
+        self._lods = lods if lods and any(l is not None for l in lods) else None
+        self._levels = {}
+        self.level_stats = {}
+        self._views = {}
+        self._closed = np.array([ctype == 'poly' for ctype, _ in contours], dtype=bool)
+        if contours:
+            bboxes = np.array([np.concatenate([pts.min(axis=0), pts.max(axis=0)])
+                               for _, pts in contours], dtype=np.float32)
+        else:
+            bboxes = np.empty((0, 4), dtype=np.float32)
+        self.index = ContourGridIndex(bboxes)
+        self.version += 1
+        self._key = None
+
+    @staticmethod
+    def pick_level(scale):
+        """배율에서 오차 허용치를 만족하는 가장 거친 LOD 번호"""
+        for k, s in enumerate(DXF_LOD_SCALES):
+            if s >= scale:
+                return k
+        return len(DXF_LOD_SCALES) - 1
+
+    def _level_arrays(self, level):
+        """LOD 별 연결 배열 + 오프셋 (처음 쓸 때 만들어 보관)
+
+        곡선은 미리 만든 LOD 를 쓰고, 폴리선은 그 LOD 의 허용 오차로 Douglas–Peucker 단순화
+        """
+        arrays = self._levels.get(level)
+        if arrays is None:
+            eps = DXF_PIXEL_TOL / DXF_LOD_SCALES[level]
+            lods = self._lods if self._lods is not None else [None] * len(self._contours)
+            parts = [simplify_polyline(pts, ctype == 'poly', eps) if lod is None else lod[level]
+                     for (ctype, pts), lod in zip(self._contours, lods)]
+            if parts:
+                pts = np.ascontiguousarray(np.concatenate(parts), dtype=np.float32)
+                lengths = np.array([len(p) for p in parts], dtype=np.int64)
+                offsets = np.concatenate([[0], np.cumsum(lengths)])
+            else:
+                pts = np.empty((0, 2), dtype=np.float32)
+                offsets = np.zeros(1, dtype=np.int64)
+            arrays = self._levels[level] = (pts, offsets)
+            self.level_stats[level] = (sum(len(p) for _, p in self._contours), len(pts))
+        return arrays
+
+    def contours_at(self, scale):
+        """배율에 맞는 LOD 로 단순화된 보이는 윤곽선 [(ctype, pts), ...] (검사·정합용, 캐시)"""
+        level = self.pick_level(scale)
+        contours = self._views.get(level)
+        if contours is None:
+            pts, offsets = self._level_arrays(level)
+            parts = np.split(pts, offsets[1:-1]) if len(pts) else []
+            keep = (np.ones(len(parts), dtype=bool) if self._layer_visible is None
+                    else self._layer_visible[self._layer_ids])
+            contours = self._views[level] = [('poly' if c else 'line', p) for p, c, k
+                                             in zip(parts, self._closed, keep) if k]
+        return contours
+
+    def reduction(self, scale):
+        """배율에서 쓰는 LOD 의 (원본 정점 수, 단순화 후 정점 수)"""
+        level = self.pick_level(scale)
+        self._level_arrays(level)
+        return self.level_stats[level]
+
+    def invalidate(self):
+        self._key = None
+
+    def set_hidden_layers(self, hidden_ids):
+        """숨길 레이어 번호 집합 (비어 있으면 모두 표시)"""
+        if self._layer_ids is None or not hidden_ids:
+            self._layer_visible = None
+        else:
+            n_layers = int(max(max(hidden_ids), self._layer_ids.max(initial=0))) + 1
+            visible = np.ones(n_layers, dtype=bool)
+            visible[list(hidden_ids)] = False
+            self._layer_visible = visible
+        self._views = {}
+        self.version += 1
+        self._key = None
+
+    def _visible(self, level, h, w, m, t):
+        """화면(여유 2px)에 걸치는 윤곽선만 모은 (점 배열, 오프셋, 닫힘 여부)"""
+        pts, offsets = self._level_arrays(level)
+        n = len(offsets) - 1
+        if n == 0:
+            return pts, offsets, self._closed
+        if abs(float(np.linalg.det(m))) < 1e-12:
+            ids = np.arange(n)
+        else:
+            # 화면 네 모서리를 도면 좌표로 역변환한 뒤 축 정렬 박스로 질의
+            corners = np.array([[-2, -2], [w + 2, -2], [-2, h + 2], [w + 2, h + 2]],
+                               dtype=np.float64)
+            world = (corners - t) @ np.linalg.inv(m.astype(np.float64))
+            (x1, y1), (x2, y2) = world.min(axis=0), world.max(axis=0)
+            ids = self.index.query(x1, y1, x2, y2)
+        if self._layer_visible is not None:
+            # 숨긴 레이어는 변환·그리기 전에 제외
+            ids = ids[self._layer_visible[self._layer_ids[ids]]]
+        if len(ids) == n:
+            return pts, offsets, self._closed
+
+        lengths = offsets[ids + 1] - offsets[ids]
+        new_offsets = np.concatenate([[0], np.cumsum(lengths)])
+        gather = np.arange(new_offsets[-1]) + np.repeat(offsets[ids] - new_offsets[:-1], lengths)
+        return pts[gather], new_offsets, self._closed[ids]
+
+    def _rebuild(self, h, w, scale, angle, offset_x, offset_y, level):
+        if self._mask is None or self._mask.shape != (h, w):
+            self._mask = np.zeros((h, w), dtype=np.uint8)
+        else:
+            self._mask.fill(0)
+
+        rad = np.radians(angle)
+        c, s = np.cos(rad) * scale, np.sin(rad) * scale
+        # (pts @ rot_m.T) * scale 와 동일한 변환을 한 번에 계산
+        m = np.array([[c, s], [-s, c]], dtype=np.float32)
+        t = np.array([w // 2 + offset_x, h // 2 + offset_y], dtype=np.float32)
+        pts, offsets, flags = self._visible(level, h, w, m, t)
+        self.vertex_count = len(pts)
+        self.visible_count = len(offsets) - 1
+        if len(pts):
+            xy = pts @ m
+            xy += t
+            xy_i = xy.astype(np.int32)
+
+            parts = np.split(xy_i, offsets[1:-1])
+            closed = [p for p, c_ in zip(parts, flags) if c_]
+            opened = [p for p, c_ in zip(parts, flags) if not c_]
+            if closed:
+                cv2.polylines(self._mask, closed, True, 255, 1)
+            if opened:
+                cv2.polylines(self._mask, opened, False, 255, 1)
+
+        self._idx = np.flatnonzero(self._mask)
+
+    def render(self, canvas, scale, angle, offset_x, offset_y, color):
+        """캐시된 오버레이를 canvas 에 합성 (뷰 변경 시에만 재생성)"""
+        h, w = canvas.shape[:2]
+        level = self.pick_level(scale)
+        key = (h, w, scale, angle, offset_x, offset_y, self.version, level)
+        if key != self._key:
+            self._rebuild(h, w, scale, angle, offset_x, offset_y, level)
+            self.level = level
+            self._key = key
+        if self._idx.size == 0:
+            return canvas
+        if canvas.flags['C_CONTIGUOUS']:
+            canvas.reshape(-1, 3)[self._idx] = color
+        else:
+            canvas[self._mask > 0] = color
+        return canvas
+
+
+# ──────────────────────────────────────────────
+# UI 렌더링 (폰트·글자 캐시, 유지 모드 패널)
+# ──────────────────────────────────────────────
+_FONT_CACHE = {}
+
+
+def get_font(name, size):
+    """TrueType 폰트를 한 번만 로드해서 재사용 (실패 시 기본 폰트)"""
+    key = (name, size)
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        try:
+            font = ImageFont.truetype(name, size)
+        except Exception:
+            font = ImageFont.load_default()
+        _FONT_CACHE[key] = font
+    return font
+
+
+class GlyphCache:
+    """(텍스트, 폰트, 색상) 별로 미리 렌더링한 글자 비트맵을 보관 (LRU)"""
+
+    def __init__(self, max_items=1024):
+        self.max_items = max_items
+        self._items = OrderedDict()
+
+    def get(self, text, font, color):
+        """(dx, dy, 1-alpha, color*alpha) 반환. dx, dy 는 PIL 기준 좌표에서의 오프셋"""
+        key = (text, font, color)
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+            return item
+
+        l, t, r, b = font.getbbox(text) if text else (0, 0, 0, 0)
+        r, b = max(r, l + 1), max(b, t + 1)
+        img = Image.new('L', (r, b), 0)
+        ImageDraw.Draw(img).text((0, 0), text, font=font, fill=255)
+        alpha = np.asarray(img, dtype=np.float32)[t:b, l:r, None] / 255.0
+        pre = alpha * np.array(color, dtype=np.float32)
+        item = (l, t, 1.0 - alpha, pre)
+
+        self._items[key] = item
+        if len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+        return item
+
+    def extent(self, xy, text, font, color):
+        """글자가 실제로 찍히는 영역 (x1, y1, x2, y2)"""
+        dx, dy, inv, _ = self.get(text, font, color)
+        x1, y1 = int(xy[0]) + dx, int(xy[1]) + dy
+        return x1, y1, x1 + inv.shape[1], y1 + inv.shape[0]
+
+    def _place(self, shape, xy, item):
+        """대상 이미지 범위로 잘라낸 (대상 슬라이스, 글자 슬라이스)"""
+        dx, dy, inv, _ = item
+        x1, y1 = int(xy[0]) + dx, int(xy[1]) + dy
+        h, w = inv.shape[:2]
+        ix1, iy1 = max(0, x1), max(0, y1)
+        ix2, iy2 = min(shape[1], x1 + w), min(shape[0], y1 + h)
+        if ix1 >= ix2 or iy1 >= iy2:
+            return None
+        gx1, gy1 = ix1 - x1, iy1 - y1
+        return ((slice(iy1, iy2), slice(ix1, ix2)),
+                (slice(gy1, gy1 + iy2 - iy1), slice(gx1, gx1 + ix2 - ix1)))
+
+    def draw(self, img, xy, text, font, color):
+        """PIL draw.text 와 같은 위치에 알파 블렌딩으로 글자를 그림"""
+        item = self.get(text, font, color)
+        place = self._place(img.shape, xy, item)
+        if place is None:
+            return
+        dst, src = place
+        roi = img[dst]
+        roi[:] = roi * item[2][src] + item[3][src]
+
+    def draw_layer(self, inv, pre, xy, text, font, color):
+        """미리 곱한 알파 층(inv, pre)에 글자를 겹침 (작은 오버레이를 캐시할 때 사용)"""
+        item = self.get(text, font, color)
+        place = self._place(inv.shape, xy, item)
+        if place is None:
+            return
+        dst, src = place
+        g_inv = item[2][src]
+        pre[dst] = pre[dst] * g_inv + item[3][src]
+        inv[dst] *= g_inv
+
+
+class RetainedPanel:
+    """유지 모드 패널: 상태가 바뀐 요소만 다시 그리고 그 영역만 화면 버퍼로 복사
+
+    base 는 배경·제목·섹션 헤더처럼 변하지 않는 층이고, 각 요소는
+    (이름, 영역, 상태 키) 로 관리된다. 키가 같으면 아무 일도 하지 않는다.
+    좌표는 모두 패널 기준(좌상단 0, 0)이다.
+    """
+
+    def __init__(self, x0, w, h):
+        self.x0, self.w, self.h = x0, w, h
+        self.base = np.zeros((h, w, 3), dtype=np.uint8)
+        self.buf = np.zeros((h, w, 3), dtype=np.uint8)
+        self._keys = {}
+        self._dirty = []
+        self._full = True
+
+    def set_base(self, draw_fn):
+        draw_fn(self.base)
+        self.invalidate()
+
+    def invalidate(self):
+        """모든 요소를 다시 그리도록 초기화"""
+        np.copyto(self.buf, self.base)
+        self._keys.clear()
+        self._dirty = []
+        self._full = True
+
+    def _restore(self, rect):
+        x1, y1, x2, y2 = self._clip(rect)
+        if x1 < x2 and y1 < y2:
+            self.buf[y1:y2, x1:x2] = self.base[y1:y2, x1:x2]
+            self._dirty.append((x1, y1, x2, y2))
+
+    def _clip(self, rect):
+        x1, y1, x2, y2 = rect
+        return max(0, x1), max(0, y1), min(self.w, x2), min(self.h, y2)
+
+    def element(self, name, rect, key, draw_fn):
+        """상태 키가 바뀐 경우에만 영역을 base 로 되돌리고 다시 그림"""
+        prev = self._keys.get(name)
+        if prev == (rect, key):
+            return False
+        if prev is not None and prev[0] != rect:
+            self._restore(prev[0])
+        self._keys[name] = (rect, key)
+        self._restore(rect)
+        draw_fn(self.buf)
+        return True
+
+    def forget(self, name):
+        """요소를 제거하고 그 영역을 base 로 되돌림"""
+        prev = self._keys.pop(name, None)
+        if prev is not None:
+            self._restore(prev[0])
+
+    def blit(self, dst, full=False):
+        """변경된 영역만 dst 로 복사 (full=True 이면 패널 전체)"""
+        if full or self._full:
+            dst[:self.h, self.x0:self.x0 + self.w] = self.buf
+        else:
+            for x1, y1, x2, y2 in self._dirty:
+                dst[y1:y2, self.x0 + x1:self.x0 + x2] = self.buf[y1:y2, x1:x2]
+        self._dirty = []
+        self._full = False
+
+
+# ──────────────────────────────────────────────
+# 렌더 루프 버퍼 풀
+# ──────────────────────────────────────────────
+class FrameBufferPool:
+    """렌더 루프에서 재사용하는 버퍼 묶음
+
+    캔버스 2장(더블 버퍼)과 화면 출력 버퍼를 해상도별로 한 번만 할당한다.
+    그리기가 끝난 캔버스는 swap() 으로 앞쪽이 되어 last_full_canvas 로 쓰이고,
+    다음 프레임은 뒤쪽 버퍼에 그리므로 복사가 필요 없다.
+    """
+
+    def __init__(self):
+        self.display = None
+        self._canvases = [None, None]
+        self._undistorted = None
+        self._front = 0
+        self._display_fresh = True
+
+    def allocate(self, cam_w, cam_h, view_h, total_w):
+        self.display = np.zeros((view_h, total_w, 3), dtype=np.uint8)
+        self._canvases = [np.empty((cam_h, cam_w, 3), dtype=np.uint8) for _ in range(2)]
+        self._front = 0
+        self._display_fresh = True
+
+    def canvas_for(self, frame):
+        """뒤쪽 캔버스에 frame 을 복사해서 반환 (크기가 다르면 그때만 재할당)"""
+        back = 1 - self._front
+        buf = self._canvases[back]
+        if buf is None or buf.shape != frame.shape:
+            buf = self._canvases[back] = np.empty_like(frame)
+        np.copyto(buf, frame)
+        return buf
+
+    def undistorted_for(self, frame):
+        """왜곡 보정 결과를 받을 버퍼 (크기가 다르면 그때만 재할당)"""
+        if self._undistorted is None or self._undistorted.shape != frame.shape:
+            self._undistorted = np.empty_like(frame)
+        return self._undistorted
+
+    def swap(self):
+        """방금 그린 캔버스를 앞쪽으로 돌리고 반환"""
+        self._front = 1 - self._front
+        return self._canvases[self._front]
+
+    def take_fresh(self):
+        """화면 버퍼가 새로 할당됐는지 (패널 전체를 다시 복사해야 하는지)"""
+        fresh = self._display_fresh
+        self._display_fresh = False
+        return fresh
+
+
+# ──────────────────────────────────────────────
+# 성능 측정 / 합성 프레임
+# ──────────────────────────────────────────────
+class StageTimer:
+    """프레임 단위로 렌더링 구간별 소요 시간(ms)을 기록"""
+
+    def __init__(self, history=600):
+        self.frames = deque(maxlen=history)   # 각 원소: {구간: ms}
+        self._cur = None
+        self._t = 0.0
+
+    def start(self):
+        self._cur = {}
+        self._t = time.perf_counter()
+
+    def lap(self, name):
+        """직전 lap 이후 경과 시간을 name 구간에 누적"""
+        if self._cur is None:
+            return
+        t = time.perf_counter()
+        self._cur[name] = self._cur.get(name, 0.0) + (t - self._t) * 1000
+        self._t = t
+
+    def end(self):
+        if self._cur is None:
+            return
+        self._cur['total'] = sum(self._cur.values())
+        self.frames.append(self._cur)
+        self._cur = None
+
+    def summary(self):
+        """{구간: (p50, p99)} (ms)"""
+        stages = {}
+        for f in self.frames:
+            for k, v in f.items():
+                stages.setdefault(k, []).append(v)
+        return {k: (float(np.percentile(v, 50)), float(np.percentile(v, 99)))
+                for k, v in stages.items()}
+
+
+# ──────────────────────────────────────────────
+# DXF 파싱 (단일 패스 + 작업자 풀 테셀레이션)
+# ──────────────────────────────────────────────
+DXF_SUPPORTED = ('LINE', 'CIRCLE', 'ARC', 'ELLIPSE', 'LWPOLYLINE', 'POLYLINE', 'SPLINE', 'HATCH')
+DXF_MAX_BLOCK_DEPTH = 16
+
+# 곡선 근사 설정: 화면에서 허용하는 현(chord) 오차와 LOD 별 기준 배율(px / 도면 단위)
+# LOD k 는 배율 DXF_LOD_SCALES[k] 이하에서 오차가 DXF_PIXEL_TOL 을 넘지 않도록 근사한다.
+DXF_PIXEL_TOL = 0.25
+DXF_LOD_SCALES = (1 / 16, 1 / 4, 1.0, 4.0, 16.0, 64.0)
+DXF_MIN_SEGMENTS = 8
+DXF_MAX_SEGMENTS = 4096
+
+
+class DxfGeometry:
+    """파싱된 도면
+
+    contours : [(ctype, pts), ...]  ctype 은 'poly'(닫힘) / 'line'(열림), pts 는 float32 (N, 2)
+    lods     : contours 와 같은 순서. 곡선이면 DXF_LOD_SCALES 별 근사 배열의 튜플, 아니면 None
+    layers   : 레이어 이름 목록, layer_ids : 윤곽선별 레이어 번호 (int32)
+    counts   : 엔티티 타입별 개수 (모델 공간 기준)
+    center   : 기준점 평균 (원은 상하좌우 4점으로 계산)
+    bounds   : (xmin, ymin, xmax, ymax)
+    """
+
+    def __init__(self, contours, counts, center, bounds, lods=None, layers=None, layer_ids=None):
+        self.contours = contours
+        self.lods = lods if lods is not None else [None] * len(contours)
+        self.layers = layers if layers is not None else ['0']
+        self.layer_ids = (layer_ids if layer_ids is not None
+                          else np.zeros(len(contours), dtype=np.int32))
+        self.counts = counts
+        self.center = center
+        self.bounds = bounds
+
+    @property
+    def width(self):
+        return self.bounds[2] - self.bounds[0]
+
+
+def _extract_entity(e, t):
+    """엔티티에서 테셀레이션에 필요한 값만 뽑음 (ezdxf 객체 접근은 여기서만)"""
+    if t == 'LWPOLYLINE':
+        return ('pts', np.array(e.get_points('xy'), dtype=np.float32), e.closed)
+    if t == 'POLYLINE':
+        pts = np.array([[v.dxf.location.x, v.dxf.location.y] for v in e.vertices],
+                       dtype=np.float32)
+        return ('pts', pts, e.is_closed)
+    if t == 'LINE':
+        pts = np.array([[e.dxf.start.x, e.dxf.start.y],
+                        [e.dxf.end.x,   e.dxf.end.y]], dtype=np.float32)
+        return ('pts', pts, False)
+    if t == 'CIRCLE':
+        return ('circle', e.dxf.center.x, e.dxf.center.y, e.dxf.radius)
+    if t == 'ARC':
+        return ('arc', e.dxf.center.x, e.dxf.center.y, e.dxf.radius,
+                e.dxf.start_angle, e.dxf.end_angle)
+    if t == 'ELLIPSE':
+        return ('ellipse', e.dxf.center.x, e.dxf.center.y,
+                e.dxf.major_axis.x, e.dxf.major_axis.y, e.dxf.ratio,
+                e.dxf.start_param, e.dxf.end_param)
+    if t == 'SPLINE':
+        # 수학 객체(BSpline)만 넘겨서 작업자 스레드에서 근사
+        return ('spline', e.construction_tool())
+    return None
+
+
+def _extract_items(e, t):
+    """엔티티 하나 → 근사 항목 목록 (HATCH 는 경계마다 닫힌 경로 하나)"""
+    if t == 'HATCH':
+        return [('path', p, True) for p in ezdxf.path.from_hatch(e) if len(p)]
+    item = _extract_entity(e, t)
+    return [item] if item is not None else []
+
+
+def _insert_transforms(e):
+    """INSERT(MINSERT 배열 포함) → [(블록 이름, 3x3 변환 행렬, 레이어), ...]"""
+    refs = e.multi_insert() if e.mcount > 1 else (e,)
+    out = []
+    for ref in refs:
+        m = ref.matrix44()
+        o = m.transform((0, 0, 0))
+        ux = m.transform_direction((1, 0, 0))
+        uy = m.transform_direction((0, 1, 0))
+        out.append((e.dxf.name,
+                    np.array([[ux.x, uy.x, o.x], [ux.y, uy.y, o.y], [0, 0, 1]]),
+                    e.dxf.layer))
+    return out
+
+
+def _segments(r, sweep, tol):
+    """반경 r, 중심각 sweep 인 호를 현 오차 tol 이하로 근사할 때 필요한 구간 수"""
+    min_n = int(np.ceil(DXF_MIN_SEGMENTS * sweep / (2 * np.pi)))
+    n = min_n if r <= tol else int(np.ceil(sweep / (2 * np.arccos(1 - tol / r))))
+    return max(2, min_n, min(DXF_MAX_SEGMENTS, n))
+
+
+def _curve_lods(r, sweep, sample):
+    """LOD 별로 구간 수를 정해 sample(n) 으로 근사 (구간 수가 같으면 배열 공유)"""
+    lods = []
+    prev_n, prev = None, None
+    for scale in DXF_LOD_SCALES:
+        n = _segments(r, sweep, DXF_PIXEL_TOL / scale)
+        if n != prev_n:
+            prev_n, prev = n, sample(n)
+        lods.append(prev)
+    return tuple(lods)
+
+
+def _tess_pts(item):
+    _, pts, closed = item
+    if len(pts) < 2:
+        return None
+    return ('poly' if closed else 'line'), pts, pts, None
+
+
+def _tess_circle(item):
+    _, cx, cy, r = item
+
+    def _sample(n):
+        angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
+        return np.column_stack([
+            cx + r * np.cos(angles),
+            cy + r * np.sin(angles)
+        ]).astype(np.float32)
+
+    lods = _curve_lods(r, 2 * np.pi, _sample)
+    ref = np.array([[cx + r, cy], [cx - r, cy], [cx, cy + r], [cx, cy - r]], dtype=np.float32)
+    return 'poly', lods[-1], ref, lods
+
+
+def _tess_arc(item):
+    _, cx, cy, r, start, end = item
+    a1 = np.radians(start)
+    a2 = np.radians(end)
+    if a2 <= a1:
+        a2 += 2 * np.pi
+
+    def _sample(n):
+        angles = np.linspace(a1, a2, n + 1)
+        return np.column_stack([
+            cx + r * np.cos(angles),
+            cy + r * np.sin(angles)
+        ]).astype(np.float32)
+
+    lods = _curve_lods(r, a2 - a1, _sample)
+    return 'line', lods[-1], lods[-1], lods
+
+
+def _tess_ellipse(item):
+    _, cx, cy, mx, my, ratio, a1, a2 = item
+    if a2 <= a1:
+        a2 += 2 * np.pi
+    major_len = np.hypot(mx, my)
+    major_angle = np.arctan2(my, mx)
+    full = np.isclose(a2 - a1, 2 * np.pi)
+
+    def _sample(n):
+        t = np.linspace(a1, a2, n, endpoint=False) if full else np.linspace(a1, a2, n + 1)
+        px = cx + major_len * np.cos(t) * np.cos(major_angle) \
+                - major_len * ratio * np.sin(t) * np.sin(major_angle)
+        py = cy + major_len * np.cos(t) * np.sin(major_angle) \
+                + major_len * ratio * np.sin(t) * np.cos(major_angle)
+        return np.column_stack([px, py]).astype(np.float32)
+
+    # 매개변수 등간격 근사이므로 장반경 기준으로 구간 수를 잡으면 오차가 보장됨
+    lods = _curve_lods(major_len, a2 - a1, _sample)
+    return ('poly' if full else 'line'), lods[-1], lods[-1], lods
+
+
+def _flatten_lods(curve, closed):
+    # 가장 세밀한 LOD 만 ezdxf 로 평탄화하고, 나머지는 그 결과를 허용 오차로 단순화
+    finest_tol = DXF_PIXEL_TOL / DXF_LOD_SCALES[-1]
+    finest = np.array([[p[0], p[1]] for p in curve.flattening(finest_tol)], dtype=np.float32)
+    if len(finest) < 2:
+        return None
+    lods = []
+    for scale in DXF_LOD_SCALES[:-1]:
+        approx = cv2.approxPolyDP(finest.reshape(-1, 1, 2), DXF_PIXEL_TOL / scale, closed)
+        lods.append(approx.reshape(-1, 2))
+    lods.append(finest)
+    return ('poly' if closed else 'line'), finest, finest, tuple(lods)
+
+
+def _tess_spline(item):
+    return _flatten_lods(item[1], False)
+
+
+def _tess_path(item):
+    return _flatten_lods(item[1], item[2])
+
+
+_TESSELLATORS = {
+    'pts': _tess_pts,
+    'circle': _tess_circle,
+    'arc': _tess_arc,
+    'ellipse': _tess_ellipse,
+    'spline': _tess_spline,
+    'path': _tess_path,
+}
+
+
+def _tessellate_chunk(items, layers):
+    """엔티티 묶음을 근사하고 기준점 합계·개수·최소·최대를 함께 계산 (layers 는 items 와 같은 순서)"""
+    contours = []
+    lods = []
+    out_layers = []
+    ref_sum = np.zeros(2, dtype=np.float64)
+    ref_n = 0
+    ref_min = np.full(2, np.inf)
+    ref_max = np.full(2, -np.inf)
+    for item, layer in zip(items, layers):
+        try:
+            res = _TESSELLATORS[item[0]](item)
+        except Exception:
+            continue
+        if res is None:
+            continue
+        ctype, pts, ref, lod = res
+        contours.append((ctype, pts))
+        lods.append(lod)
+        out_layers.append(layer)
+        ref_sum += ref.sum(axis=0, dtype=np.float64)
+        ref_n += len(ref)
+        np.minimum(ref_min, ref.min(axis=0), out=ref_min)
+        np.maximum(ref_max, ref.max(axis=0), out=ref_max)
+    return contours, lods, out_layers, ref_sum, ref_n, ref_min, ref_max
+
+
+def _instance_block(result, instances, level_ratio):
+    """블록 정의의 근사 결과 하나를 모든 삽입 위치로 변환 (블록당 행렬 묶음 한 번에 계산)
+
+    result    : _tessellate_chunk 결과 (블록 좌표계)
+    instances : [(3x3 행렬, 삽입 레이어), ...]
+    배율이 큰 삽입은 그만큼 세밀한 LOD 를 쓰도록 LOD 번호를 옮긴다.
+    """
+    contours, lods, layers, ref_sum, ref_n, ref_min, ref_max = result
+    mats = np.stack([m for m, _ in instances])
+    a = mats[:, :2, :2].astype(np.float32)
+    b = mats[:, :2, 2].astype(np.float32)
+    k_count = len(instances)
+    last = len(DXF_LOD_SCALES) - 1
+    det = np.abs(mats[:, 0, 0] * mats[:, 1, 1] - mats[:, 0, 1] * mats[:, 1, 0])
+    shift = np.rint(np.log(np.sqrt(np.maximum(det, 1e-12))) / np.log(level_ratio)).astype(int)
+
+    moved = {}
+
+    def _move(pts):
+        out = moved.get(id(pts))
+        if out is None:
+            out = moved[id(pts)] = np.einsum('kij,nj->kni', a, pts) + b[:, None, :]
+        return out
+
+    out_contours, out_lods, out_layers = [], [], []
+    for (ctype, pts), lod, layer in zip(contours, lods, layers):
+        world = _move(pts)
+        world_lod = None if lod is None else [_move(p) for p in lod]
+        for k, (_, ins_layer) in enumerate(instances):
+            out_contours.append((ctype, world[k]))
+            if world_lod is None:
+                out_lods.append(None)
+            else:
+                out_lods.append(tuple(world_lod[min(last, max(0, j + shift[k]))][k]
+                                      for j in range(last + 1)))
+            # 블록 안에서 '0' 레이어에 있는 도형은 삽입한 레이어를 따름
+            out_layers.append(ins_layer if layer == '0' else layer)
+
+    # 기준점 합은 선형이라 행렬로 바로 옮기고, 범위는 모서리 4점을 옮겨서 계산
+    sums = (mats[:, :2, :2] @ ref_sum) + ref_n * mats[:, :2, 2]
+    corners = np.array([[ref_min[0], ref_min[1]], [ref_max[0], ref_min[1]],
+                        [ref_min[0], ref_max[1]], [ref_max[0], ref_max[1]]])
+    world_c = np.einsum('kij,nj->kni', mats[:, :2, :2], corners) + mats[:, None, :2, 2]
+    return (out_contours, out_lods, out_layers, sums.sum(axis=0), ref_n * k_count,
+            world_c.reshape(-1, 2).min(axis=0), world_c.reshape(-1, 2).max(axis=0))
+
+
+def parse_dxf(path, progress=None, workers=None, chunk_size=256):
+    """DXF 파일을 한 번만 순회하며 읽어 DxfGeometry 반환 (도형이 없으면 contours 가 빈 목록)
+
+    엔티티는 타입별 추출 함수로 값만 뽑은 뒤 묶음 단위로 작업자 풀에 보내 근사한다.
+    INSERT 는 블록 정의마다 한 번만 근사하고, 삽입 위치별 행렬을 모아 한 번에 변환한다.
+    progress(text, fraction) 콜백으로 진행 상황을 알린다.
+    """
+    if progress:
+        progress("파일 읽는 중", 0.0)
+    doc = ezdxf.readfile(path)
+    msp = doc.modelspace()
+    total = max(1, len(msp))
+
+    blocks = {}        # 블록 이름 → (items, layers, 중첩 INSERT 목록)
+    instances = {}     # 블록 이름 → [(월드 변환 행렬, 삽입 레이어), ...]
+
+    def _block(name):
+        b = blocks.get(name)
+        if b is None:
+            b = blocks[name] = ([], [], [])
+            block = doc.blocks.get(name)
+            for be in block if block is not None else ():
+                bt = be.dxftype()
+                try:
+                    if bt == 'INSERT':
+                        b[2].extend(_insert_transforms(be))
+                    elif bt in DXF_SUPPORTED:
+                        found = _extract_items(be, bt)
+                        b[0].extend(found)
+                        b[1].extend([be.dxf.layer] * len(found))
+                except Exception:
+                    continue
+        return b
+
+    def _place(name, mat, layer, depth):
+        if depth > DXF_MAX_BLOCK_DEPTH:
+            return
+        instances.setdefault(name, []).append((mat, layer))
+        for child, child_mat, child_layer in _block(name)[2]:
+            _place(child, mat @ child_mat, layer if child_layer == '0' else child_layer, depth + 1)
+
+    counts = {}
+    futures = []
+    chunk, chunk_layers = [], []
+    scanned = 0
+    workers = workers or min(8, (os.cpu_count() or 2))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        for e in msp:
+            t = e.dxftype()
+            counts[t] = counts.get(t, 0) + 1
+            scanned += 1
+            try:
+                if t == 'INSERT':
+                    for name, mat, layer in _insert_transforms(e):
+                        _place(name, mat, layer, 0)
+                elif t in DXF_SUPPORTED:
+                    found = _extract_items(e, t)
+                    chunk.extend(found)
+                    chunk_layers.extend([e.dxf.layer] * len(found))
+            except Exception:
+                pass
+            if len(chunk) >= chunk_size:
+                futures.append((None, pool.submit(_tessellate_chunk, chunk, chunk_layers)))
+                chunk, chunk_layers = [], []
+            if progress and scanned % 1024 == 0:
+                progress("엔티티 분석 중", 0.5 * scanned / total)
+        if chunk:
+            futures.append((None, pool.submit(_tessellate_chunk, chunk, chunk_layers)))
+        for name, inst in instances.items():
+            items, layers, _ = blocks[name]
+            if items:
+                futures.append((name, pool.submit(_tessellate_chunk, items, layers)))
+
+        contours = []
+        lods = []
+        layer_names = []
+        ref_sum = np.zeros(2, dtype=np.float64)
+        ref_n = 0
+        ref_min = np.full(2, np.inf)
+        ref_max = np.full(2, -np.inf)
+        level_ratio = DXF_LOD_SCALES[1] / DXF_LOD_SCALES[0]
+        for i, (name, fut) in enumerate(futures):
+            res = fut.result()
+            if name is not None and res[0]:
+                res = _instance_block(res, instances[name], level_ratio)
+            c, l_, ly, s_, n, mn, mx = res
+            contours.extend(c)
+            lods.extend(l_)
+            layer_names.extend(ly)
+            ref_sum += s_
+            ref_n += n
+            np.minimum(ref_min, mn, out=ref_min)
+            np.maximum(ref_max, mx, out=ref_max)
+            if progress:
+                progress("도형 근사 중", 0.5 + 0.5 * (i + 1) / len(futures))
+
+    if ref_n == 0:
+        return DxfGeometry([], counts, np.zeros(2), (0.0, 0.0, 0.0, 0.0))
+    center = ref_sum / ref_n
+    bounds = (float(ref_min[0]), float(ref_min[1]), float(ref_max[0]), float(ref_max[1]))
+    layers = sorted(set(layer_names))
+    index = {name: i for i, name in enumerate(layers)}
+    layer_ids = np.array([index[name] for name in layer_names], dtype=np.int32)
+    return DxfGeometry(contours, counts, center, bounds, lods, layers, layer_ids)
+
+
+# ──────────────────────────────────────────────
+# DXF 지오메트리 디스크 캐시 (<도면>.dxfcache/)
+# ──────────────────────────────────────────────
+DXF_CACHE_VERSION = 2
+
+
+def _dxf_cache_key(path):
+    """파일 내용 해시 + 근사 설정 → 캐시 키 (설정이나 도면이 바뀌면 자동 무효화)"""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    settings = (DXF_CACHE_VERSION, DXF_PIXEL_TOL, DXF_LOD_SCALES,
+                DXF_MIN_SEGMENTS, DXF_MAX_SEGMENTS, DXF_SUPPORTED)
+    h.update(repr(settings).encode())
+    return h.hexdigest()
+
+
+def _dxf_cache_dirs(path):
+    """도면 옆 폴더를 먼저 쓰고, 쓸 수 없으면 프로그램 폴더 아래에 둠"""
+    local = path + '.dxfcache'
+    name = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return [local, os.path.join(APP_DIR, 'dxf_cache', name)]
+
+
+def _split_views(flat, offsets):
+    return [flat[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def load_geometry_cache(path, key):
+    """캐시가 있고 키가 맞으면 메모리 매핑으로 DxfGeometry 반환, 아니면 None"""
+    for d in _dxf_cache_dirs(path):
+        try:
+            with open(os.path.join(d, 'meta.json'), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('key') != key:
+                continue
+
+            def _arr(name):
+                return np.load(os.path.join(d, f"{key[:12]}_{name}.npy"), mmap_mode='r')
+
+            pts = _split_views(_arr('pts'), _arr('offsets'))
+            closed = _arr('closed')
+            contours = [('poly' if c else 'line', p) for c, p in zip(closed, pts)]
+            lods = [None] * len(contours)
+            lod_ids = _arr('lod_ids')
+            if len(lod_ids):
+                levels = [_split_views(_arr(f'lod{k}'), _arr(f'lod{k}_offsets'))
+                          for k in range(len(DXF_LOD_SCALES))]
+                for j, i in enumerate(lod_ids):
+                    lods[i] = tuple(level[j] for level in levels)
+            return DxfGeometry(contours, meta['counts'], np.array(meta['center']),
+                               tuple(meta['bounds']), lods, meta['layers'], _arr('layer_ids'))
+        except (OSError, ValueError, KeyError):
+            continue
+    return None
+
+
+def _concat(parts):
+    if not parts:
+        return np.empty((0, 2), dtype=np.float32), np.zeros(1, dtype=np.int64)
+    lengths = np.array([len(p) for p in parts], dtype=np.int64)
+    return (np.concatenate(parts).astype(np.float32, copy=False),
+            np.concatenate([[0], np.cumsum(lengths)]))
+
+
+def save_geometry_cache(path, key, geom):
+    """근사 결과를 .npy 묶음으로 저장 (meta.json 을 마지막에 써서 반쯤 쓴 캐시는 무시됨)"""
+    pts, offsets = _concat([p for _, p in geom.contours])
+    arrays = {
+        'pts': pts,
+        'offsets': offsets,
+        'closed': np.array([c == 'poly' for c, _ in geom.contours], dtype=bool),
+        'layer_ids': np.asarray(geom.layer_ids, dtype=np.int32),
+    }
+    lod_ids = [i for i, lod in enumerate(geom.lods) if lod is not None]
+    arrays['lod_ids'] = np.array(lod_ids, dtype=np.int64)
+    for k in range(len(DXF_LOD_SCALES)):
+        arrays[f'lod{k}'], arrays[f'lod{k}_offsets'] = _concat([geom.lods[i][k] for i in lod_ids])
+    meta = {
+        'version': DXF_CACHE_VERSION,
+        'key': key,
+        'source': os.path.basename(path),
+        'counts': geom.counts,
+        'center': [float(v) for v in geom.center],
+        'bounds': list(geom.bounds),
+        'layers': list(geom.layers),
+    }
+
+    prefix = key[:12]
+    for d in _dxf_cache_dirs(path):
+        try:
+            os.makedirs(d, exist_ok=True)
+            meta_path = os.path.join(d, 'meta.json')
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+            for name, arr in arrays.items():
+                np.save(os.path.join(d, f"{prefix}_{name}.npy"), arr)
+            _write_json(meta_path, meta)
+        except OSError:
+            continue
+        # 이전 키로 만든 파일 정리 (다른 곳에서 매핑 중이면 남겨 둠)
+        for f in os.listdir(d):
+            if f.endswith('.npy') and not f.startswith(prefix):
+                try:
+                    os.remove(os.path.join(d, f))
+                except OSError:
+                    pass
+        return d
+    return None
+
+
+def load_dxf_geometry(path, progress=None, use_cache=True):
+    """캐시가 유효하면 캐시에서, 아니면 parse_dxf 로 읽고 캐시 저장"""
+    if not use_cache:
+        return parse_dxf(path, progress=progress)
+    if progress:
+        progress("캐시 확인 중", 0.0)
+    key = _dxf_cache_key(path)
+    geom = load_geometry_cache(path, key)
+    if geom is not None:
+        return geom
+    geom = parse_dxf(path, progress=progress)
+    if geom.contours:
+        save_geometry_cache(path, key, geom)
+    return geom
+
+
+def dxf_model_contours(geom):
+    """윤곽선·LOD 를 도면 중심 기준 화면 좌표계(Y 아래 +)로 옮김 → (contours, lods)"""
+    center = geom.center.astype(np.float32)
+    flip = np.array([1, -1], dtype=np.float32)
+    moved = {}
+
+    def _move(pts):
+        # AutoCAD Y축(위=+) → 화면 Y축(아래=+) 변환을 위해 Y 반전 (공유 배열은 한 번만)
+        out = moved.get(id(pts))
+        if out is None:
+            out = moved[id(pts)] = (pts - center) * flip
+        return out
+
+    contours = [(ctype, _move(pts)) for ctype, pts in geom.contours]
+    lods = [None if lod is None else tuple(_move(p) for p in lod) for lod in geom.lods]
+    return contours, lods
+
+
+# ──────────────────────────────────────────────
+# DXF 자동 정합 (에지 + 거리 변환 챔퍼 매칭, 피라미드 coarse-to-fine)
+# ──────────────────────────────────────────────
+FIT_TRUNC = 8.0          # 챔퍼 거리 상한 (각 피라미드 단계의 px)
+FIT_COARSE_DIM = 200     # 가장 거친 단계의 긴 변 크기
+FIT_MAX_POINTS = 2000    # 단계별 모델 샘플 점 수 상한
+
+
+def densify_contours(contours, step, max_points):
+    """윤곽선을 따라 step(도면 단위) 간격으로 점을 찍음 → (점 (N, 2) float32, 윤곽선 번호 (N,) int32)
+
+    점은 윤곽선 순서·진행 방향 순으로 나오고, 전체 길이에 비해 너무 많으면 간격을 넓힌다.
+    """
+    starts, ends, owners = [], [], []
+    for i, (ctype, pts) in enumerate(contours):
+        if len(pts) < 2:
+            continue
+        starts.append(pts[:-1])
+        ends.append(pts[1:])
+        if ctype == 'poly':
+            starts.append(pts[-1:])
+            ends.append(pts[:1])
+        owners.append(np.full(len(pts) - (ctype != 'poly'), i, dtype=np.int32))
+    if not starts:
+        return np.empty((0, 2), dtype=np.float32), np.empty(0, dtype=np.int32)
+    a = np.concatenate(starts).astype(np.float32)
+    d = np.concatenate(ends).astype(np.float32) - a
+    owner = np.concatenate(owners)
+    length = np.hypot(d[:, 0], d[:, 1])
+    step = max(step, float(length.sum()) / max_points, 1e-9)
+    n = np.maximum(1, np.ceil(length / step)).astype(np.int64)
+    seg = np.repeat(np.arange(len(a)), n)
+    t = (np.arange(n.sum()) - np.repeat(np.cumsum(n) - n, n)) / np.repeat(n, n)
+    pts = a[seg] + d[seg] * t[:, None].astype(np.float32)
+    return pts, owner[seg]
+
+
+def sample_contours(contours, step, max_points=FIT_MAX_POINTS, seed=0):
+    """윤곽선을 따라 step(도면 단위) 간격으로 점을 찍어 (N, 2) float32 로 반환 (최대 max_points)"""
+    pts, _ = densify_contours(contours, step, max_points)
+    if len(pts) > max_points:
+        pts = pts[np.random.default_rng(seed).choice(len(pts), max_points, replace=False)]
+    return np.ascontiguousarray(pts, dtype=np.float32)
+
+
+def detect_edges(gray):
+    """Canny 에지. 임계값은 기울기 크기 분포의 Otsu 값으로 정함 (조명에 덜 민감)"""
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    dx = cv2.Sobel(blurred, cv2.CV_16S, 1, 0)
+    dy = cv2.Sobel(blurred, cv2.CV_16S, 0, 1)
+    mag = cv2.add(cv2.convertScaleAbs(dx), cv2.convertScaleAbs(dy))
+    otsu, _ = cv2.threshold(mag, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return cv2.Canny(dx, dy, max(1.0, otsu * 0.5), max(2.0, otsu))
+
+
+def _edge_distance(edges):
+    """에지 → 에지까지의 거리 지도 (FIT_TRUNC 에서 자름)"""
+    dt = cv2.distanceTransform(255 - edges, cv2.DIST_L2, 3)
+    np.minimum(dt, FIT_TRUNC, out=dt)
+    return dt
+
+
+def _project(model, scale, angle, tx, ty):
+    """DxfOverlayCache 와 같은 변환: model @ [[c, s], [-s, c]] * scale + (tx, ty)"""
+    rad = np.radians(angle)
+    c, s = np.cos(rad) * scale, np.sin(rad) * scale
+    xy = model @ np.array([[c, s], [-s, c]], dtype=np.float32)
+    xy += np.array([tx, ty], dtype=np.float32)
+    return xy
+
+
+def sample_bilinear(img, xy, border):
+    """float32 단일 채널 img 를 점 xy (N, 2) 에서 양선형 보간으로 읽음 (밖은 border)
+
+    remap 의 맵 크기 제한(32767) 때문에 점을 1024 열 단위 2차원 맵으로 접어서 넘긴다.
+    """
+    n = len(xy)
+    cols = min(n, 1024)
+    rows = -(-n // cols)
+    maps = np.full((rows * cols, 2), -1.0, dtype=np.float32)
+    maps[:n] = xy
+    maps = maps.reshape(rows, cols, 2)
+    v = cv2.remap(img, maps, None, cv2.INTER_LINEAR,
+                  borderMode=cv2.BORDER_CONSTANT, borderValue=border)
+    return v.ravel()[:n]
+
+
+def _chamfer(dt, xy):
+    """점들의 평균 에지 거리 (양선형 보간, 화면 밖은 FIT_TRUNC)"""
+    return float(sample_bilinear(dt, xy, FIT_TRUNC).mean())
+
+
+def register_dxf(frame, contours, scale, angle=0.0, offset_x=0.0, offset_y=0.0,
+                 scale_range=(0.7, 1.4), angle_step=7.5, candidates=3, progress=None, angle_range=None,
+                 fixed_scale=False):
+    """프레임 에지에 도면 윤곽선을 맞추는 (scale, angle, offset_x, offset_y) 탐색
+
+    angle_range 를 주면 전역 탐색 각도를 angle ± angle_range 로 좁힌다 (자세를 대략 아는 지그 부품).
+    fixed_scale 이면 배율은 그대로 두고 이동·회전만 맞춘다 (캘리브레이션된 px/mm 유지).
+
+    1) 가장 거친 단계에서 배율 × 각도 격자마다 matchTemplate 로 모든 이동량의 챔퍼 점수를 한 번에 계산
+    2) 상위 후보를 피라미드 단계마다 패턴 탐색(이동·회전·배율)으로 다듬음
+    반환: dict(scale, angle, offset_x, offset_y, score=평균 거리 px, inliers=2px 이내 비율, elapsed)
+    """
+    t0 = time.perf_counter()
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    cx, cy = w // 2, h // 2
+
+    # ── 에지 피라미드 (fine → coarse): 원본에서 한 번 검출하고 2x2 최대값으로 축소 ──
+    edges = [detect_edges(gray)]
+    kernel = np.ones((2, 2), dtype=np.uint8)
+    while max(edges[-1].shape) > FIT_COARSE_DIM:
+        edges.append(cv2.dilate(edges[-1], kernel, anchor=(0, 0))[::2, ::2].copy())
+    levels = [(e.shape[1] / w, _edge_distance(e)) for e in edges]
+    if progress:
+        progress("에지 추출", 0.1)
+
+    # ── 1단계: 거친 전역 탐색 ────────────────
+    f, dt = levels[-1]
+    dh, dw = dt.shape
+    lo, hi = scale_range
+    scales = [scale] if fixed_scale else scale * np.geomspace(lo, hi, 5)
+    if angle_range is None:
+        angles = angle + np.arange(0.0, 360.0, angle_step)
+    else:
+        angles = angle + np.arange(-angle_range, angle_range + 1e-9, angle_step)
+    found = []
+    for si, sc in enumerate(scales):
+        model = sample_contours(contours, 1.0 / (sc * f))
+        if len(model) == 0:
+            return None
+        for an in angles:
+            q = _project(model, sc * f, an, 0, 0)
+            qmin = np.floor(q.min(axis=0))
+            qi = np.rint(q - qmin).astype(np.intp)
+            tw, th = int(qi[:, 0].max()) + 1, int(qi[:, 1].max()) + 1
+            if tw > 3 * dw or th > 3 * dh:
+                continue
+            tpl = np.zeros((th, tw), dtype=np.float32)
+            tpl[qi[:, 1], qi[:, 0]] = 1.0
+            # 도면이 화면 밖으로 절반까지 걸쳐도 찾을 수 있게 여백을 둠
+            px, py = tw // 2, th // 2
+            padded = cv2.copyMakeBorder(dt, py, py, px, px, cv2.BORDER_CONSTANT, value=FIT_TRUNC)
+            res = cv2.matchTemplate(padded, tpl, cv2.TM_CCORR)
+            min_val, _, min_loc, _ = cv2.minMaxLoc(res)
+            tx = min_loc[0] - px - qmin[0]
+            ty = min_loc[1] - py - qmin[1]
+            found.append((min_val / tpl.sum(), sc, an, tx / f - cx, ty / f - cy))
+        if progress:
+            progress("전역 탐색", 0.1 + 0.4 * (si + 1) / len(scales))
+    if not found:
+        return None
+
+    # 각도가 거의 같은 후보는 하나만 남김
+    found.sort(key=lambda r: r[0])
+    picks = []
+    for r in found:
+        if all(abs((r[2] - p[2] + 180) % 360 - 180) > angle_step * 1.5 or
+               abs(np.log(r[1] / p[1])) > 0.05 for p in picks):
+            picks.append(r)
+        if len(picks) >= candidates:
+            break
+
+    # ── 2단계: 피라미드 패턴 탐색 ─────────────
+    best = None
+    for ci, (_, sc, an, ox, oy) in enumerate(picks):
+        params = np.array([ox, oy, an, np.log(sc)])
+        for li, (f, dt) in enumerate(reversed(levels)):
+            model = sample_contours(contours, 1.0 / (np.exp(params[3]) * f), seed=li)
+            radius = max(1.0, float(np.abs(model).max()) * np.exp(params[3]) * f)
+
+            def _score(p):
+                return _chamfer(dt, _project(model, np.exp(p[3]) * f, p[2],
+                                             (cx + p[0]) * f, (cy + p[1]) * f))
+
+            steps = np.array([2.0 / f, 2.0 / f, np.degrees(2.0 / radius), 2.0 / radius])
+            min_steps = steps / 16
+            cur = _score(params)
+            n_params = 3 if fixed_scale else 4
+            for _ in range(200):
+                improved = False
+                for k in range(n_params):
+                    for sign in (1, -1):
+                        trial = params.copy()
+                        trial[k] += sign * steps[k]
+                        val = _score(trial)
+                        if val < cur:
+                            params, cur, improved = trial, val, True
+                            break
+                if not improved:
+                    steps /= 2
+                    if np.all(steps[:n_params] < min_steps[:n_params]):
+                        break
+        if best is None or cur < best[0]:
+            best = (cur, params.copy(), model)
+        if progress:
+            progress("정밀 정합", 0.5 + 0.5 * (ci + 1) / len(picks))
+
+    cur, params, model = best
+    xy = _project(model, np.exp(params[3]), params[2], cx + params[0], cy + params[1])
+    v = sample_bilinear(levels[0][1], xy, FIT_TRUNC)
+    return {
+        'scale': float(np.exp(params[3])),
+        'angle': float(params[2] % 360),
+        'offset_x': float(params[0]),
+        'offset_y': float(params[1]),
+        'score': float(cur),
+        'inliers': float((v < 2.0).mean()),
+        'elapsed': time.perf_counter() - t0,
+    }
+
+
+# ──────────────────────────────────────────────
+# DXF 편차 검사 (에지 거리 변환을 윤곽선 샘플점에서 한 번에 읽음)
+# ──────────────────────────────────────────────
+class DeviationInspector:
+    """도면 윤곽선과 프레임 에지 사이의 편차를 윤곽선별로 계산
+
+    샘플점은 화면에서 약 1px 간격이 되도록 배율마다 한 번 만들어 두고,
+    매 프레임은 도면이 걸친 영역만 에지·거리 변환한 뒤 전체 점을 한 번에 샘플링한다.
+    """
+
+    def __init__(self, overlay, trunc_px=40.0, max_points=200000):
+        self.overlay = overlay          # 윤곽선은 오버레이의 LOD·레이어 상태를 그대로 사용
+        self.trunc_px = trunc_px
+        self.max_points = max_points
+        self._key = None
+
+    def _samples(self, scale):
+        key = (self.overlay.version, scale)
+        if key != self._key:
+            pts, cid = densify_contours(self.overlay.contours_at(scale), 1.0 / max(scale, 1e-9),
+                                        self.max_points)
+            if len(pts) > self.max_points:
+                # 선분이 아주 많으면 순서를 유지한 채 일정 간격으로 솎아냄
+                keep = np.linspace(0, len(pts) - 1, self.max_points).astype(np.intp)
+                pts, cid = pts[keep], cid[keep]
+            ids, starts = np.unique(cid, return_index=True)
+            self._pts, self._cid, self._ids, self._starts = pts, cid, ids, starts
+            self._key = key
+        return self._pts, self._ids, self._starts
+
+    def measure(self, frame, scale, angle, offset_x, offset_y, tol_mm):
+        """편차 계산. scale 은 px/mm (오버레이 배율과 같은 값)"""
+        pts, ids, starts = self._samples(scale)
+        if len(pts) == 0:
+            return None
+        h, w = frame.shape[:2]
+        xy = _project(pts, scale, angle, w // 2 + offset_x, h // 2 + offset_y)
+        valid = (xy[:, 0] >= 0) & (xy[:, 0] <= w - 1) & (xy[:, 1] >= 0) & (xy[:, 1] <= h - 1)
+        if not valid.any():
+            return None
+
+        # 도면이 걸친 영역 + 거리 상한만큼만 에지 검출 (상한 안쪽 거리는 전체 계산과 같음)
+        m = int(self.trunc_px) + 2
+        x1, y1 = np.floor(xy[valid].min(axis=0)).astype(int) - m
+        x2, y2 = np.ceil(xy[valid].max(axis=0)).astype(int) + m
+        x1, y1, x2, y2 = max(0, x1), max(0, y1), min(w, x2 + 1), min(h, y2 + 1)
+        roi = frame[y1:y2, x1:x2]
+        gray = roi if roi.ndim == 2 else cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        dt = cv2.distanceTransform(255 - detect_edges(gray), cv2.DIST_L2, 3)
+        local = xy - np.array([x1, y1], dtype=np.float32)
+        dev_px = sample_bilinear(dt, local, self.trunc_px)
+        np.minimum(dev_px, self.trunc_px, out=dev_px)
+        dev = dev_px / scale
+
+        # 윤곽선별 최대·평균 (점이 윤곽선 순서로 정렬돼 있어 reduceat 한 번)
+        dev_v = np.where(valid, dev, 0.0)
+        counts = np.add.reduceat(valid.astype(np.int64), starts)
+        sums = np.add.reduceat(dev_v, starts)
+        maxs = np.maximum.reduceat(np.where(valid, dev, -1.0), starts)
+        seen = counts > 0
+        bad = valid & (dev > tol_mm)
+        worst = int(np.argmax(np.where(valid, dev, -1.0)))
+        return {
+            'xy': xy,
+            'bad': bad,
+            'dev_mm': dev,
+            'contour_ids': ids[seen],
+            'contour_max': maxs[seen],
+            'contour_mean': sums[seen] / counts[seen],
+            'max_mm': float(dev[worst]),
+            'mean_mm': float(dev_v.sum() / max(1, valid.sum())),
+            'bad_contours': int((maxs[seen] > tol_mm).sum()),
+            'checked_contours': int(seen.sum()),
+            'worst_xy': (int(xy[worst, 0]), int(xy[worst, 1])),
+            'tol_mm': tol_mm,
+            'saturated': bool(dev_px[worst] >= self.trunc_px),
+        }
+
+    @staticmethod
+    def draw(canvas, result, bad_color=(0, 0, 255)):
+        """공차를 벗어난 샘플점(약 1px 간격)을 칠하고 요약을 왼쪽 위에 표시"""
+        bad_xy = np.rint(result['xy'][result['bad']]).astype(np.intp)
+        if len(bad_xy):
+            canvas[bad_xy[:, 1], bad_xy[:, 0]] = bad_color
+        cv2.drawMarker(canvas, result['worst_xy'], bad_color, cv2.MARKER_TILTED_CROSS, 20, 2)
+
+        ng = result['bad_contours']
+        verdict = "NG" if ng else "OK"
+        over = ">" if result['saturated'] else ""
+        text = (f"INSPECT {verdict}  MAX {over}{result['max_mm']:.3f}mm  MEAN {result['mean_mm']:.3f}mm  "
+                f"NG {ng}/{result['checked_contours']}  TOL {result['tol_mm']:.3f}mm")
+        color = bad_color if ng else (0, 200, 0)
+        cv2.putText(canvas, text, (12, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 4)
+        cv2.putText(canvas, text, (12, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+
+
+# ──────────────────────────────────────────────
+# 측정점 에지 스냅 (클릭 주변 ROI 의 기울기 최대점 + 포물선 보간)
+# ──────────────────────────────────────────────
+SNAP_RADIUS = 6           # 탐색 반경 (화면 px, 프레임 좌표로는 표시 비율만큼 커짐)
+SNAP_MIN_GRAD = 40.0      # 이보다 약한 기울기(3x3 Sobel 크기)는 에지로 보지 않음
+
+
+def snap_to_edge(frame, x, y, radius, min_grad=SNAP_MIN_GRAD):
+    """(x, y) 에서 radius 안의 가장 강한 에지 위치를 서브픽셀로 반환, 에지가 없으면 None
+
+    기울기 크기의 최대 화소에서 기울기 방향 앞뒤 값으로 포물선을 맞춰 꼭짓점까지 옮긴다.
+    ROI 만 계산하므로 클릭 한 번에 1ms 도 걸리지 않는다.
+    """
+    h, w = frame.shape[:2]
+    pad = int(np.ceil(radius)) + 2
+    cx, cy = int(round(x)), int(round(y))
+    x0, y0 = max(cx - pad, 0), max(cy - pad, 0)
+    x1, y1 = min(cx + pad + 1, w), min(cy + pad + 1, h)
+    if x1 - x0 < 5 or y1 - y0 < 5:
+        return None
+    roi = frame[y0:y1, x0:x1]
+    if roi.ndim == 3:
+        roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+    roi = roi.astype(np.float32)
+    gx = cv2.Sobel(roi, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(roi, cv2.CV_32F, 0, 1, ksize=3)
+    mag = cv2.magnitude(gx, gy)
+
+    # 반경 밖과 ROI 테두리(보간할 이웃이 없음)는 후보에서 뺌
+    yy, xx = np.ogrid[y0:y1, x0:x1]
+    cand = np.where((xx - x) ** 2 + (yy - y) ** 2 <= radius * radius, mag, 0)
+    cand[[0, -1], :] = 0
+    cand[:, [0, -1]] = 0
+    iy, ix = np.unravel_index(int(np.argmax(cand)), cand.shape)
+    m0 = float(cand[iy, ix])
+    if m0 < min_grad:
+        return None
+
+    nx, ny = gx[iy, ix] / m0, gy[iy, ix] / m0
+    m_minus, m_plus = sample_bilinear(mag, np.array([[ix - nx, iy - ny], [ix + nx, iy + ny]],
+                                                    dtype=np.float32), 0)
+    denom = m_minus - 2.0 * m0 + m_plus
+    t = 0.5 * (m_minus - m_plus) / denom if denom < 0 else 0.0
+    t = min(max(float(t), -0.5), 0.5)
+    return x0 + ix + t * nx, y0 + iy + t * ny
+
+
+# ──────────────────────────────────────────────
+# 측정 표시 (화면·저장 이미지·일괄 측정 공용)
+# ──────────────────────────────────────────────
+def draw_measurements(canvas, measurements, color):
+    """확정된 측정선 [(p1, p2, mm, 모드, 글자 위치), ...] 을 그림"""
+    for m1, m2, val, m_type, pt in measurements:
+        p1 = (int(m1[0]), int(m1[1]))
+        p2 = (int(m2[0]), int(m2[1]))
+        if m_type == 'MEAS_HV':
+            if abs(p1[0] - p2[0]) > abs(p1[1] - p2[1]):
+                cv2.line(canvas, p1, (p2[0], p1[1]), color, 1)
+                p2 = (p2[0], p1[1])
+            else:
+                cv2.line(canvas, p1, (p1[0], p2[1]), color, 1)
+                p2 = (p1[0], p2[1])
+        else:
+            cv2.line(canvas, p1, p2, color, 1)
+        cv2.putText(canvas, f"{val:.3f}mm", (int(pt[0]), int(pt[1])),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+
+def draw_cross_mark(img, cx, cy, angle_deg, h_arm, v_arm, color, label=None):
+    """회전된 십자선 하나 (h_arm, v_arm: 수평·수직 반길이 px)"""
+    rad = np.radians(angle_deg)
+    hx, hy = np.cos(rad), np.sin(rad)    # 수평축 단위벡터
+    vx, vy = -np.sin(rad), np.cos(rad)   # 수직축 단위벡터
+    cv2.line(img,
+             (int(cx - hx * h_arm), int(cy - hy * h_arm)),
+             (int(cx + hx * h_arm), int(cy + hy * h_arm)),
+             color, 1)
+    cv2.line(img,
+             (int(cx - vx * v_arm), int(cy - vy * v_arm)),
+             (int(cx + vx * v_arm), int(cy + vy * v_arm)),
+             color, 1)
+    # 중심점
+    cv2.circle(img, (int(cx), int(cy)), 2, color, -1)
+    if label is not None:
+        cv2.putText(img, label,
+                    (int(cx + hx * h_arm) + 4, int(cy + hy * h_arm) - 4),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+
+
+def measure_length(p1, p2, mode):
+    """측정 모드별 길이 (px): 직선은 거리, 수평수직은 큰 쪽 축 성분"""
+    dx, dy = abs(p1[0] - p2[0]), abs(p1[1] - p2[1])
+    return max(dx, dy) if mode == 'MEAS_HV' else float(np.hypot(dx, dy))
+
+
+# ──────────────────────────────────────────────
+# 검사 템플릿 / 일괄 측정 (--batch, 프로세스 풀)
+# ──────────────────────────────────────────────
+TEMPLATE_VERSION = 1
+BATCH_SNAP_RADIUS = 10.0   # 일괄 측정에서 측정점을 다시 찾는 반경 (프레임 px)
+BATCH_MIN_INLIERS = 0.5    # 정합 결과를 믿을 최소 inlier 비율 (미달이면 템플릿 위치 그대로 측정)
+BATCH_ANGLE_RANGE = 15.0   # 일괄 재정합 각도 탐색 범위 (템플릿 각도 ±도, 180° 대칭 뒤집힘 방지)
+
+
+def load_template(path):
+    """검사 템플릿 JSON 을 읽고 검사 (형식이 틀리면 ValueError)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tpl = json.load(f)
+    except (OSError, json.JSONDecodeError) as ex:
+        raise ValueError(f"템플릿을 읽을 수 없습니다: {path}\n{ex}") from ex
+    if not isinstance(tpl, dict) or tpl.get('version') != TEMPLATE_VERSION:
+        raise ValueError(f"지원하지 않는 템플릿 형식입니다: {path}")
+    for key in ('frame_size', 'scale', 'measurements'):
+        if key not in tpl:
+            raise ValueError(f"템플릿에 '{key}' 항목이 없습니다: {path}")
+    if tpl['scale'] <= 0:
+        raise ValueError("템플릿의 배율(px/mm)이 올바르지 않습니다.")
+    dxf = tpl.get('dxf')
+    if dxf and not os.path.exists(dxf['path']):
+        raise ValueError(f"템플릿의 도면을 찾을 수 없습니다:\n{dxf['path']}")
+    lens = tpl.get('lens')
+    if lens and not os.path.exists(lens['path']):
+        raise ValueError(f"템플릿의 렌즈 보정 파일을 찾을 수 없습니다:\n{lens['path']}")
+    return tpl
+
+
+def _pose_affine(scale, angle, tx, ty):
+    """_project 와 같은 변환의 3x3 행렬 (도면 좌표 → 프레임 px)"""
+    rad = np.radians(angle)
+    c, s = np.cos(rad) * scale, np.sin(rad) * scale
+    return np.array([[c, -s, tx], [s, c, ty], [0.0, 0.0, 1.0]])
+
+
+def _apply_affine(m, pt):
+    x, y = pt
+    return (m[0, 0] * x + m[0, 1] * y + m[0, 2], m[1, 0] * x + m[1, 1] * y + m[1, 2])
+
+
+_batch_state = {}
+
+
+def _batch_init(template, realign, snap_radius):
+    """작업자 프로세스 초기화: 도면은 프로세스마다 한 번만 읽음 (디스크 캐시 사용)"""
+    # 프로세스 수만큼 이미 병렬이므로 OpenCV 내부 스레드는 끔
+    cv2.setNumThreads(1)
+    overlay = deviation = lens = None
+    if template.get('lens'):
+        lens = LensCorrector.load(template['lens']['path'])
+    dxf = template.get('dxf')
+    if dxf:
+        geom = load_dxf_geometry(dxf['path'])
+        contours, lods = dxf_model_contours(geom)
+        overlay = DxfOverlayCache()
+        overlay.set_contours(contours, lods, geom.layer_ids)
+        hidden = set(dxf.get('hidden_layers', []))
+        overlay.set_hidden_layers({i for i, name in enumerate(geom.layers) if name in hidden})
+        if template.get('inspect_tol_mm') is not None:
+            deviation = DeviationInspector(overlay)
+    _batch_state.update(template=template, realign=realign, snap_radius=snap_radius,
+                        overlay=overlay, deviation=deviation, lens=lens)
+
+
+def _batch_measure(path, out_dir):
+    """이미지 한 장: 도면 재정합 → 측정점 이동·에지 스냅 → 측정 → 주석 이미지 저장. 결과 행(dict) 반환"""
+    st = _batch_state
+    tpl = st['template']
+    t0 = time.perf_counter()
+    row = {'file': os.path.basename(path), 'status': 'ok'}
+    frame = read_image(path)
+    if frame is None:
+        row['status'] = 'read_error'
+        return row
+    h, w = frame.shape[:2]
+    if [w, h] != list(tpl['frame_size']):
+        row['status'] = 'size_mismatch'
+        return row
+    # 템플릿을 만들 때와 같은 방식으로 왜곡 보정 (영상 전체 또는 측정 좌표만)
+    lens = st['lens'] if st['lens'] is not None and st['lens'].matches(frame) else None
+    lens_mode = tpl['lens']['mode'] if lens is not None else 'off'
+    if lens_mode == 'remap':
+        frame = lens.undistort(frame)
+
+    scale = tpl['scale']
+    overlay, dxf = st['overlay'], tpl.get('dxf')
+    move = np.eye(3)
+    pose = None
+    if dxf:
+        pose = (scale, dxf['angle'], dxf['offset_x'], dxf['offset_y'])
+        if st['realign']:
+            fit = register_dxf(frame, overlay.contours_at(scale), *pose, scale_range=(0.97, 1.03),
+                               angle_range=BATCH_ANGLE_RANGE)
+            if fit is None:
+                # 후보가 하나도 없음: 템플릿 위치 그대로 측정
+                row['status'] = 'no_match'
+            else:
+                row.update(fit_score=round(fit['score'], 3), fit_inliers=round(fit['inliers'], 3))
+                if fit['inliers'] >= BATCH_MIN_INLIERS:
+                    new_pose = (fit['scale'], fit['angle'], fit['offset_x'], fit['offset_y'])
+                    move = (_pose_affine(new_pose[0], new_pose[1], w // 2 + new_pose[2], h // 2 + new_pose[3])
+                            @ np.linalg.inv(_pose_affine(scale, pose[1], w // 2 + pose[2], h // 2 + pose[3])))
+                    pose = new_pose
+                else:
+                    row['status'] = 'align_failed'
+        d_angle = (pose[1] - dxf['angle'] + 180) % 360 - 180
+        row.update(dx_px=round(pose[2] - dxf['offset_x'], 2), dy_px=round(pose[3] - dxf['offset_y'], 2),
+                   d_angle=round(d_angle, 3))
+
+    # 측정점: 부품이 움직인 만큼 옮긴 뒤 에지에 다시 스냅
+    measured = []
+    for i, m in enumerate(tpl['measurements'], 1):
+        pts, snapped = [], 0
+        for p in (m['p1'], m['p2']):
+            p = _apply_affine(move, p)
+            q = snap_to_edge(frame, p[0], p[1], st['snap_radius'])
+            if q is not None:
+                p, snapped = q, snapped + 1
+            pts.append(p)
+        flat = lens.undistort_points(pts) if lens_mode == 'points' else pts
+        mm = measure_length(flat[0], flat[1], m['mode']) / scale
+        row[f'm{i}_mm'] = round(mm, 4)
+        row[f'm{i}_dev_mm'] = round(mm - m['value_mm'], 4)
+        row[f'm{i}_snapped'] = snapped
+        measured.append((pts[0], pts[1], mm, m['mode'], _apply_affine(move, m['label'])))
+
+    canvas = frame.copy()
+    colors = tpl.get('colors', {})
+    if overlay is not None:
+        overlay.render(canvas, pose[0], pose[1], pose[2], pose[3], tuple(colors.get('dxf', (0, 255, 0))))
+        if st['deviation'] is not None:
+            res = st['deviation'].measure(frame, *pose, tpl['inspect_tol_mm'])
+            if res is not None:
+                row.update(inspect_max_mm=round(res['max_mm'], 4), inspect_mean_mm=round(res['mean_mm'], 4),
+                           inspect_ng=res['bad_contours'], inspect_checked=res['checked_contours'])
+                st['deviation'].draw(canvas, res)
+    draw_measurements(canvas, measured, tuple(colors.get('meas', (0, 255, 255))))
+    cross_clr = tuple(colors.get('cross', (0, 0, 255)))
+    for i, (cx, cy, angle, size) in enumerate(tpl.get('crosshairs', []), 1):
+        cx, cy = _apply_affine(move, (cx, cy))
+        draw_cross_mark(canvas, cx, cy, angle + (pose[1] - dxf['angle'] if pose else 0.0),
+                        6.5 * scale * size, 2.5 * scale * size, cross_clr, label=f"#{i}")
+    cv2.putText(canvas, f"{row['file']}  {row['status'].upper()}", (12, h - 16),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 4)
+    cv2.putText(canvas, f"{row['file']}  {row['status'].upper()}", (12, h - 16),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    ok, buffer = cv2.imencode('.jpg', canvas, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+    if ok:
+        # 한글 경로도 쓸 수 있도록 tofile 사용
+        buffer.tofile(os.path.join(out_dir, os.path.splitext(row['file'])[0] + '_result.jpg'))
+    row['elapsed_ms'] = round((time.perf_counter() - t0) * 1000, 1)
+    return row
+
+
+def _write_batch_table(path, rows, fmt):
+    """결과 행을 CSV(기본) 또는 Parquet(pandas + pyarrow 필요)으로 저장"""
+    columns = []
+    for row in rows:
+        columns.extend(k for k in row if k not in columns)
+    if fmt == 'parquet':
+        import pandas as pd
+        pd.DataFrame(rows, columns=columns).to_parquet(path, index=False)
+        return
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_batch(template_path, input_dir, out_dir, workers=None, fmt='csv', realign=True,
+              snap_radius=BATCH_SNAP_RADIUS):
+    """폴더의 모든 이미지에 템플릿 측정을 프로세스 풀로 적용. 결과 표 경로 반환"""
+    tpl = load_template(template_path)
+    if fmt == 'parquet':
+        # 처리 후에 실패하지 않도록 미리 확인
+        try:
+            import pandas  # noqa: F401
+            import pyarrow  # noqa: F401
+        except ImportError as ex:
+            raise ImportError("Parquet 저장에는 pandas, pyarrow 가 필요합니다 (pip install pandas pyarrow)") from ex
+    if not os.path.isdir(input_dir):
+        raise ValueError(f"이미지 폴더가 없습니다: {input_dir}")
+    paths = sorted(os.path.join(input_dir, n) for n in os.listdir(input_dir)
+                   if n.lower().endswith(IMAGE_EXTS))
+    if not paths:
+        raise ValueError(f"폴더에 이미지가 없습니다: {input_dir}")
+    os.makedirs(out_dir, exist_ok=True)
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    rows = []
+    t0 = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_batch_init,
+            initargs=(tpl, realign, snap_radius)) as pool:
+        futures = {pool.submit(_batch_measure, p, out_dir): p for p in paths}
+        for done, fut in enumerate(concurrent.futures.as_completed(futures), 1):
+            try:
+                row = fut.result()
+            except Exception as ex:
+                row = {'file': os.path.basename(futures[fut]), 'status': f'error: {ex}'}
+            rows.append(row)
+            print(f"[{done}/{len(paths)}] {row['file']}: {row['status']}", flush=True)
+    rows.sort(key=lambda r: r['file'])
+
+    table = os.path.join(out_dir, f"results.{fmt}")
+    _write_batch_table(table, rows, fmt)
+    elapsed = time.perf_counter() - t0
+    print(f"{len(rows)}장 처리, {elapsed:.1f}s ({len(rows) / elapsed:.1f}장/s, 작업자 {workers}) → {table}")
+    return table
+
+
 class VisionInspector:
-    def __init__(self, dxf_path=""):
+    def __init__(self, dxf_path="", source=None, image_saver=None):
         self.dxf_path = dxf_path
+        self.image_saver = image_saver or ImageSaver()
         self.current_cam_idx = 0
-        self.cap = self.auto_scan_and_connect(0)
+        self.discovery = CameraDiscovery()
+        # source(FrameSource) 를 넘기면 카메라 검색 없이 그대로 사용 (재생·벤치마크용)
+        self.cap = source if source is not None else self.auto_scan_and_connect(0)
         if self.cap is None:
             sys.exit()
         self.camera_switching = False
@@ -32,12 +3134,18 @@ class VisionInspector:
         self.pending_cam_idx = None
         self.camera_lock = threading.Lock()
         self.camera_list_visible = False
-        self.camera_names = []
+        self.camera_names = list(self.discovery.names)
+        if source is None:
+            self.discovery.refresh_names_async(self._on_camera_names)
+        self.grabber = None
+        self.ui_fps = 0.0
 
         self.is_running = True
         self.is_frozen = False
         self.frozen_frame = None
         self.loaded_frame = None
+        self.last_frame = None            # 현재 렌더링 중인 원본 프레임 (복사 없음, 왜곡 보정 후)
+        self.raw_frame = None             # 왜곡 보정 전 프레임 (정지 화면은 이것을 복사)
         self.last_full_canvas = None
         self.view_w, self.ui_w = 1200, 340
         self.total_w = self.view_w + self.ui_w
@@ -68,16 +3176,31 @@ class VisionInspector:
 
         self.hovered_button = None
 
+        # 폰트는 한 번만 로드하고, 글자는 비트맵으로 캐시
+        self.font_title = get_font("malgunbd.ttf", 16)
+        self.font_section = get_font("malgun.ttf", 10)
+        self.font_btn = get_font("malgun.ttf", 10)
+        self.font_status = get_font("malgun.ttf", 9)
+        self.font_weight_large = get_font("malgunbd.ttf", 26)
+        self.font_weight_small = get_font("malgun.ttf", 11)
+        self.glyphs = GlyphCache()
+        self._weight_layer = None
+        self.panel = None
+        self.frame_count = 0
+        self.timer = StageTimer()
+
         self.btn_labels = {
             'SWITCH_CAM': '카메라 전환',
             'FREEZE_LIVE': '정지 / 라이브',
             'LOAD_IMAGE': '사진 불러오기',
             'LOAD_DXF': '도면 불러오기',
             'DXF_COLOR': '도면 색상',
+            'LAYERS': '레이어',
             'PAN': '이동 (PAN)',
             'ZOOM': '확대 / 축소',
             'ZOOM_IN': '확대 +',
             'ZOOM_OUT': '축소 -',
+            'AUTO_FIT': '자동 정합',
             'ROTATE': '회전 (Angle)',
             'CROSS': '십자선',
             'CROSS_COLOR': '십자선 색상',
@@ -85,49 +3208,56 @@ class VisionInspector:
             'CLEAR': '전체 삭제',
             'MEAS_P2P': '직선 측정',
             'MEAS_HV': '수평수직 측정',
+            'INSPECT': '편차 검사',
             'MEAS_COLOR': '측정 색상',
             'MEAS_UNDO': '측정 취소',
+            'TEMPLATE': '템플릿 저장',
             'CALIB': '캘리브레이션',
             'CALIB_COLOR': '캘리브 색상',
+            'CALIB_RESET': '캘리브 초기화',
+            'LENS_CALIB': '렌즈 보정',
+            'UNDISTORT': '왜곡 보정',
             'SCALE_CONNECT': '저울 연결',
             'SCALE_SAVE': '무게 저장',
+            'AUTO_SAVE': '자동 저장',
             'SAVE_IMG': '이미지 저장',
+            'IMG_FMT': '형식',
+            'BURST': '연속 저장',
             'QUIT': '종료'
         }
 
         self.button_sections = [
             {
                 'title': '카메라 제어',
-                'buttons': [['SWITCH_CAM', 'FREEZE_LIVE'], ['LOAD_IMAGE', 'SAVE_IMG']]
+                'buttons': [['SWITCH_CAM', 'FREEZE_LIVE', 'IMG_FMT'], ['LOAD_IMAGE', 'SAVE_IMG', 'BURST']]
             },
             {
                 'title': '도면 관리',
-                'buttons': [['LOAD_DXF', 'DXF_COLOR']]
+                'buttons': [['LOAD_DXF', 'DXF_COLOR', 'LAYERS']]
             },
             {
                 'title': '뷰 조작',
                 'buttons': [
-                    ['PAN', 'ZOOM'],
-                    ['ZOOM_IN', 'ZOOM_OUT'],
-                    ['ROTATE', 'CROSS'],
-                    ['CROSS_COLOR', 'CROSS_UNDO'],
+                    ['PAN', 'ZOOM', 'ROTATE'],
+                    ['ZOOM_IN', 'ZOOM_OUT', 'AUTO_FIT'],
+                    ['CROSS', 'CROSS_COLOR', 'CROSS_UNDO'],
                     ['CLEAR']
                 ]
             },
             {
                 'title': '측정 도구',
                 'buttons': [
-                    ['MEAS_P2P', 'MEAS_HV'],
-                    ['MEAS_COLOR', 'MEAS_UNDO']
+                    ['MEAS_P2P', 'MEAS_HV', 'INSPECT'],
+                    ['MEAS_COLOR', 'MEAS_UNDO', 'TEMPLATE']
                 ]
             },
             {
                 'title': '캘리브레이션',
-                'buttons': [['CALIB', 'CALIB_COLOR']]
+                'buttons': [['CALIB', 'CALIB_COLOR', 'CALIB_RESET'], ['LENS_CALIB', 'UNDISTORT']]
             },
             {
                 'title': '정밀저울',
-                'buttons': [['SCALE_CONNECT', 'SCALE_SAVE']]
+                'buttons': [['SCALE_CONNECT', 'SCALE_SAVE', 'AUTO_SAVE']]
             },
             {
                 'title': '시스템',
@@ -135,6 +3265,8 @@ class VisionInspector:
             }
         ]
 
+        self._set_image_format(self.image_saver.fmt)
+
         self.current_mode = 'PAN'
         self.pressed_button = None
         self.buttons = {}
@@ -145,7 +3277,26 @@ class VisionInspector:
         # 카메라 설정 먼저 (view_h 정의)
         self.dxf_contours = []   # 각 원소: (ctype, pts_array)
         self.dxf_real_width = 0
+        self.dxf_lock = threading.Lock()
+        self.dxf_load_gen = 0
+        self.pending_dxf = None
+        self.dxf_progress = None      # 로딩 중이면 (단계, 0~1)
+        self.dxf_layer_ids = np.empty(0, dtype=np.int32)
+        self.fit_progress = None      # 자동 정합 중이면 (단계, 0~1)
+        self.pending_fit = None       # 정합 결과 dict, 예외, 또는 'no_match'
+        self.dxf_overlay = DxfOverlayCache()
+        self.deviation = DeviationInspector(self.dxf_overlay)
+        self.inspect_enabled = False
+        self.inspect_tol_mm = 0.1
+        self.inspect_result = None
+        self.dxf_layers = []          # 레이어 이름 (도면 순서)
+        self.dxf_layer_counts = []    # 레이어별 윤곽선 수
+        self.hidden_layers = set()    # 숨긴 레이어 이름 (도면을 다시 불러와도 유지)
+        self.layer_list_visible = False
+        self.layer_list_scroll = 0
+        self.buffers = FrameBufferPool()
         self.setup_camera()
+        self._start_grabber()
 
         # 버튼 초기화
         self.init_buttons()
@@ -153,6 +3304,16 @@ class VisionInspector:
         self.offset_x, self.offset_y = 0, 0  # 캔버스 중심 기준 pan 델타
         self.scale = 1.0
         self.angle = 0.0
+        self.notice = None            # (글자, 경고 여부, 사라질 시각) 화면 알림
+        self.calibrations = CalibrationStore()
+        self.calib_profile = None     # 현재 카메라·해상도의 저장된 캘리브레이션
+        self.calib_note = "없음"      # 상태 표시용
+        self._load_calibration()
+        self.lens = None              # 현재 카메라·해상도의 렌즈 왜곡 보정 (LensCorrector)
+        self.undistort_mode = 'off'   # 'off' / 'remap'(영상 전체) / 'points'(측정 좌표만)
+        self.lens_progress = None
+        self.pending_lens = None
+        self._load_lens()
 
         self.measurements = []
         self.measure_p1 = None
@@ -172,15 +3333,23 @@ class VisionInspector:
         self.cross_selected_idx = None # 선택된 십자선 인덱스
 
         # 저울 관련 초기화
-        self.scale_weight = None          # 현재 무게값 (g)
+        self.scale_weight = None          # 현재 무게값 (g), 구독 콜백이 갱신
+        self.scale_stable = None          # 저울 안정 표시 (보내지 않는 저울은 None)
         self.scale_connected = False      # 실제 시리얼 연결 여부
         self.scale_simulating = True      # 시뮬레이션 모드
         self.scale_com_port = None
-        self.scale_serial = None
-        self.scale_thread = None
+        self.scale_source = None          # ScaleReader 또는 SimulatedScale
         self.scale_error = None
-        self.scale_lock = threading.Lock()
-        self.weight_log = []              # 저장된 무게 기록
+        self.stabilizer = WeightStabilizer()
+        self.auto_save = False            # 안정되면 무게·화면·측정값 자동 저장
+        self.pending_capture = None       # 읽기 스레드가 넘긴 자동 저장 무게 (UI 루프에서 처리)
+        self.weight_feed = WeightFeed()
+        self.weight_feed.subscribe(self._on_weight)
+        self.weight_log = deque(maxlen=WEIGHT_LOG_KEEP)  # 최근 저장 기록 (전체는 logger 파일에)
+        self.weight_saved = 0             # 이번 실행에서 저장한 건수
+        self.logger = MeasurementLogger()
+        self._shown_log_error = None
+        self._shown_save = (0, None, None)   # 알림으로 보여 준 (버린 장수, 오류, 마지막 경로)
 
         self._start_scale_simulation()
 
@@ -190,19 +3359,37 @@ class VisionInspector:
     # ──────────────────────────────────────────────
     # 저울 (Scale)
     # ──────────────────────────────────────────────
+    def _on_weight(self, reading):
+        """WeightFeed 구독 콜백 (읽기 스레드에서 호출, 값만 바꿔 둠)"""
+        self.scale_weight = round(reading.grams, 4)
+        self.scale_stable = reading.stable
+        if self.stabilizer.update(reading) == 'settled' and self.auto_save:
+            self.pending_capture = self.stabilizer.value
+
+    def _apply_pending_capture(self):
+        weight = self.pending_capture
+        if weight is None:
+            return
+        self.pending_capture = None
+        self.save_weight(weight, trigger='auto')
+
+    def toggle_auto_save(self):
+        self.auto_save = not self.auto_save
+        self.pending_capture = None
+
     def _start_scale_simulation(self):
-        """시뮬레이션 모드: 가상 무게값을 주기적으로 생성"""
-        def _sim_loop():
-            base = 12.34
-            while self.scale_simulating:
-                noise = random.uniform(-0.05, 0.05)
-                with self.scale_lock:
-                    self.scale_weight = round(base + noise, 2)
-                time.sleep(0.5)
-
-        t = threading.Thread(target=_sim_loop, daemon=True)
-        t.start()
-        self.scale_thread = t
+        """시뮬레이션 모드: 가상 저울이 실제 저울과 같은 경로로 값을 발행"""
+        self.scale_source = SimulatedScale(self.weight_feed)
+        self.scale_source.start()
+
+    def _stop_scale_source(self):
+        if self.scale_source is not None:
+            self.scale_source.stop()
+            self.scale_source = None
+
+    def _on_scale_error(self, message):
+        self.scale_error = message
+        self.scale_connected = False
 
     def connect_scale(self, port, baud=9600):
         """실제 RS-232 저울 연결 (pyserial 필요)"""
@@ -210,104 +3397,142 @@ class VisionInspector:
             messagebox.showerror("오류", "pyserial이 설치되지 않았습니다.\n\npip install pyserial")
             return False
         try:
-            ser = serial.Serial(port, baudrate=baud, bytesize=8,
-                                parity='N', stopbits=1, timeout=1)
-            self.scale_serial = ser
-            self.scale_com_port = port
-            self.scale_error = None
-            self.scale_connected = True
-            self.scale_simulating = False
-
-            def _read_loop():
-                import re
-                buf = ""
-                while self.scale_connected:
-                    try:
-                        chunk = ser.read(ser.in_waiting or 1).decode(
-                            'ascii', errors='ignore'
-                        )
-                        if not chunk:
-                            continue
-                        buf += chunk
-                        frames = re.split(r'[\r\n]+', buf)
-                        buf = frames.pop()
-                        for frame in frames:
-                            val = self._parse_weight(frame.strip())
-                            if val is not None:
-                                with self.scale_lock:
-                                    self.scale_weight = val
-                        if not frames and buf:
-                            matches = list(re.finditer(
-                                r'[-+]?\d+(?:[.,]\d+)', buf
-                            ))
-                            if matches:
-                                val = self._parse_weight(matches[-1].group())
-                                if val is not None:
-                                    with self.scale_lock:
-                                        self.scale_weight = val
-                                    buf = buf[matches[-1].end():]
-                    except Exception as ex:
-                        self.scale_error = str(ex)
-                        self.scale_connected = False
-                        break
-
-            t = threading.Thread(target=_read_loop, daemon=True)
-            t.start()
-            self.scale_thread = t
-            return True
+            reader = ScaleReader(port, self.weight_feed, baud=baud, on_error=self._on_scale_error)
         except Exception as ex:
             self.scale_error = str(ex)
             messagebox.showerror("저울 연결 실패", str(ex))
             return False
+        self._stop_scale_source()
+        self.scale_weight = self.scale_stable = None
+        self.stabilizer.reset()
+        self.scale_com_port = port
+        self.scale_error = None
+        self.scale_connected = True
+        self.scale_simulating = False
+        self.scale_source = reader
+        reader.start()
+        return True
 
     def disconnect_scale(self):
         self.scale_connected = False
-        if self.scale_serial:
-            try:
-                self.scale_serial.close()
-            except Exception:
-                pass
-            self.scale_serial = None
+        self._stop_scale_source()
+        self.stabilizer.reset()
         self.scale_simulating = True
         self._start_scale_simulation()
 
-    @staticmethod
-    def _parse_weight(raw):
-        """저울 출력 문자열에서 숫자만 추출 (예: '  12.34 g' → 12.34)"""
-        import re
-        m = re.search(r'[-+]?\d+(?:[.,]\d+)?', raw)
-        if m:
-            return float(m.group().replace(',', '.'))
-        return None
+    def save_weight(self, weight=None, trigger='manual'):
+        """무게와 화면·측정값·캘리브·도면·카메라를 기록 큐에 넣음 (파일 쓰기는 logger 스레드)
 
-    def save_weight(self):
-        """현재 무게를 로그에 저장하고 CSV 파일에 기록"""
-        with self.scale_lock:
-            w = self.scale_weight
-        if w is None:
-            messagebox.showwarning("저울", "수신된 무게값이 없습니다.")
+        weight 를 주지 않으면 안정 상태일 때는 안정 평균값, 아니면 현재 값을 쓴다.
+        """
+        stable = trigger == 'auto' or self.stabilizer.state == 'stable'
+        if weight is None:
+            weight = self.stabilizer.value if self.stabilizer.state == 'stable' else self.scale_weight
+        if weight is None:
+            self._notify("저울: 수신된 무게값이 없습니다", warn=True)
             return
 
-        meas_count = len(self.measurements)
-        entry = {
-            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'weight_g': w,
-            'measurements': meas_count,
-            'source': '시뮬레이션' if self.scale_simulating else self.scale_com_port
+        frame = self.last_frame
+        canvas = self.last_full_canvas
+        record = {
+            'time': datetime.now(),
+            'trigger': trigger,
+            'weight_g': weight,
+            'stable': stable,
+            'scale_source': '시뮬레이션' if self.scale_simulating else self.scale_com_port,
+            'camera': self._calib_camera(),
+            'resolution': f"{frame.shape[1]}x{frame.shape[0]}" if frame is not None else "",
+            'px_per_mm': round(self.scale, 6),
+            'calibration': self.calib_note,
+            'dxf': self.dxf_path or "",
+            'measurements': [(m_type, round(val, 4)) for _, _, val, m_type, _ in self.measurements],
+            # 화면 버퍼는 다음 프레임에 재사용되므로 복사해서 넘김 (인코딩은 logger 스레드)
+            'canvas': canvas.copy() if canvas is not None else None,
         }
-        self.weight_log.append(entry)
+        self.logger.log(record)
+        self.weight_log.append(record)
+        self.weight_saved += 1
+
+    def _check_writers(self):
+        """기록 스레드에서 새로 생긴 오류를 화면 알림으로 (UI 루프에서 호출)"""
+        err = self.logger.error
+        if err and err != self._shown_log_error:
+            self._notify(f"기록 오류: {err[:80]}", warn=True, seconds=6.0)
+        self._shown_log_error = err
+
+        saver = self.image_saver
+        dropped, save_err, path = saver.dropped, saver.error, saver.last_path
+        shown_dropped, shown_err, shown_path = self._shown_save
+        if dropped > shown_dropped:
+            self._notify(f"이미지 {dropped - shown_dropped}장 저장 못 함 (저장 대기 가득, 누적 {dropped}장)",
+                         warn=True, seconds=6.0)
+        elif save_err and save_err != shown_err:
+            self._notify(f"이미지 저장 오류: {save_err[:80]}", warn=True, seconds=6.0)
+        elif path and path != shown_path:
+            self._notify(f"저장됨: {path}  ({saver.saved}장)")
+        self._shown_save = (dropped, save_err, path)
 
-        # CSV 저장 (프로젝트 폴더에 자동 기록)
-        csv_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'weight_log.csv')
-        write_header = not os.path.exists(csv_path)
+    # ──────────────────────────────────────────────
+    # 이미지 저장
+    # ──────────────────────────────────────────────
+    def _set_image_format(self, fmt):
+        self.image_saver.fmt = fmt
+        self.btn_labels['IMG_FMT'] = f"형식: {fmt.upper()}"
+
+    def cycle_image_format(self):
+        order = list(IMAGE_FORMATS)
+        self._set_image_format(order[(order.index(self.image_saver.fmt) + 1) % len(order)])
+
+    def save_image_action(self):
+        """현재 화면(오버레이 포함)을 자동 이름으로 저장 (인코딩·쓰기는 image_saver 스레드)
+
+        저장 완료 경로·버림·오류는 _check_writers() 가 화면 알림으로 보여 준다.
+        """
+        if self.last_full_canvas is not None:
+            self.image_saver.submit(self.last_full_canvas)
+
+    def _finish_saves(self):
+        """종료 전에 대기 중인 이미지 저장을 최대 SAVE_CLOSE_TIMEOUT 초 기다림 (남은 장수를 화면에 표시)"""
+        saver = self.image_saver
+        deadline = time.perf_counter() + SAVE_CLOSE_TIMEOUT
         try:
-            with open(csv_path, 'a', encoding='utf-8-sig') as f:
-                if write_header:
-                    f.write("시간,무게(g),측정개수,출처\n")
-                f.write(f"{entry['time']},{entry['weight_g']},{entry['measurements']},{entry['source']}\n")
-            messagebox.showinfo("무게 저장", f"저장 완료\n무게: {w:.2f} g\n파일: weight_log.csv")
-        except Exception as ex:
-            messagebox.showerror("저장 실패", str(ex))
+            visible = (self.buffers.display is not None and
+                       cv2.getWindowProperty('Vision Inspector', cv2.WND_PROP_VISIBLE) >= 1)
+        except cv2.error:
+            visible = False
+        if saver.pending and not visible:
+            print(f"이미지 {saver.pending}장 저장 마무리 중...", file=sys.stderr)
+        while saver.pending and time.perf_counter() < deadline:
+            if visible:
+                img = self.buffers.display.copy()
+                left = deadline - time.perf_counter()
+                self._notify(f"이미지 저장 마무리 중: {saver.pending}장 남음 (최대 {left:.0f}초)", seconds=1.0)
+                self._draw_notice(img)
+                cv2.imshow('Vision Inspector', img)
+                cv2.waitKey(100)
+            else:
+                time.sleep(0.1)
+        unsaved = saver.close(timeout=max(0.0, deadline - time.perf_counter()))
+        if unsaved:
+            print(f"이미지 {unsaved}장을 {SAVE_CLOSE_TIMEOUT:.0f}초 안에 저장하지 못하고 종료합니다 "
+                  f"({saver.out_dir})", file=sys.stderr)
+
+    def start_burst(self, count=BURST_COUNT):
+        """다음 count 개 카메라 원본 프레임을 캡처 스레드에서 바로 저장 (UI 프레임율과 무관)"""
+        grabber = self.grabber
+        if grabber is None or self.loaded_frame is not None or self.is_frozen:
+            messagebox.showwarning("연속 저장", "라이브 영상에서만 연속 저장할 수 있습니다.")
+            return
+        left = [count]
+
+        def _on_frame(frame):
+            self.image_saver.submit(frame, prefix="연속", force=True)
+            left[0] -= 1
+            if left[0] <= 0:
+                grabber.on_frame = None
+
+        grabber.on_frame = _on_frame
+        self._notify(f"연속 저장: {count}장")
 
     # ──────────────────────────────────────────────
     # 카메라
@@ -326,84 +3551,139 @@ class VisionInspector:
         self.cam_display_h = int(self.cam_h * (self.view_w / self.cam_w))
         self.view_h = max(900, self.cam_display_h)
         self.cam_y_offset = (self.view_h - self.cam_display_h) // 2
+        self.buffers.allocate(self.cam_w, self.cam_h, self.view_h, self.total_w)
+
+    def _source_label(self):
+        """상태 표시용 영상 소스 이름 (카메라면 번호)"""
+        if self.cap is None or getattr(self.cap, 'is_camera', True):
+            return str(self.current_cam_idx)
+        return os.path.basename(self.cap.name.rstrip('/\\'))[:16] or self.cap.name[:16]
+
+    def _start_grabber(self):
+        """현재 self.cap 으로 캡처 스레드 시작"""
+        self._stop_grabber()
+        if self.cap is not None:
+            self.grabber = FrameGrabber(self.cap)
+            self.grabber.start()
+
+    def _stop_grabber(self):
+        """캡처 스레드를 멈춤 (cap.release() 전에 반드시 호출)"""
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
 
     def auto_scan_and_connect(self, start_idx):
-        for i in range(start_idx, start_idx + 6):
-            idx = i % 6
-            tmp_cap = self._open_camera(idx)
-            if tmp_cap is not None:
-                self.current_cam_idx = idx
-                return tmp_cap
-        return None
+        tmp_cap, idx = self.discovery.connect(start_idx)
+        if tmp_cap is not None:
+            self.current_cam_idx = idx
+        return tmp_cap
 
     @staticmethod
     def _open_camera(idx):
         """카메라 하나만 열고 첫 프레임이 정상인지 확인"""
-        tmp_cap = cv2.VideoCapture(idx, cv2.CAP_DSHOW)
-        if not tmp_cap.isOpened():
-            tmp_cap.release()
-            return None
-
-        tmp_cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1920)
-        tmp_cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 1080)
-        ret, frame = tmp_cap.read()
-        if ret and frame is not None:
-            return tmp_cap
-
-        tmp_cap.release()
-        return None
-
-    @staticmethod
-    def _get_camera_names():
-        """Windows 장치 관리자에서 카메라 이름을 가져옴"""
-        try:
-            command = (
-                "Get-PnpDevice -Class Camera -Status OK "
-                "| Select-Object -ExpandProperty FriendlyName"
-            )
-            result = subprocess.run(
-                ["powershell", "-NoProfile", "-Command", command],
-                capture_output=True,
-                text=True,
-                timeout=3,
-                creationflags=subprocess.CREATE_NO_WINDOW
-            )
-            return [line.strip() for line in result.stdout.splitlines() if line.strip()]
-        except (OSError, subprocess.SubprocessError):
-            return []
+        return CameraSource.open(idx)
 
     def switch_camera(self):
-        self.camera_names = self._get_camera_names()
+        # 캐시된 이름으로 바로 목록을 열고, 이름은 백그라운드에서 갱신
+        self.camera_names = list(self.discovery.names)
         self.camera_list_visible = not self.camera_list_visible
+        self.layer_list_visible = False
+        if self.camera_list_visible:
+            self.discovery.refresh_names_async(self._on_camera_names)
+
+    def _on_camera_names(self, names):
+        self.camera_names = list(names)
 
     def _camera_list_bounds(self, idx):
         row_y = 82 + idx * 34
         return (self.view_w + 12, row_y, self.total_w - 12, row_y + 28)
 
-    def _draw_camera_list(self, display_img, draw, font_section, font_status):
-        draw.text((self.view_w + 20, 68), "카메라 선택", font=font_section,
-                  fill=self.clr_text)
-        draw.text((self.view_w + 20, 84), "항목을 클릭하면 전환합니다", font=font_status,
-                  fill=self.clr_text_dim)
+    def _camera_list_hovered(self):
+        for idx in range(6):
+            _, y1, _, y2 = self._camera_list_bounds(idx)
+            if (self.view_w + 12 <= self.curr_mx <= self.total_w - 12 and
+                    y1 <= self.curr_my <= y2):
+                return idx
+        return None
+
+    def _draw_camera_list(self, img, hovered):
+        """카메라 선택 목록 (패널 좌표계)"""
+        ox = self.view_w
+        self.glyphs.draw(img, (20, 68), "카메라 선택", self.font_section, self.clr_text)
+        self.glyphs.draw(img, (20, 84), "항목을 클릭하면 전환합니다", self.font_status,
+                         self.clr_text_dim)
 
         for idx in range(6):
             x1, y1, x2, y2 = self._camera_list_bounds(idx)
+            x1, x2 = x1 - ox, x2 - ox
             is_current = idx == self.current_cam_idx
-            is_hovered = (self.view_w + 12 <= self.curr_mx <= self.total_w - 12 and
-                          y1 <= self.curr_my <= y2)
             if is_current:
                 fill = self.clr_active
-            elif is_hovered:
+            elif idx == hovered:
                 fill = self.clr_hover
             else:
                 fill = self.clr_panel
-            draw.rectangle((x1, y1, x2, y2), fill=fill, outline=self.clr_border, width=1)
+            cv2.rectangle(img, (x1, y1), (x2, y2), fill, -1)
+            cv2.rectangle(img, (x1, y1), (x2, y2), self.clr_border, 1)
 
             label = self.camera_names[idx] if idx < len(self.camera_names) else "장치명 확인 불가"
             label = label[:30]
             suffix = "  [현재]" if is_current else ""
-            draw.text((x1 + 8, y1 + 7), f"카메라 {idx}: {label}{suffix}",
-                      font=font_status, fill=self.clr_text)
+            self.glyphs.draw(img, (x1 + 8, y1 + 7), f"카메라 {idx}: {label}{suffix}",
+                             self.font_status, self.clr_text)
+
+    # 레이어 목록: LAYER_LIST_ROWS 줄 + 마지막 '닫기' 줄, 휠로 스크롤
+    LAYER_LIST_ROWS = 10
+
+    def _layer_list_bounds(self, row):
+        row_y = 100 + row * 30
+        return (self.view_w + 12, row_y, self.total_w - 12, row_y + 26)
+
+    def _layer_list_hit(self, x, y):
+        """(x, y) 아래의 목록 줄 번호 (LAYER_LIST_ROWS 는 닫기 줄)"""
+        for row in range(self.LAYER_LIST_ROWS + 1):
+            x1, y1, x2, y2 = self._layer_list_bounds(row)
+            if x1 <= x <= x2 and y1 <= y <= y2:
+                return row
+        return None
+
+    def _scroll_layer_list(self, step):
+        max_scroll = max(0, len(self.dxf_layers) - self.LAYER_LIST_ROWS)
+        self.layer_list_scroll = min(max_scroll, max(0, self.layer_list_scroll + step))
+
+    def _draw_layer_list(self, img, hovered):
+        """레이어 표시/숨김 목록 (패널 좌표계)"""
+        ox = self.view_w
+        total = len(self.dxf_layers)
+        first = self.layer_list_scroll
+        # 레이어가 적어 빈 줄이 생겨도 뒤의 섹션 제목이 비치지 않게 바탕을 덮음
+        cv2.rectangle(img, (12, 66), (self.ui_w - 12, self._layer_list_bounds(self.LAYER_LIST_ROWS)[3]),
+                      self.clr_bg, -1)
+        self.glyphs.draw(img, (20, 68), f"레이어 ({total}개)", self.font_section, self.clr_text)
+        self.glyphs.draw(img, (20, 84), "클릭: 표시/숨김   휠: 스크롤", self.font_status,
+                         self.clr_text_dim)
+
+        for row in range(self.LAYER_LIST_ROWS + 1):
+            x1, y1, x2, y2 = self._layer_list_bounds(row)
+            x1, x2 = x1 - ox, x2 - ox
+            i = first + row
+            if row < self.LAYER_LIST_ROWS and i >= total:
+                continue
+            cv2.rectangle(img, (x1, y1), (x2, y2),
+                          self.clr_hover if row == hovered else self.clr_panel, -1)
+            cv2.rectangle(img, (x1, y1), (x2, y2), self.clr_border, 1)
+            if row == self.LAYER_LIST_ROWS:
+                more = f"   ({first + 1}-{min(total, first + self.LAYER_LIST_ROWS)} / {total})" \
+                    if total > self.LAYER_LIST_ROWS else ""
+                self.glyphs.draw(img, (x1 + 8, y1 + 6), f"닫기{more}", self.font_status, self.clr_text)
+                continue
+            name = self.dxf_layers[i]
+            shown = name not in self.hidden_layers
+            mark = "[v]" if shown else "[  ]"
+            color = self.clr_text if shown else self.clr_text_dim
+            self.glyphs.draw(img, (x1 + 8, y1 + 6),
+                             f"{mark} {name[:26]}  ({self.dxf_layer_counts[i]})",
+                             self.font_status, color)
 
     def _start_camera_switch(self, target_idx):
         with self.camera_lock:
@@ -414,6 +3694,7 @@ class VisionInspector:
             old_idx = self.current_cam_idx
             self.cap = None
 
+        self._stop_grabber()
         if old_cap is not None:
             old_cap.release()
 
@@ -423,6 +3704,8 @@ class VisionInspector:
             if new_cap is None:
                 new_cap = self._open_camera(old_idx)
                 selected_idx = old_idx if new_cap is not None else None
+            if new_cap is not None:
+                self.discovery.remember(selected_idx, new_cap)
             with self.camera_lock:
                 self.pending_camera = new_cap
                 self.pending_cam_idx = selected_idx
@@ -440,33 +3723,201 @@ class VisionInspector:
         if new_cap is None:
             return
 
+        self._stop_grabber()
         old_cap = self.cap
+        old_camera, old_w = self._calib_camera(), self.cam_w
         self.cap = new_cap
         self.current_cam_idx = cam_idx
         if old_cap is not None:
             old_cap.release()
         self.setup_camera()
+        self._start_grabber()
         self.is_frozen = False
         self.loaded_frame = None
+        self._load_calibration(old_camera, old_w)
+        self._load_lens()
 
-    def load_image_action(self):
+    # ──────────────────────────────────────────────
+    # 캘리브레이션 프로필
+    # ──────────────────────────────────────────────
+    def _calib_camera(self):
+        """캘리브레이션 키에 쓸 영상 소스 식별자 (카메라는 장치 이름#번호)"""
+        if self.cap is None or getattr(self.cap, 'is_camera', True):
+            name = self.discovery.device_name(self.current_cam_idx) or "camera"
+            return f"{name}#{self.current_cam_idx}"
+        return f"source:{self.cap.name}"
+
+    def _load_calibration(self, old_camera=None, old_w=None):
+        """현재 카메라·해상도의 배율을 적용 (시작할 때·카메라 전환 후)
+
+        저장된 프로필이 없으면 같은 카메라의 다른 해상도 프로필을 환산하고, 그것도 없으면
+        같은 카메라에서 해상도만 바뀐 경우에 한해 지금 배율을 가로 해상도 비율로 맞춘다.
+        """
+        camera = self._calib_camera()
+        prof = self.calibrations.get(camera, self.cam_w, self.cam_h)
+        self.calib_profile = prof
+        if prof is not None:
+            self.scale = prof['scale']
+            self.calib_note = f"{len(prof['refs'])}점 ±{prof['rms_mm']:.3f}mm"
+            return
+        derived = self.calibrations.derive(camera, self.cam_w)
+        if derived is not None:
+            self.scale, src = derived
+            self.calib_note = f"환산 ({src['width']}x{src['height']})"
+        elif camera == old_camera and old_w and old_w != self.cam_w:
+            self.scale *= self.cam_w / old_w
+            self.calib_note = "해상도 비율 환산"
+        elif old_camera is not None and camera != old_camera:
+            self.calib_note = "없음"
+
+    def add_calibration_reference(self, dist_px, mm):
+        """기준 길이 하나를 현재 프로필에 더하고 최소제곱 배율을 적용"""
+        prof = self.calibrations.add_reference(self._calib_camera(), self.cam_w, self.cam_h, dist_px, mm)
+        self.calib_profile = prof
+        self.scale = prof['scale']
+        self.calib_note = f"{len(prof['refs'])}점 ±{prof['rms_mm']:.3f}mm"
+
+    def reset_calibration(self):
+        """현재 카메라·해상도의 저장된 기준 측정을 모두 삭제"""
+        if self.calib_profile is None:
+            messagebox.showinfo("캘리브 초기화", "저장된 캘리브레이션이 없습니다.")
+            return
+        n = len(self.calib_profile['refs'])
+        if not messagebox.askyesno(
+                "캘리브 초기화",
+                f"{self.cam_w}x{self.cam_h} 캘리브레이션 기준 {n}개를 삭제할까요?\n"
+                f"(현재 배율 {self.scale:.4f} px/mm 은 그대로 유지됩니다)"):
+            return
+        self.calibrations.reset(self._calib_camera(), self.cam_w, self.cam_h)
+        self.calib_profile = None
+        self.calib_note = "없음"
+        self.fixed_calib_line = None
+        self.calib_temp_data = None
+
+    UNDISTORT_LABELS = {'off': '왜곡 보정', 'remap': '보정: 영상', 'points': '보정: 좌표'}
+
+    def _set_undistort_mode(self, mode):
+        self.undistort_mode = mode
+        self.btn_labels['UNDISTORT'] = self.UNDISTORT_LABELS[mode]
+
+    def _load_lens(self):
+        """현재 카메라·해상도의 렌즈 보정을 디스크에서 읽음 (없거나 손상됐으면 보정 끔)"""
+        path = lens_profile_path(self._calib_camera(), self.cam_w, self.cam_h)
+        self.lens = LensCorrector.load(path)
+        if self.lens is None:
+            self._set_undistort_mode('off')
+            if os.path.exists(path):
+                self._notify(f"렌즈 보정 파일 손상 - 보정 없이 진행: {os.path.basename(path)}", warn=True, seconds=6.0)
+
+    def _lens_active(self, frame, mode):
+        return self.undistort_mode == mode and self.lens is not None and frame is not None \
+            and self.lens.matches(frame)
+
+    def _frame_length(self, p1, p2, mode='MEAS_P2P'):
+        """두 프레임 좌표 사이 길이 (px). 좌표 보정 모드면 왜곡을 편 좌표로 계산"""
+        if self._lens_active(self.raw_frame, 'points'):
+            p1, p2 = self.lens.undistort_points([p1, p2])
+        return measure_length(p1, p2, mode)
+
+    def lens_calib_action(self):
+        """체커보드 사진 여러 장으로 렌즈 왜곡 보정 (백그라운드, 결과는 _apply_pending_lens)"""
+        if self.lens_progress is not None:
+            return
+        paths = self._ask_image_paths(multiple=True, title="체커보드 사진 선택 (여러 장)")
+        if not paths:
+            return
         root = tk.Tk()
         root.withdraw()
         root.attributes("-topmost", True)
-        path = filedialog.askopenfilename(
+        text = simpledialog.askstring("렌즈 보정", "체커보드 내부 코너 수 (가로x세로):",
+                                      initialvalue=f"{LENS_BOARD[0]}x{LENS_BOARD[1]}", parent=root)
+        root.destroy()
+        if not text:
+            return
+        try:
+            board = tuple(int(v) for v in text.lower().replace('*', 'x').split('x'))
+            if len(board) != 2 or min(board) < 2:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("렌즈 보정", f"코너 수 형식이 올바르지 않습니다: {text}\n예: 9x6")
+            return
+
+        camera, size = self._calib_camera(), (self.cam_w, self.cam_h)
+        self.lens_progress = ("사진 읽는 중", 0.0)
+
+        def _progress(step, frac):
+            self.lens_progress = (step, frac)
+
+        def _worker():
+            try:
+                images = [read_image(p) for p in paths]
+                if not any(img is not None and img.shape[1::-1] == size for img in images):
+                    raise ValueError(f"카메라 해상도({size[0]}x{size[1]})와 같은 사진이 없습니다.")
+                images = [img if img is not None and img.shape[1::-1] == size else None for img in images]
+                lens = calibrate_lens(images, board, progress=_progress)
+                lens.save(lens_profile_path(camera, *size))
+                result = (camera, size, lens, len(paths))
+            except Exception as ex:
+                result = ex
+            self.pending_lens = result
+            self.lens_progress = None
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _apply_pending_lens(self):
+        result = self.pending_lens
+        if result is None:
+            return
+        self.pending_lens = None
+        if isinstance(result, Exception):
+            messagebox.showerror("렌즈 보정 실패", str(result))
+            return
+        camera, size, lens, total = result
+        # 보정 도중 카메라를 바꿨으면 저장만 하고 적용은 하지 않음
+        if camera == self._calib_camera() and size == (self.cam_w, self.cam_h):
+            self.lens = lens
+            if self.undistort_mode == 'off':
+                self._set_undistort_mode('remap')
+        k = ", ".join(f"{v:.4f}" for v in lens.dist.ravel()[:5])
+        msg = (f"사진 {lens.images}/{total}장 사용, 재투영 오차 {lens.rms:.3f}px\n"
+               f"왜곡 계수 (k1, k2, p1, p2, k3): {k}\n\n"
+               f"'왜곡 보정' 버튼으로 영상 / 좌표 / 끔을 바꿀 수 있습니다.\n"
+               f"보정 방식을 바꾸면 px/mm 캘리브레이션을 다시 확인하세요.")
+        if lens.rms > 1.0:
+            messagebox.showwarning("렌즈 보정 완료 (오차 큼)", msg + "\n\n오차가 큽니다. 초점이 맞는 사진으로 다시 시도하세요.")
+        else:
+            messagebox.showinfo("렌즈 보정 완료", msg)
+
+    def cycle_undistort(self):
+        """왜곡 보정 방식 순환: 끔 → 영상 전체 remap → 측정 좌표만 → 끔"""
+        if self.lens is None:
+            messagebox.showinfo("왜곡 보정", "이 카메라·해상도의 렌즈 보정이 없습니다.\n'렌즈 보정' 을 먼저 하세요.")
+            return
+        order = ['off', 'remap', 'points']
+        self._set_undistort_mode(order[(order.index(self.undistort_mode) + 1) % len(order)])
+
+    @staticmethod
+    def _ask_image_paths(multiple=False, title=None):
+        """이미지 파일 선택 대화상자 (multiple 이면 여러 장, 취소하면 빈 값)"""
+        root = tk.Tk()
+        root.withdraw()
+        root.attributes("-topmost", True)
+        ask = filedialog.askopenfilenames if multiple else filedialog.askopenfilename
+        options = {'title': title} if title else {}
+        paths = ask(
             filetypes=[("이미지 파일", "*.jpg *.jpeg *.png *.bmp *.tif *.tiff"),
                        ("모든 파일", "*.*")],
-            parent=root
+            parent=root, **options
         )
         root.destroy()
+        return paths
+
+    def load_image_action(self):
+        path = self._ask_image_paths()
         if not path:
             return
 
-        try:
-            image_data = np.fromfile(path, dtype=np.uint8)
-            image = cv2.imdecode(image_data, cv2.IMREAD_COLOR)
-        except (OSError, ValueError, cv2.error):
-            image = None
+        image = read_image(path)
         if image is None:
             messagebox.showerror("사진 불러오기 실패", "이미지 파일을 읽을 수 없습니다.")
             return
@@ -484,160 +3935,232 @@ class VisionInspector:
     # DXF 로딩 (핵심 수정 부분)
     # ──────────────────────────────────────────────
     def load_dxf_action(self, path):
+        """도면을 백그라운드에서 읽기 시작 (결과는 메인 루프에서 _apply_pending_dxf 로 반영)"""
         if not path or not os.path.exists(path):
             messagebox.showerror("오류", f"파일을 찾을 수 없습니다:\n{path}")
             return
-        try:
-            doc = ezdxf.readfile(path)
-            msp = doc.modelspace()
-            contours = []   # (ctype, np.array)
-            all_pts = []
 
-            # ── 1. LWPOLYLINE ──────────────────────
-            for e in msp.query('LWPOLYLINE'):
-                try:
-                    pts = np.array(e.get_points('xy'), dtype=np.float32)
-                    if len(pts) >= 2:
-                        closed = e.closed
-                        contours.append(('poly' if closed else 'line', pts))
-                        all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+        with self.dxf_lock:
+            self.dxf_load_gen += 1
+            gen = self.dxf_load_gen
+            self.dxf_progress = ("파일 읽는 중", 0.0)
 
-            # ── 2. POLYLINE (구형 폴리라인) ────────
-            for e in msp.query('POLYLINE'):
-                try:
-                    pts = np.array([[v.dxf.location.x, v.dxf.location.y]
-                                    for v in e.vertices], dtype=np.float32)
-                    if len(pts) >= 2:
-                        contours.append(('poly' if e.is_closed else 'line', pts))
-                        all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+        def _progress(text, frac):
+            if gen == self.dxf_load_gen:
+                self.dxf_progress = (text, frac)
 
-            # ── 3. LINE ───────────────────────────
-            for e in msp.query('LINE'):
-                try:
-                    pts = np.array([
-                        [e.dxf.start.x, e.dxf.start.y],
-                        [e.dxf.end.x,   e.dxf.end.y]
-                    ], dtype=np.float32)
-                    contours.append(('line', pts))
-                    all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+        def _worker():
+            try:
+                result = ('ok', load_dxf_geometry(path, progress=_progress), path)
+            except ezdxf.DXFStructureError as ex:
+                result = ('error', "DXF 오류", f"DXF 파일 구조 오류:\n{ex}")
+            except Exception as ex:
+                result = ('error', "DXF 오류", f"도면 로드 실패:\n{ex}")
+            with self.dxf_lock:
+                # 더 최근에 시작한 로딩이 있으면 이 결과는 버림
+                if gen == self.dxf_load_gen:
+                    self.pending_dxf = result
+                    self.dxf_progress = None
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def _apply_pending_dxf(self):
+        """백그라운드 로딩 결과를 UI 스레드에서 반영하고 알림 표시"""
+        with self.dxf_lock:
+            result = self.pending_dxf
+            self.pending_dxf = None
+        if result is None:
+            return
 
-            # ── 4. CIRCLE ─────────────────────────
-            for e in msp.query('CIRCLE'):
-                try:
-                    cx, cy = e.dxf.center.x, e.dxf.center.y
-                    r = e.dxf.radius
-                    n = max(72, int(r * 4))          # 반경에 비례해 점 수 조절
-                    angles = np.linspace(0, 2 * np.pi, n, endpoint=False)
-                    pts = np.column_stack([
-                        cx + r * np.cos(angles),
-                        cy + r * np.sin(angles)
-                    ]).astype(np.float32)
-                    contours.append(('poly', pts))
-                    all_pts.extend([[cx + r, cy], [cx - r, cy],
-                                    [cx, cy + r], [cx, cy - r]])
-                except Exception:
-                    pass
+        if result[0] == 'error':
+            messagebox.showerror(result[1], result[2])
+            return
 
-            # ── 5. ARC ────────────────────────────
-            for e in msp.query('ARC'):
-                try:
-                    cx, cy = e.dxf.center.x, e.dxf.center.y
-                    r = e.dxf.radius
-                    a1 = np.radians(e.dxf.start_angle)
-                    a2 = np.radians(e.dxf.end_angle)
-                    if a2 <= a1:
-                        a2 += 2 * np.pi
-                    n = max(12, int(np.degrees(a2 - a1) / 3))
-                    angles = np.linspace(a1, a2, n)
-                    pts = np.column_stack([
-                        cx + r * np.cos(angles),
-                        cy + r * np.sin(angles)
-                    ]).astype(np.float32)
-                    contours.append(('line', pts))
-                    all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+        geom = result[1]
+        # ── 결과 확인 ─────────────────────────
+        if not geom.contours:
+            messagebox.showwarning(
+                "DXF 경고",
+                f"읽을 수 있는 도형이 없습니다.\n\n"
+                f"파일에 포함된 엔티티 타입:\n{', '.join(sorted(geom.counts))}\n\n"
+                f"지원: LINE, CIRCLE, ARC, ELLIPSE,\n"
+                f"LWPOLYLINE, POLYLINE, SPLINE, HATCH, INSERT(블록)"
+            )
+            return
 
-            # ── 6. ELLIPSE ────────────────────────
-            for e in msp.query('ELLIPSE'):
-                try:
-                    cx, cy = e.dxf.center.x, e.dxf.center.y
-                    major = np.array([e.dxf.major_axis.x, e.dxf.major_axis.y])
-                    ratio = e.dxf.ratio
-                    a1 = e.dxf.start_param
-                    a2 = e.dxf.end_param
-                    if a2 <= a1:
-                        a2 += 2 * np.pi
-                    n = max(72, int(np.degrees(a2 - a1) / 3))
-                    t = np.linspace(a1, a2, n)
-                    major_len = np.linalg.norm(major)
-                    major_angle = np.arctan2(major[1], major[0])
-                    px = cx + major_len * np.cos(t) * np.cos(major_angle) \
-                             - major_len * ratio * np.sin(t) * np.sin(major_angle)
-                    py = cy + major_len * np.cos(t) * np.sin(major_angle) \
-                             + major_len * ratio * np.sin(t) * np.cos(major_angle)
-                    pts = np.column_stack([px, py]).astype(np.float32)
-                    contours.append(('line', pts))
-                    all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+        self._set_dxf_geometry(geom)
+        self.dxf_path = os.path.abspath(result[2])
+        raw, kept = self.dxf_overlay.reduction(self.scale)
+
+        # 로드 성공 메시지 (엔티티 수·정점 단순화 결과 표시)
+        summary = '\n'.join(f"  {k}: {v}개" for k, v in sorted(geom.counts.items()))
+        messagebox.showinfo(
+            "DXF 로드 완료",
+            f"도형 {len(geom.contours)}개 로드됨 (레이어 {len(geom.layers)}개)\n"
+            f"정점 {raw:,} → {kept:,}개 ({(1 - kept / max(1, raw)) * 100:.0f}% 감소, 현재 배율 기준)\n\n"
+            f"엔티티 구성:\n{summary}"
+        )
 
-            # ── 7. SPLINE ─────────────────────────
-            for e in msp.query('SPLINE'):
-                try:
-                    # ezdxf 0.18+ : flattening 으로 근사 폴리라인 추출
-                    pts = np.array([[p[0], p[1]] for p in e.flattening(0.1)],
-                                   dtype=np.float32)
-                    if len(pts) >= 2:
-                        contours.append(('line', pts))
-                        all_pts.extend(pts.tolist())
-                except Exception:
-                    pass
+    def _set_dxf_geometry(self, geom):
+        """파싱된 윤곽선을 도면 중심 기준으로 옮기고 렌더 캐시에 등록"""
+        contours, lods = dxf_model_contours(geom)
+        self.dxf_real_width = geom.width
+
+        if self.calib_profile is None and self.scale <= 1.1 and self.dxf_real_width > 0:
+            ref_w = self.cam_w if 0 < self.cam_w <= 1920 else self.view_w
+            self.scale = (ref_w * 0.4) / self.dxf_real_width
+
+        self.dxf_contours = contours
+        self.dxf_layers = list(geom.layers)
+        self.dxf_layer_ids = np.asarray(geom.layer_ids)
+        self.dxf_layer_counts = np.bincount(
+            geom.layer_ids, minlength=len(geom.layers)).tolist() if len(contours) else []
+        self.layer_list_scroll = 0
+        self.dxf_overlay.set_contours(contours, lods, geom.layer_ids)
+        self._apply_hidden_layers()
+
+    def _apply_hidden_layers(self):
+        hidden = {i for i, name in enumerate(self.dxf_layers) if name in self.hidden_layers}
+        self.dxf_overlay.set_hidden_layers(hidden)
+
+    def toggle_layer(self, name):
+        if name in self.hidden_layers:
+            self.hidden_layers.discard(name)
+        else:
+            self.hidden_layers.add(name)
+        self._apply_hidden_layers()
 
-            # ── 결과 확인 ─────────────────────────
-            if not all_pts:
-                entity_types = set(e.dxftype() for e in msp)
-                messagebox.showwarning(
-                    "DXF 경고",
-                    f"읽을 수 있는 도형이 없습니다.\n\n"
-                    f"파일에 포함된 엔티티 타입:\n{', '.join(sorted(entity_types))}\n\n"
-                    f"지원: LINE, CIRCLE, ARC, ELLIPSE,\n"
-                    f"LWPOLYLINE, POLYLINE, SPLINE"
-                )
-                return
+    def auto_fit_action(self):
+        """현재 프레임의 에지에 도면을 자동으로 맞춤 (백그라운드, 결과는 _apply_pending_fit)"""
+        if not self.dxf_contours:
+            messagebox.showinfo("자동 정합", "도면을 먼저 불러오세요.")
+            return
+        if self.dxf_progress is not None or self.fit_progress is not None:
+            return
+        frame = self.last_frame
+        if frame is None:
+            return
+        # 캡처 링 버퍼 슬롯은 재사용되므로 복사해서 넘김
+        frame = frame.copy()
+        # 숨긴 레이어는 빼고, 현재 배율의 단순화된 윤곽선으로 정합
+        visible = self.dxf_overlay.contours_at(self.scale)
+        if not visible:
+            messagebox.showinfo("자동 정합", "표시된 레이어가 없습니다.")
+            return
 
-            all_pts = np.array(all_pts, dtype=np.float32)
-            center = np.mean(all_pts, axis=0)
-
-            # AutoCAD Y축(위=+) → 화면 Y축(아래=+) 변환을 위해 Y 반전
-            self.dxf_contours = [(ctype, (pts - center) * [1, -1]) for ctype, pts in contours]
-            self.dxf_real_width = (np.max(all_pts[:, 0]) - np.min(all_pts[:, 0]))
-
-            if self.scale <= 1.1 and self.dxf_real_width > 0:
-                ref_w = self.cam_w if 0 < self.cam_w <= 1920 else self.view_w
-                self.scale = (ref_w * 0.4) / self.dxf_real_width
-
-            # 로드 성공 메시지 (엔티티 수 표시)
-            counts = {}
-            for e in msp:
-                t = e.dxftype()
-                counts[t] = counts.get(t, 0) + 1
-            summary = '\n'.join(f"  {k}: {v}개" for k, v in sorted(counts.items()))
-            messagebox.showinfo(
-                "DXF 로드 완료",
-                f"도형 {len(contours)}개 로드됨\n\n엔티티 구성:\n{summary}"
-            )
+        with self.dxf_lock:
+            gen = self.dxf_load_gen
+            self.fit_progress = ("정합 준비", 0.0)
+        init = (self.scale, self.angle, self.offset_x, self.offset_y)
+        # 캘리브레이션 프로필이 있으면 배율(px/mm)은 그대로 두고 이동·회전만 맞춤
+        fixed = self.calib_profile is not None
 
-        except ezdxf.DXFStructureError as ex:
-            messagebox.showerror("DXF 오류", f"DXF 파일 구조 오류:\n{ex}")
-        except Exception as ex:
-            messagebox.showerror("DXF 오류", f"도면 로드 실패:\n{ex}")
+        def _progress(text, frac):
+            self.fit_progress = (f"정합 - {text}", frac)
+
+        def _worker():
+            try:
+                result = register_dxf(frame, visible, *init, progress=_progress, fixed_scale=fixed)
+            except Exception as ex:
+                result = ex
+            if result is None:
+                # None 은 '결과 없음' 으로 읽히므로 정합 실패를 따로 표시
+                result = 'no_match'
+            with self.dxf_lock:
+                # 정합 도중 다른 도면을 불러왔으면 결과는 버림
+                if gen == self.dxf_load_gen:
+                    self.pending_fit = result
+                self.fit_progress = None
+
+        threading.Thread(target=_worker, daemon=True).start()
+
+    def toggle_inspection(self):
+        """편차 검사 켜기 (공차 입력) / 끄기"""
+        if self.inspect_enabled:
+            self.inspect_enabled = False
+            self.inspect_result = None
+            return
+        if not self.dxf_contours:
+            messagebox.showinfo("편차 검사", "도면을 먼저 불러오세요.")
+            return
+        root = tk.Tk()
+        root.withdraw()
+        root.attributes("-topmost", True)
+        tol = simpledialog.askfloat("편차 검사", "허용 편차(mm)를 입력하세요:",
+                                    initialvalue=self.inspect_tol_mm, minvalue=0.0, parent=root)
+        root.destroy()
+        if tol:
+            self.inspect_tol_mm = tol
+            self.inspect_enabled = True
+
+    def _apply_pending_fit(self):
+        with self.dxf_lock:
+            result = self.pending_fit
+            self.pending_fit = None
+        if result is None:
+            return
+        if isinstance(result, Exception):
+            messagebox.showerror("자동 정합", f"정합 실패:\n{result}")
+            return
+        if result == 'no_match':
+            messagebox.showwarning("자동 정합", "도면과 맞는 위치를 찾지 못했습니다.\n"
+                                   "배율·초점과 표시된 레이어를 확인하세요. (도면 위치는 그대로 둡니다)")
+            return
+
+        if self.calib_profile is None:
+            self.scale = result['scale']
+            scale_note = f"배율 {self.scale:.3f}x"
+        else:
+            # 정합 도중 프로필이 생겼어도 캘리브레이션 배율을 덮어쓰지 않음
+            scale_note = f"배율 {self.scale:.3f}x (캘리브 고정)"
+        self.angle = result['angle']
+        self.offset_x = result['offset_x']
+        self.offset_y = result['offset_y']
+        summary = (f"{scale_note}, 회전 {self.angle:.2f}°, "
+                   f"이동 ({self.offset_x:.1f}, {self.offset_y:.1f})px\n"
+                   f"평균 거리 {result['score']:.2f}px, 일치율 {result['inliers'] * 100:.0f}%, "
+                   f"{result['elapsed'] * 1000:.0f}ms")
+        if result['inliers'] < 0.5:
+            messagebox.showwarning("자동 정합", f"일치율이 낮습니다. 결과를 확인하세요.\n\n{summary}")
+        else:
+            messagebox.showinfo("자동 정합 완료", summary)
+
+    def _draw_dxf_progress(self, display_img):
+        """도면 로딩·정합·렌즈 보정 진행 막대 (화면에만 표시, 저장 이미지에는 포함 안 됨)"""
+        if self.lens_progress is not None:
+            title, (text, frac) = "렌즈", self.lens_progress
+        elif self.dxf_progress or self.fit_progress:
+            title, (text, frac) = "도면", self.dxf_progress or self.fit_progress
+        else:
+            return
+        x1, y1 = 20, self.cam_y_offset + 20
+        x2, y2 = x1 + 300, y1 + 18
+        cv2.rectangle(display_img, (x1, y1), (x2, y2), self.clr_section, -1)
+        cv2.rectangle(display_img, (x1, y1), (x1 + int((x2 - x1) * frac), y2), self.clr_primary, -1)
+        cv2.rectangle(display_img, (x1, y1), (x2, y2), self.clr_border, 1)
+        self.glyphs.draw(display_img, (x1 + 6, y1 + 2), f"{title} {text} {frac * 100:.0f}%",
+                         self.font_status, self.clr_text)
+
+    def _notify(self, text, warn=False, seconds=3.0):
+        """영상 왼쪽 아래에 잠깐 띄우는 알림 (창을 막지 않음, 다른 스레드에서 불러도 됨)"""
+        self.notice = (text, warn, time.perf_counter() + seconds)
+
+    def _draw_notice(self, display_img):
+        """알림 (화면에만 표시, 저장 이미지에는 포함 안 됨)"""
+        notice = self.notice
+        if notice is None:
+            return
+        text, warn, until = notice
+        if time.perf_counter() > until:
+            self.notice = None
+            return
+        color = (90, 170, 255) if warn else self.clr_text
+        xy = (20, self.cam_y_offset + self.cam_display_h - 32)
+        x1, y1, x2, y2 = self.glyphs.extent(xy, text, self.font_status, color)
+        cv2.rectangle(display_img, (x1 - 6, y1 - 5), (x2 + 6, y2 + 5), self.clr_section, -1)
+        cv2.rectangle(display_img, (x1 - 6, y1 - 5), (x2 + 6, y2 + 5),
+                      (80, 120, 255) if warn else self.clr_border, 1)
+        self.glyphs.draw(display_img, xy, text, self.font_status, color)
 
     # ──────────────────────────────────────────────
     # UI
@@ -650,7 +4173,6 @@ class VisionInspector:
         section_gap = 8
         start_y = 65
 
-        col_w = (self.ui_w - 30 - margin_x) // 2
         max_button_y = self.view_h - self.bottom_area_height - 10
 
         y = start_y
@@ -665,6 +4187,9 @@ class VisionInspector:
             for row in section['buttons']:
                 if y + btn_h > max_button_y:
                     break
+                # 한 줄에 2개가 기본이고, 3개인 줄은 폭을 나눠 씀
+                cols = max(2, len(row))
+                col_w = (self.ui_w - 30 - margin_x * (cols - 1)) // cols
                 for col_idx, btn in enumerate(row):
                     x1 = self.view_w + 15 + col_idx * (col_w + margin_x)
                     x2 = x1 + col_w
@@ -673,151 +4198,288 @@ class VisionInspector:
 
             y += section_gap
 
-    def draw_ui(self, display_img):
-        # 배경
-        cv2.rectangle(display_img, (self.view_w, 0), (self.total_w, self.view_h), self.clr_bg, -1)
-        cv2.line(display_img, (self.view_w, 0), (self.view_w, self.view_h), self.clr_border, 2)
-
-        # 상단 타이틀
-        cv2.rectangle(display_img, (self.view_w, 0), (self.total_w, 50), self.clr_section, -1)
-
-        # 버튼
-        for mode, (x1, y1, x2, y2) in self.buttons.items():
-            is_active  = (mode == self.current_mode)
-            is_hovered = (mode == self.hovered_button)
-            is_pressed = (mode == self.pressed_button)
-
-            if is_pressed:
-                btn_clr, border_clr = self.clr_pressed, self.clr_primary
-            elif is_active:
-                btn_clr, border_clr = self.clr_active, self.clr_active
-            elif is_hovered:
-                btn_clr, border_clr = self.clr_hover, self.clr_hover
-            else:
-                btn_clr, border_clr = self.clr_panel, self.clr_border
-
-            cv2.rectangle(display_img, (x1, y1), (x2, y2), btn_clr, -1)
-            cv2.rectangle(display_img, (x1, y1), (x2, y2), border_clr, 1)
-            if is_active:
-                cv2.rectangle(display_img, (x1, y1), (x1 + 4, y2), (76, 255, 153), -1)
+    def template_dict(self):
+        """현재 측정·십자선·배율·도면 정합 상태를 일괄 측정용 템플릿으로"""
+        frame = self.last_frame
+        h, w = frame.shape[:2]
+        tpl = {
+            'version': TEMPLATE_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'frame_size': [w, h],
+            'scale': self.scale,
+            'measurements': [
+                {'mode': m_type, 'p1': list(p1), 'p2': list(p2), 'label': list(pt), 'value_mm': val}
+                for p1, p2, val, m_type, pt in self.measurements
+            ],
+            'crosshairs': [list(c) for c in self.crosshairs],
+            'colors': {
+                'dxf': list(self.color_palette[self.idx_dxf_color]),
+                'meas': list(self.color_palette[self.idx_meas_color]),
+                'cross': list(self.color_palette[self.idx_cross_color]),
+            },
+            'dxf': None,
+            'inspect_tol_mm': self.inspect_tol_mm if self.inspect_enabled else None,
+            'lens': None,
+        }
+        if self.lens is not None and self.undistort_mode != 'off':
+            tpl['lens'] = {'path': lens_profile_path(self._calib_camera(), self.cam_w, self.cam_h),
+                           'mode': self.undistort_mode}
+        if self.dxf_contours and self.dxf_path:
+            tpl['dxf'] = {
+                'path': self.dxf_path,
+                'angle': self.angle,
+                'offset_x': self.offset_x,
+                'offset_y': self.offset_y,
+                'hidden_layers': sorted(self.hidden_layers),
+            }
+        return tpl
 
-        # 하단 영역
-        bottom_start_y = self.view_h - self.bottom_area_height
-        cv2.rectangle(display_img, (self.view_w, bottom_start_y), (self.total_w, self.view_h), self.clr_section, -1)
-        cv2.line(display_img, (self.view_w, bottom_start_y), (self.total_w, bottom_start_y), self.clr_border, 2)
+    def save_template_action(self):
+        """검사 템플릿 저장 (명령줄 --batch 로 폴더 전체에 적용)"""
+        if self.last_frame is None:
+            return
+        if not self.measurements and not self.crosshairs:
+            messagebox.showinfo("템플릿 저장", "저장할 측정이나 십자선이 없습니다.")
+            return
+        folder = os.path.join(APP_DIR, 'templates')
+        os.makedirs(folder, exist_ok=True)
+        root = tk.Tk()
+        root.withdraw()
+        root.attributes("-topmost", True)
+        path = filedialog.asksaveasfilename(
+            defaultextension=".json", initialdir=folder,
+            initialfile=f'template_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
+            filetypes=[("검사 템플릿", "*.json")], parent=root
+        )
+        if path:
+            try:
+                _write_json(path, self.template_dict())
+                messagebox.showinfo(
+                    "템플릿 저장",
+                    f"측정 {len(self.measurements)}개, 십자선 {len(self.crosshairs)}개를 저장했습니다.\n\n"
+                    f"일괄 측정:\npython \"Vison Camera.py\" --batch \"{path}\" --input <이미지 폴더> --out <결과 폴더>",
+                    parent=root)
+            except OSError as ex:
+                messagebox.showerror("저장 실패", f"템플릿 저장 오류:\n{ex}", parent=root)
+        root.destroy()
 
-        # 확대경
+    def _button_on(self, mode):
+        """모드가 아닌 켜기/끄기 버튼의 켜짐 상태"""
+        if mode == 'INSPECT':
+            return self.inspect_enabled
+        if mode == 'UNDISTORT':
+            return self.undistort_mode != 'off'
+        if mode == 'AUTO_SAVE':
+            return self.auto_save
+        return False
+
+    def _magnifier_rect(self):
         mag_size = 150
-        mag_y1 = bottom_start_y + 20
-        mag_y2 = mag_y1 + mag_size
+        mag_y1 = self.view_h - self.bottom_area_height + 20
         mag_x1 = self.view_w + (self.ui_w - mag_size) // 2
-        mag_x2 = mag_x1 + mag_size
+        return mag_x1, mag_y1, mag_x1 + mag_size, mag_y1 + mag_size
 
-        cv2.rectangle(display_img, (mag_x1 - 2, mag_y1 - 2), (mag_x2 + 2, mag_y2 + 2), self.clr_border, 2)
-        cv2.rectangle(display_img, (mag_x1 - 1, mag_y1 - 1), (mag_x2 + 1, mag_y2 + 1), self.clr_bg, 1)
+    def _init_panel(self):
+        """우측 패널 버퍼와 정적 배경층 생성 (view_h 가 바뀌면 다시 생성)"""
+        self.panel = RetainedPanel(self.view_w, self.ui_w, self.view_h)
+        self.panel.set_base(self._draw_panel_base)
+        self._panel_camlist = None
 
-        if (self.curr_mx < self.view_w and
-                self.cam_y_offset <= self.curr_my < self.cam_y_offset + self.cam_display_h and
-                self.last_full_canvas is not None):
+    def _draw_panel_base(self, img):
+        """변하지 않는 패널 요소: 배경, 제목, 섹션 헤더, 확대경 테두리"""
+        ox = self.view_w
+        img[:] = self.clr_bg
+        cv2.line(img, (0, 0), (0, self.view_h), self.clr_border, 2)
 
-            src_h, src_w = self.last_full_canvas.shape[:2]
+        # 상단 타이틀
+        cv2.rectangle(img, (0, 0), (self.ui_w, 50), self.clr_section, -1)
 
-            x_ratio = src_w / max(1, self.view_w)
-            y_ratio = src_h / max(1, self.cam_display_h)
+        # 하단 영역
+        bottom_start_y = self.view_h - self.bottom_area_height
+        cv2.rectangle(img, (0, bottom_start_y), (self.ui_w, self.view_h), self.clr_section, -1)
+        cv2.line(img, (0, bottom_start_y), (self.ui_w, bottom_start_y), self.clr_border, 2)
 
-            rx = int(self.curr_mx * x_ratio)
-            ry = int((self.curr_my - self.cam_y_offset) * y_ratio)
+        # 확대경 테두리
+        mag_x1, mag_y1, mag_x2, mag_y2 = self._magnifier_rect()
+        mag_x1, mag_x2 = mag_x1 - ox, mag_x2 - ox
+        cv2.rectangle(img, (mag_x1 - 2, mag_y1 - 2), (mag_x2 + 2, mag_y2 + 2), self.clr_border, 2)
+        cv2.rectangle(img, (mag_x1 - 1, mag_y1 - 1), (mag_x2 + 1, mag_y2 + 1), self.clr_bg, 1)
 
-            rx = max(0, min(rx, src_w - 1))
-            ry = max(0, min(ry, src_h - 1))
+        self.glyphs.draw(img, (20, 12), "VISION MEASUREMENT", self.font_title, (204, 122, 0))
+        self.glyphs.draw(img, (20, 32), "SYSTEM v2.1", self.font_status, self.clr_text_dim)
+        for title, y_pos in self.section_headers.items():
+            self.glyphs.draw(img, (20, y_pos + 2), title, self.font_section, self.clr_text_dim)
+
+    def _panel_text(self, name, items):
+        """글자 요소: items = [(xy, text, font, color), ...] (패널 좌표계)"""
+        rect = None
+        for xy, text, font, color in items:
+            x1, y1, x2, y2 = self.glyphs.extent(xy, text, font, color)
+            if rect is None:
+                rect = [x1, y1, x2, y2]
+            else:
+                rect = [min(rect[0], x1), min(rect[1], y1), max(rect[2], x2), max(rect[3], y2)]
+
+        def _draw(img):
+            for xy, text, font, color in items:
+                self.glyphs.draw(img, xy, text, font, color)
+
+        key = tuple((xy, text, color) for xy, text, _, color in items)
+        self.panel.element(name, tuple(rect), key, _draw)
+
+    def _draw_button(self, img, mode, rect, state):
+        x1, y1, x2, y2 = rect
+        x2, y2 = x2 - 1, y2 - 1
+        if state == 'pressed':
+            btn_clr, border_clr = self.clr_pressed, self.clr_primary
+        elif state == 'active':
+            btn_clr, border_clr = self.clr_active, self.clr_active
+        elif state == 'hovered':
+            btn_clr, border_clr = self.clr_hover, self.clr_hover
+        else:
+            btn_clr, border_clr = self.clr_panel, self.clr_border
 
-            roi_s = 30
-            y1c = max(0, ry - roi_s)
-            y2c = min(src_h, ry + roi_s)
-            x1c = max(0, rx - roi_s)
-            x2c = min(src_w, rx + roi_s)
+        cv2.rectangle(img, (x1, y1), (x2, y2), btn_clr, -1)
+        cv2.rectangle(img, (x1, y1), (x2, y2), border_clr, 1)
+        if state == 'active':
+            cv2.rectangle(img, (x1, y1), (x1 + 4, y2), (76, 255, 153), -1)
 
-            roi = self.last_full_canvas[y1c:y2c, x1c:x2c]
+        txt_fill = (241, 241, 241) if state else (200, 200, 200)
+        label = self.btn_labels.get(mode, mode)
+        self.glyphs.draw(img, (x1 + 8, y1 + 8), label, self.font_btn, txt_fill)
 
-            if roi is not None and roi.size > 0:
-                roi_res = cv2.resize(
-                    roi,
-                    (mag_size, mag_size),
-                    interpolation=cv2.INTER_NEAREST
-                )
+    def _draw_magnifier(self, img, rect):
+        """마우스 위치 주변을 확대해서 표시 (패널 좌표계)"""
+        mag_x1, mag_y1, mag_x2, mag_y2 = rect
+        mag_size = mag_x2 - mag_x1
+        src_h, src_w = self.last_full_canvas.shape[:2]
 
-                display_img[mag_y1:mag_y2, mag_x1:mag_x2] = roi_res
+        x_ratio = src_w / max(1, self.view_w)
+        y_ratio = src_h / max(1, self.cam_display_h)
 
-                cx_m = mag_x1 + mag_size // 2
-                cy_m = mag_y1 + mag_size // 2
-                cv2.line(display_img, (cx_m, mag_y1),
-                         (cx_m, mag_y2), (0, 255, 0), 1)
-                cv2.line(display_img, (mag_x1, cy_m),
-                         (mag_x2, cy_m), (0, 255, 0), 1)
+        rx = int(self.curr_mx * x_ratio)
+        ry = int((self.curr_my - self.cam_y_offset) * y_ratio)
 
-        # PIL 텍스트
-        img_pil = Image.fromarray(display_img)
-        draw = ImageDraw.Draw(img_pil)
+        rx = max(0, min(rx, src_w - 1))
+        ry = max(0, min(ry, src_h - 1))
 
-        try:
-            font_title  = ImageFont.truetype("malgunbd.ttf", 16)
-            font_section = ImageFont.truetype("malgun.ttf",  10)
-            font_btn    = ImageFont.truetype("malgun.ttf",   10)
-            font_status = ImageFont.truetype("malgun.ttf",    9)
-        except Exception:
-            font_title = font_section = font_btn = font_status = ImageFont.load_default()
+        roi_s = 30
+        y1c = max(0, ry - roi_s)
+        y2c = min(src_h, ry + roi_s)
+        x1c = max(0, rx - roi_s)
+        x2c = min(src_w, rx + roi_s)
+
+        roi = self.last_full_canvas[y1c:y2c, x1c:x2c]
+        if roi.size == 0:
+            return
 
-        draw.text((self.view_w + 20, 12), "VISION MEASUREMENT", font=font_title,  fill=(204, 122, 0))
-        draw.text((self.view_w + 20, 32), "SYSTEM v2.1",        font=font_status, fill=self.clr_text_dim)
+        img[mag_y1:mag_y2, mag_x1:mag_x2] = cv2.resize(
+            roi, (mag_size, mag_size), interpolation=cv2.INTER_NEAREST)
+
+        cx_m = mag_x1 + mag_size // 2
+        cy_m = mag_y1 + mag_size // 2
+        cv2.line(img, (cx_m, mag_y1), (cx_m, mag_y2), (0, 255, 0), 1)
+        cv2.line(img, (mag_x1, cy_m), (mag_x2, cy_m), (0, 255, 0), 1)
+
+    def draw_ui(self, display_img, full=True):
+        """우측 패널 갱신. 상태가 바뀐 요소만 다시 그리고 변경 영역만 복사"""
+        if self.panel is None or self.panel.h != self.view_h:
+            self._init_panel()
+        ox = self.view_w
+
+        # 카메라·레이어 목록이 열리거나 닫히면 아래 요소까지 전부 다시 그림
+        popup = 'camera' if self.camera_list_visible else ('layer' if self.layer_list_visible else None)
+        if popup != self._panel_camlist:
+            self._panel_camlist = popup
+            self.panel.invalidate()
+        list_x1, list_y1 = 12, 68
+        if popup == 'layer':
+            list_y2 = self._layer_list_bounds(self.LAYER_LIST_ROWS)[3] + 1
+        else:
+            list_y2 = self._camera_list_bounds(5)[3] + 1
 
         # 현재 배율을 상단에 더 크게 표시해 드래그 중에도 실시간 변화가 보이도록 함
         zoom_value = self.scale
         zoom_delta = zoom_value - 1.0
-        zoom_label = f"배율: {zoom_value:.2f}x"
-        zoom_change = f"변화: {zoom_delta:+.2f}x"
-        draw.text((self.view_w + 18, 50), zoom_label, font=font_title, fill=(255, 214, 0))
-        draw.text((self.view_w + 160, 52), zoom_change, font=font_status, fill=(120, 220, 255))
-
-        for title, y_pos in self.section_headers.items():
-            draw.text((self.view_w + 20, y_pos + 2), title, font=font_section, fill=self.clr_text_dim)
-
+        self._panel_text('zoom', [
+            ((18, 50), f"배율: {zoom_value:.2f}x", self.font_title, (255, 214, 0)),
+            ((160, 52), f"변화: {zoom_delta:+.2f}x", self.font_status, (120, 220, 255)),
+        ])
+
+        if self.grabber is not None:
+            g = self.grabber
+            cam_stat = (f"CAM {g.capture_fps:.1f}fps  UI {self.ui_fps:.1f}fps  "
+                        f"드롭 {g.frames_dropped}  지연 {g.read_ms:.0f}/{g.age_ms:.0f}ms")
+            self._panel_text('cam_stat', [((100, 32), cam_stat, self.font_status, self.clr_text_dim)])
+
+        # 버튼 (카메라 목록에 가려진 버튼은 건너뜀)
         for mode, (x1, y1, x2, y2) in self.buttons.items():
-            is_active  = (mode == self.current_mode)
-            is_hovered = (mode == self.hovered_button)
-            is_pressed = (mode == self.pressed_button)
-            if is_pressed or is_active or is_hovered:
-                txt_fill = (241, 241, 241)
+            rect = (x1 - ox, y1, x2 - ox + 1, y2 + 1)
+            if popup and y1 <= list_y2 and y2 >= list_y1:
+                continue
+            if mode == self.pressed_button:
+                state = 'pressed'
+            elif mode == self.current_mode or self._button_on(mode):
+                state = 'active'
+            elif mode == self.hovered_button:
+                state = 'hovered'
             else:
-                txt_fill = (200, 200, 200)
-            label = self.btn_labels.get(mode, mode)
-            draw.text((x1 + 8, y1 + 8), label, font=font_btn, fill=txt_fill)
+                state = ''
+            self.panel.element(('btn', mode), rect, (state, self.btn_labels.get(mode)),
+                               lambda img, m=mode, r=rect, st=state: self._draw_button(img, m, r, st))
+
+        # 확대경
+        self.timer.lap('ui')
+        mag_x1, mag_y1, mag_x2, mag_y2 = self._magnifier_rect()
+        mag_rect = (mag_x1 - ox, mag_y1, mag_x2 - ox, mag_y2)
+        if (self.curr_mx < self.view_w and
+                self.cam_y_offset <= self.curr_my < self.cam_y_offset + self.cam_display_h and
+                self.last_full_canvas is not None):
+            self.panel.element('magnifier', mag_rect, self.frame_count,
+                               lambda img: self._draw_magnifier(img, mag_rect))
+        else:
+            self.panel.element('magnifier', mag_rect, None, lambda img: None)
+        self.timer.lap('magnifier')
 
         # ── 상태 텍스트 ───────────────────────────
         status_texts = [
             f"모드: {self.btn_labels.get(self.current_mode, self.current_mode)}",
             f"배율: {self.scale:.2f}x",
-            f"변화: {self.scale - 1.0:+.2f}x",
+            f"캘리브: {self.calib_note}",
             f"회전: {self.angle:.1f}°",
             f"측정: {len(self.measurements)}개",
             f"십자선: {len(self.crosshairs)}개",
             f"십자선크기: {self.cross_size:.2f}x",
-            f"카메라: {self.current_cam_idx}",
+            f"카메라: {self._source_label()}",
             f"상태: {'정지' if self.is_frozen else '라이브'}",
             f"저울: {self.scale_error[:24] if self.scale_error else ('연결' if self.scale_connected else '시뮬레이션')}",
-            f"도형: {len(self.dxf_contours)}개",
-            f"저장: {len(self.weight_log)}건",
+            f"도형: {len(self.dxf_contours)}개" if self.dxf_progress is None
+            else f"도형: 로딩 {self.dxf_progress[1] * 100:.0f}%",
+            f"저장: {self.weight_saved}건 / 사진 {self.image_saver.saved}"
+            + (f" +{self.image_saver.pending}" if self.image_saver.pending else "")
+            + (" (오류)" if self.logger.error or self.image_saver.error else ""),
         ]
         y_pos = mag_y2 + 15
         for i, text in enumerate(status_texts):
-            col = self.view_w + 20 if i % 2 == 0 else self.view_w + 180
-            draw.text((col, y_pos), text, font=font_status, fill=self.clr_text_dim)
+            col = 20 if i % 2 == 0 else 180
+            self._panel_text(('status', i), [((col, y_pos), text, self.font_status, self.clr_text_dim)])
             if i % 2 == 1:
                 y_pos += 16
 
         if self.camera_list_visible:
-            self._draw_camera_list(display_img, draw, font_section, font_status)
-
-        return np.array(img_pil)
+            hovered = self._camera_list_hovered()
+            key = (tuple(self.camera_names), self.current_cam_idx, hovered)
+            self.panel.element('camera_list', (list_x1, list_y1, self.ui_w - 11, list_y2), key,
+                               lambda img: self._draw_camera_list(img, hovered))
+        elif self.layer_list_visible:
+            hovered = self._layer_list_hit(self.curr_mx, self.curr_my)
+            key = (tuple(self.dxf_layers), frozenset(self.hidden_layers),
+                   self.layer_list_scroll, hovered)
+            self.panel.element('layer_list', (list_x1, list_y1, self.ui_w - 11, list_y2), key,
+                               lambda img: self._draw_layer_list(img, hovered))
+
+        self.panel.blit(display_img, full)
+        return display_img
 
     def _select_last_crosshair(self):
         """마지막 십자선을 선택 대상으로 고정"""
@@ -869,25 +4531,7 @@ class VisionInspector:
         V_ARM = 2.5 * self.scale * self.cross_size   # 수직 반길이 (px)
 
         def _draw_one(img, cx, cy, angle_deg, color, label=None):
-            rad = np.radians(angle_deg)
-            hx, hy = np.cos(rad), np.sin(rad)    # 수평축 단위벡터
-            vx, vy = -np.sin(rad), np.cos(rad)   # 수직축 단위벡터
-            # 수평선 (13mm)
-            cv2.line(img,
-                     (int(cx - hx * H_ARM), int(cy - hy * H_ARM)),
-                     (int(cx + hx * H_ARM), int(cy + hy * H_ARM)),
-                     color, 1)
-            # 수직선 (5mm)
-            cv2.line(img,
-                     (int(cx - vx * V_ARM), int(cy - vy * V_ARM)),
-                     (int(cx + vx * V_ARM), int(cy + vy * V_ARM)),
-                     color, 1)
-            # 중심점
-            cv2.circle(img, (int(cx), int(cy)), 2, color, -1)
-            if label is not None:
-                cv2.putText(img, label,
-                            (int(cx + hx * H_ARM) + 4, int(cy + hy * H_ARM) - 4),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
+            draw_cross_mark(img, cx, cy, angle_deg, H_ARM, V_ARM, color, label)
 
         cross_clr = self.color_palette[self.idx_cross_color]
         # 미리보기용 어두운 색
@@ -914,9 +4558,12 @@ class VisionInspector:
         return canvas
 
     def draw_weight_overlay(self, canvas):
-        """카메라 영상 우하단에 무게값 오버레이 (저장 이미지에도 포함됨)"""
-        with self.scale_lock:
-            w_val = self.scale_weight
+        """카메라 영상 우하단에 무게값 오버레이 (저장 이미지에도 포함됨)
+
+        박스 영역만 블렌딩하고, 글자 층은 표시 내용이 바뀔 때만 다시 만든다.
+        """
+        w_val = self.scale_weight
+        unstable = self.scale_stable is False or self.stabilizer.state == 'moving'
 
         weight_str = f"{w_val:.2f} g" if w_val is not None else "-- g"
 
@@ -933,36 +4580,37 @@ class VisionInspector:
         # 박스 크기·위치 (카메라 원본 해상도 기준)
         box_w, box_h = 220, 70
         margin = 20
-        bx1 = canvas.shape[1] - box_w - margin
-        by1 = canvas.shape[0] - box_h - margin
+        bx1 = max(0, canvas.shape[1] - box_w - margin)
+        by1 = max(0, canvas.shape[0] - box_h - margin)
         bx2 = bx1 + box_w
         by2 = by1 + box_h
 
-        # 반투명 배경 (알파 블렌딩)
-        overlay = canvas.copy()
-        cv2.rectangle(overlay, (bx1, by1), (bx2, by2), (20, 20, 20), -1)
-        cv2.addWeighted(overlay, 0.65, canvas, 0.35, 0, canvas)
+        # 반투명 배경: 박스 영역만 (20,20,20)*0.65 + 원본*0.35
+        roi = canvas[by1:by2 + 1, bx1:bx2 + 1]
+        cv2.addWeighted(roi, 0.35, roi, 0.0, 20 * 0.65, dst=roi)
 
         # 테두리
         b = border_rgb
         cv2.rectangle(canvas, (bx1, by1), (bx2, by2), (b[2], b[1], b[0]), 2)
 
-        # PIL로 한글 텍스트
-        img_pil = Image.fromarray(canvas)
-        draw = ImageDraw.Draw(img_pil)
-        try:
-            font_large = ImageFont.truetype("malgunbd.ttf", 26)
-            font_small = ImageFont.truetype("malgun.ttf",   11)
-        except Exception:
-            font_large = font_small = ImageFont.load_default()
-
-        draw.text((bx1 + 10, by1 + 6),  "정밀저울",  font=font_small, fill=(180, 180, 180))
-        draw.text((bx2 - 40, by1 + 6),  tag,         font=font_small, fill=border_rgb)
-        draw.text((bx1 + 10, by1 + 24), weight_str,  font=font_large, fill=(255, 220, 60))
-        draw.text((bx1 + 10, by1 + 54), f"저장 {len(self.weight_log)}건",
-                  font=font_small, fill=(140, 140, 140))
-
-        canvas[:] = np.array(img_pil)
+        # 글자 층 (무게·출처·저장 건수가 바뀔 때만 다시 렌더링)
+        key = (weight_str, tag, border_rgb, unstable, self.weight_saved, self.auto_save)
+        if self._weight_layer is None or self._weight_layer[0] != key:
+            inv = np.ones((box_h + 1, box_w + 1, 1), dtype=np.float32)
+            pre = np.zeros((box_h + 1, box_w + 1, 3), dtype=np.float32)
+            g = self.glyphs
+            g.draw_layer(inv, pre, (10, 6), "정밀저울", self.font_weight_small, (180, 180, 180))
+            g.draw_layer(inv, pre, (box_w - 40, 6), tag, self.font_weight_small, border_rgb)
+            # 불안정(변동 중) 표시가 오면 흐리게
+            g.draw_layer(inv, pre, (10, 24), weight_str, self.font_weight_large,
+                         (150, 140, 110) if unstable else (255, 220, 60))
+            saved = f"저장 {self.weight_saved}건" + ("  자동" if self.auto_save else "")
+            g.draw_layer(inv, pre, (10, 54), saved, self.font_weight_small, (140, 140, 140))
+            self._weight_layer = (key, inv, pre)
+
+        _, inv, pre = self._weight_layer
+        h, w = roi.shape[:2]
+        roi[:] = roi * inv[:h, :w] + pre[:h, :w]
         return canvas
 
     # ──────────────────────────────────────────────
@@ -986,6 +4634,19 @@ class VisionInspector:
                         self.camera_list_visible = False
                         self._start_camera_switch(idx)
                         return
+            if self.layer_list_visible:
+                row = self._layer_list_hit(x, y)
+                if row == self.LAYER_LIST_ROWS:
+                    self.layer_list_visible = False
+                    return
+                if row is not None:
+                    i = self.layer_list_scroll + row
+                    if i < len(self.dxf_layers):
+                        self.toggle_layer(self.dxf_layers[i])
+                    return
+                # 목록 영역 안의 빈 곳은 아래에 가려진 버튼으로 넘기지 않음
+                if 68 <= y <= self._layer_list_bounds(self.LAYER_LIST_ROWS)[3]:
+                    return
             for m, (bx1, by1, bx2, by2) in self.buttons.items():
                 if bx1 <= x <= bx2 and by1 <= y <= by2:
                     self.pressed_button = m
@@ -1003,6 +4664,11 @@ class VisionInspector:
         rx = x * x_ratio
         ry = (y - self.cam_y_offset) * y_ratio
 
+        # 측정점은 가까운 에지에 서브픽셀로 붙임 (Ctrl 을 누르고 찍으면 마우스 위치 그대로)
+        if (event == cv2.EVENT_LBUTTONDOWN and x <= self.view_w and 'MEAS' in self.current_mode
+                and self.measure_p2 is None and not flags & cv2.EVENT_FLAG_CTRLKEY):
+            rx, ry = self._snap_point(rx, ry, x_ratio)
+
         if flags & cv2.EVENT_FLAG_SHIFTKEY:
             if self.measure_p1:
                 if abs(rx - self.measure_p1[0]) > abs(ry - self.measure_p1[1]):
@@ -1017,6 +4683,9 @@ class VisionInspector:
 
         if event == cv2.EVENT_MOUSEWHEEL:
             step = 1.0 if (flags > 0) else -1.0
+            if self.layer_list_visible and x > self.view_w:
+                self._scroll_layer_list(-int(step))
+                return
             if self.current_mode == 'CROSS':
                 if flags & cv2.EVENT_FLAG_SHIFTKEY:
                     self.cross_angle = (self.cross_angle + step * 0.1) % 360
@@ -1065,10 +4734,7 @@ class VisionInspector:
                 elif self.measure_p2 is None:
                     self.measure_p2 = (rx, ry)
                     p1, p2 = np.array(self.measure_p1), np.array(self.measure_p2)
-                    if self.current_mode == 'MEAS_P2P':
-                        self.measure_temp_val = np.linalg.norm(p1 - p2)
-                    else:
-                        self.measure_temp_val = max(abs(p1[0] - p2[0]), abs(p1[1] - p2[1]))
+                    self.measure_temp_val = self._frame_length(p1, p2, self.current_mode)
                 else:
                     self.measurements.append((
                         self.measure_p1, self.measure_p2,
@@ -1138,7 +4804,7 @@ class VisionInspector:
 
         if event == cv2.EVENT_LBUTTONUP:
             if self.is_dragging and self.current_mode == 'CALIB' and self.calib_p1:
-                dist_px = np.linalg.norm(np.array(self.calib_p1) - np.array([rx, ry]))
+                dist_px = self._frame_length(self.calib_p1, (rx, ry))
                 if dist_px > 10:
                     root = tk.Tk()
                     root.withdraw()
@@ -1146,7 +4812,7 @@ class VisionInspector:
                     val = simpledialog.askfloat("캘리브레이션", "실제 길이(mm)를 입력하세요:", parent=root)
                     root.destroy()
                     if val:
-                        self.scale = dist_px / val
+                        self.add_calibration_reference(dist_px, val)
                         self.calib_temp_data = (self.calib_p1, (rx, ry), val)
             self.is_dragging = False
             if self.current_mode not in ['PAN', 'ZOOM', 'ROTATE']:
@@ -1154,6 +4820,14 @@ class VisionInspector:
                 self.cross_selected_idx = None
             self.calib_p1 = self.calib_p2 = None
 
+    def _snap_point(self, rx, ry, ratio):
+        """화면에 보이는 원본 프레임에서 (rx, ry) 근처 에지로 스냅, 에지가 없으면 그대로"""
+        frame = self.last_frame
+        if frame is None:
+            return rx, ry
+        snapped = snap_to_edge(frame, rx, ry, max(2.0, SNAP_RADIUS * ratio))
+        return snapped if snapped is not None else (rx, ry)
+
     def _handle_button(self, m):
         """버튼 클릭 처리 분리"""
         if m == 'FREEZE_LIVE':
@@ -1161,8 +4835,10 @@ class VisionInspector:
                 self.loaded_frame = None
                 self.is_frozen = False
             elif not self.is_frozen:
-                ret, frame = self.cap.read()
-                if ret:
+                frame = self.raw_frame
+                if frame is None and self.grabber is not None:
+                    frame, _ = self.grabber.latest()
+                if frame is not None:
                     self.frozen_frame = frame.copy()
                     self.is_frozen = True
             else:
@@ -1174,12 +4850,34 @@ class VisionInspector:
         elif m == 'LOAD_IMAGE':
             self.load_image_action()
 
+        elif m == 'LAYERS':
+            if not self.dxf_layers:
+                messagebox.showinfo("레이어", "도면을 먼저 불러오세요.")
+            else:
+                self.layer_list_visible = not self.layer_list_visible
+                self.camera_list_visible = False
+
+        elif m == 'AUTO_FIT':
+            self.auto_fit_action()
+
+        elif m == 'INSPECT':
+            self.toggle_inspection()
+
         elif m == 'DXF_COLOR':
             self.idx_dxf_color = (self.idx_dxf_color + 1) % len(self.color_palette)
 
         elif m == 'MEAS_COLOR':
             self.idx_meas_color = (self.idx_meas_color + 1) % len(self.color_palette)
 
+        elif m == 'LENS_CALIB':
+            self.lens_calib_action()
+
+        elif m == 'UNDISTORT':
+            self.cycle_undistort()
+
+        elif m == 'CALIB_RESET':
+            self.reset_calibration()
+
         elif m == 'CALIB_COLOR':
             self.idx_calib_color = (self.idx_calib_color + 1) % len(self.color_palette)
 
@@ -1200,26 +4898,16 @@ class VisionInspector:
                 self.measurements.pop()
 
         elif m == 'SAVE_IMG':
-            if self.last_full_canvas is not None:
-                root = tk.Tk()
-                root.withdraw()
-                root.attributes("-topmost", True)
-                path = filedialog.asksaveasfilename(
-                    defaultextension=".jpg",
-                    initialfile=f'검사결과_{datetime.now().strftime("%Y%m%d_%H%M%S")}.jpg',
-                    parent=root
-                )
-                if path:
-                    try:
-                        res, buffer = cv2.imencode('.jpg', self.last_full_canvas,
-                                                   [int(cv2.IMWRITE_JPEG_QUALITY), 95])
-                        if res:
-                            with open(path, "wb") as f:
-                                f.write(buffer.tobytes())
-                            messagebox.showinfo("저장 완료", "이미지가 성공적으로 저장되었습니다.", parent=root)
-                    except Exception as ex:
-                        messagebox.showerror("저장 실패", f"저장 오류:\n{ex}", parent=root)
-                root.destroy()
+            self.save_image_action()
+
+        elif m == 'IMG_FMT':
+            self.cycle_image_format()
+
+        elif m == 'BURST':
+            self.start_burst()
+
+        elif m == 'TEMPLATE':
+            self.save_template_action()
 
         elif m == 'LOAD_DXF':
             root = tk.Tk()
@@ -1273,6 +4961,9 @@ class VisionInspector:
         elif m == 'SCALE_SAVE':
             self.save_weight()
 
+        elif m == 'AUTO_SAVE':
+            self.toggle_auto_save()
+
         elif m == 'ZOOM_IN':
             self.current_mode = 'ZOOM'
             self._apply_crosshair_zoom(0.8)
@@ -1300,138 +4991,230 @@ class VisionInspector:
         cv2.namedWindow('Vision Inspector', cv2.WINDOW_AUTOSIZE)
         cv2.setMouseCallback('Vision Inspector', self.mouse_callback)
 
+        last_seq = 0
+        last_loop_t = time.perf_counter()
         while self.is_running:
             if cv2.getWindowProperty('Vision Inspector', cv2.WND_PROP_VISIBLE) < 1:
                 break
 
             self._apply_pending_camera()
+            self._apply_pending_dxf()
+            self._apply_pending_fit()
+            self._apply_pending_lens()
+            self._apply_pending_capture()
+            self._check_writers()
 
-            if self.cap is None:
+            if self.cap is None or self.grabber is None:
                 cv2.waitKey(1)
                 continue
 
             if self.loaded_frame is not None:
-                frame = self.loaded_frame.copy()
+                frame = self.loaded_frame
             elif self.is_frozen:
-                frame = self.frozen_frame.copy()
+                frame = self.frozen_frame
             else:
-                ret, frame = self.cap.read()
-                if not ret:
+                # 카메라 읽기는 캡처 스레드가 담당, 여기서는 최신 프레임만 받음
+                self.grabber.wait(last_seq)
+                frame, last_seq = self.grabber.latest()
+                if frame is None:
+                    cv2.waitKey(1)
                     continue
 
-            canvas = frame.copy()
-
-            rad = np.radians(self.angle)
-            rot_m = np.array([
-                [ np.cos(rad), -np.sin(rad)],
-                [ np.sin(rad),  np.cos(rad)]
-            ])
-
-            dxf_clr   = self.color_palette[self.idx_dxf_color]
-            meas_clr  = self.color_palette[self.idx_meas_color]
-            calib_clr = self.color_palette[self.idx_calib_color]
-
-            # ── DXF 렌더링 ──────────────────────
-            cx = canvas.shape[1] // 2 + self.offset_x
-            cy = canvas.shape[0] // 2 + self.offset_y
-
-            for ctype, pts in self.dxf_contours:
-                pts_draw = (
-                    (pts @ rot_m.T) * self.scale + [cx, cy]
-                ).astype(np.int32).reshape(-1, 1, 2)
-                closed = (ctype == 'poly')
-                cv2.polylines(canvas, [pts_draw], closed, dxf_clr, 1)
-
-            # ── 캘리브 고정선 ─────────────────────
-            if self.fixed_calib_line:
-                p1, p2, val, pt = self.fixed_calib_line
-                cv2.line(canvas, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])), calib_clr, 1)
-                cv2.putText(canvas, f"REF: {val:.1f}mm", (int(pt[0]), int(pt[1])),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, calib_clr, 1)
-
-            # ── 측정선 ────────────────────────────
-            for m1, m2, val, m_type, pt in self.measurements:
-                p1 = (int(m1[0]), int(m1[1]))
-                p2 = (int(m2[0]), int(m2[1]))
-                if m_type == 'MEAS_HV':
-                    if abs(p1[0] - p2[0]) > abs(p1[1] - p2[1]):
-                        cv2.line(canvas, p1, (p2[0], p1[1]), meas_clr, 1)
-                        p2 = (p2[0], p1[1])
-                    else:
-                        cv2.line(canvas, p1, (p1[0], p2[1]), meas_clr, 1)
-                        p2 = (p1[0], p2[1])
-                else:
-                    cv2.line(canvas, p1, p2, meas_clr, 1)
-                cv2.putText(canvas, f"{val:.3f}mm", (int(pt[0]), int(pt[1])),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, meas_clr, 1)
-
-            x_ratio, y_ratio = self._get_frame_ratios(frame)
-
-            # ── 드래그 마커 ───────────────────────
-            if self.is_dragging and self.current_mode in ['PAN', 'ZOOM', 'ROTATE']:
-                mx = int(self.curr_mx * x_ratio)
-                my = int((self.curr_my - self.cam_y_offset) * y_ratio)
-                cv2.drawMarker(canvas, (mx, my), (0, 255, 255),
-                               markerType=cv2.MARKER_CROSS, markerSize=25, thickness=1)
-
-            # ── 측정 임시 표시 ────────────────────
-            if self.measure_p1 and not self.measure_p2:
-                p1 = (int(self.measure_p1[0]), int(self.measure_p1[1]))
-                p2 = (int(self.curr_mx * x_ratio), int((self.curr_my - self.cam_y_offset) * y_ratio))
-                if self.current_mode == 'MEAS_HV':
-                    if abs(p2[0] - p1[0]) > abs(p2[1] - p1[1]):
-                        p2 = (p2[0], p1[1])
-                    else:
-                        p2 = (p1[0], p2[1])
-                cv2.line(canvas, p1, p2, meas_clr, 1)
-                cv2.circle(canvas, p1, 5, meas_clr, 1)
-                cv2.circle(canvas, p2, 3, meas_clr, 1)
-                preview_len = np.linalg.norm(np.array(p1) - np.array(p2)) / self.scale
-                cv2.putText(canvas, f"{preview_len:.3f}mm",
-                            (max(10, p2[0]), max(10, p2[1])),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, meas_clr, 1)
-            elif self.measure_p2:
-                cx = int(self.curr_mx * x_ratio)
-                cy = int((self.curr_my - self.cam_y_offset) * y_ratio)
-                cv2.putText(canvas, f"{self.measure_temp_val / self.scale:.3f}mm",
-                            (cx, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.5, meas_clr, 1)
-            elif self.measure_p1:
-                cv2.circle(canvas, (int(self.measure_p1[0]), int(self.measure_p1[1])), 5, meas_clr, 1)
-
-            # ── 캘리브 임시 표시 ──────────────────
-            if self.calib_temp_data:
-                cx = int(self.curr_mx * x_ratio)
-                cy = int((self.curr_my - self.cam_y_offset) * y_ratio)
-                cv2.putText(canvas, f"REF: {self.calib_temp_data[2]:.1f}mm",
-                            (cx, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.5, calib_clr, 1)
-            elif self.calib_p1 and self.calib_p2:
-                cv2.line(canvas,
-                         (int(self.calib_p1[0]), int(self.calib_p1[1])),
-                         (int(self.calib_p2[0]), int(self.calib_p2[1])),
-                         calib_clr, 1)
-
-            # ── 십자선 오버레이 ────────────────────
-            canvas = self.draw_crosshair(canvas)
-
-            # ── 무게 오버레이 (저장 이미지에도 포함) ──
-            canvas = self.draw_weight_overlay(canvas)
-
-            # ── 화면 출력 ─────────────────────────
-            self.last_full_canvas = canvas.copy()
-            res_view = cv2.resize(canvas, (self.view_w, self.cam_display_h))
-            display_img = np.zeros((self.view_h, self.total_w, 3), dtype=np.uint8)
-            display_img[self.cam_y_offset:self.cam_y_offset + self.cam_display_h, :self.view_w] = res_view
-            display_img = self.draw_ui(display_img)
+            now = time.perf_counter()
+            if now > last_loop_t:
+                self.ui_fps = self.ui_fps * 0.9 + (1.0 / (now - last_loop_t)) * 0.1
+            last_loop_t = now
+
+            display_img = self.render_frame(frame)
 
             cv2.imshow('Vision Inspector', display_img)
             if cv2.waitKey(1) == ord('q'):
                 break
 
-        self.cap.release()
+        self._stop_grabber()
+        if self.cap is not None:
+            self.cap.release()
+        self._stop_scale_source()
+        self.logger.close()
+        self._finish_saves()
         cv2.destroyAllWindows()
         sys.exit()
 
+    def render_frame(self, frame):
+        """원본 프레임 하나를 오버레이·패널까지 합성한 화면 이미지로 만듦"""
+        timer = self.timer
+        timer.start()
+        self.raw_frame = frame
+        if self._lens_active(frame, 'remap'):
+            frame = self.lens.undistort(frame, dst=self.buffers.undistorted_for(frame))
+            timer.lap('undistort')
+        self.last_frame = frame
+        self.frame_count += 1
+
+        canvas = self.buffers.canvas_for(frame)
+        timer.lap('canvas')
+
+        dxf_clr   = self.color_palette[self.idx_dxf_color]
+        meas_clr  = self.color_palette[self.idx_meas_color]
+        calib_clr = self.color_palette[self.idx_calib_color]
+
+        # ── DXF 렌더링 (뷰가 바뀔 때만 재래스터화) ──
+        self.dxf_overlay.render(canvas, self.scale, self.angle,
+                                self.offset_x, self.offset_y, dxf_clr)
+        timer.lap('dxf')
+
+        # ── 편차 검사 (원본 프레임 에지 기준) ──
+        if self.inspect_enabled:
+            self.inspect_result = self.deviation.measure(
+                frame, self.scale, self.angle, self.offset_x, self.offset_y, self.inspect_tol_mm)
+            if self.inspect_result is not None:
+                self.deviation.draw(canvas, self.inspect_result)
+            timer.lap('inspect')
+
+        # ── 캘리브 고정선 ─────────────────────
+        if self.fixed_calib_line:
+            p1, p2, val, pt = self.fixed_calib_line
+            cv2.line(canvas, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])), calib_clr, 1)
+            cv2.putText(canvas, f"REF: {val:.1f}mm", (int(pt[0]), int(pt[1])),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, calib_clr, 1)
+
+        # ── 측정선 ────────────────────────────
+        draw_measurements(canvas, self.measurements, meas_clr)
+
+        x_ratio, y_ratio = self._get_frame_ratios(frame)
+
+        # ── 드래그 마커 ───────────────────────
+        if self.is_dragging and self.current_mode in ['PAN', 'ZOOM', 'ROTATE']:
+            mx = int(self.curr_mx * x_ratio)
+            my = int((self.curr_my - self.cam_y_offset) * y_ratio)
+            cv2.drawMarker(canvas, (mx, my), (0, 255, 255),
+                           markerType=cv2.MARKER_CROSS, markerSize=25, thickness=1)
+
+        # ── 측정 임시 표시 ────────────────────
+        if self.measure_p1 and not self.measure_p2:
+            p1 = (int(self.measure_p1[0]), int(self.measure_p1[1]))
+            p2 = (int(self.curr_mx * x_ratio), int((self.curr_my - self.cam_y_offset) * y_ratio))
+            if self.current_mode == 'MEAS_HV':
+                if abs(p2[0] - p1[0]) > abs(p2[1] - p1[1]):
+                    p2 = (p2[0], p1[1])
+                else:
+                    p2 = (p1[0], p2[1])
+            cv2.line(canvas, p1, p2, meas_clr, 1)
+            cv2.circle(canvas, p1, 5, meas_clr, 1)
+            cv2.circle(canvas, p2, 3, meas_clr, 1)
+            preview_len = self._frame_length(p1, p2) / self.scale
+            cv2.putText(canvas, f"{preview_len:.3f}mm",
+                        (max(10, p2[0]), max(10, p2[1])),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, meas_clr, 1)
+        elif self.measure_p2:
+            cx = int(self.curr_mx * x_ratio)
+            cy = int((self.curr_my - self.cam_y_offset) * y_ratio)
+            cv2.putText(canvas, f"{self.measure_temp_val / self.scale:.3f}mm",
+                        (cx, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.5, meas_clr, 1)
+        elif self.measure_p1:
+            cv2.circle(canvas, (int(self.measure_p1[0]), int(self.measure_p1[1])), 5, meas_clr, 1)
+
+        # ── 캘리브 임시 표시 ──────────────────
+        if self.calib_temp_data:
+            cx = int(self.curr_mx * x_ratio)
+            cy = int((self.curr_my - self.cam_y_offset) * y_ratio)
+            cv2.putText(canvas, f"REF: {self.calib_temp_data[2]:.1f}mm",
+                        (cx, cy), cv2.FONT_HERSHEY_SIMPLEX, 0.5, calib_clr, 1)
+        elif self.calib_p1 and self.calib_p2:
+            cv2.line(canvas,
+                     (int(self.calib_p1[0]), int(self.calib_p1[1])),
+                     (int(self.calib_p2[0]), int(self.calib_p2[1])),
+                     calib_clr, 1)
+        timer.lap('measure')
+
+        # ── 십자선 오버레이 ────────────────────
+        canvas = self.draw_crosshair(canvas)
+        timer.lap('crosshair')
+
+        # ── 무게 오버레이 (저장 이미지에도 포함) ──
+        canvas = self.draw_weight_overlay(canvas)
+        timer.lap('weight')
+
+        # ── 화면 출력 ─────────────────────────
+        self.last_full_canvas = self.buffers.swap()
+        display_img = self.buffers.display
+        view = display_img[self.cam_y_offset:self.cam_y_offset + self.cam_display_h, :self.view_w]
+        cv2.resize(canvas, (self.view_w, self.cam_display_h), dst=view)
+        self._draw_dxf_progress(display_img)
+        self._draw_notice(display_img)
+        timer.lap('resize')
+        display_img = self.draw_ui(display_img, full=self.buffers.take_fresh())
+        timer.lap('ui')
+
+        timer.end()
+        return display_img
+
 
 if __name__ == "__main__":
-    inspector = VisionInspector()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vision Inspector")
+    parser.add_argument('--source',
+                        help="카메라 대신 사용할 영상: 동영상 파일, 이미지 폴더, camera:N, synthetic[:WxH]")
+    parser.add_argument('--fps', type=float, default=None,
+                        help="재생 FPS (기본: 동영상은 파일 FPS, 폴더·합성은 30, 0 이면 최대 속도)")
+    parser.add_argument('--dxf', default="", help="시작할 때 불러올 DXF 도면")
+    parser.add_argument('--batch', metavar='TEMPLATE',
+                        help="검사 템플릿을 이미지 폴더 전체에 적용 (창 없이 실행)")
+    parser.add_argument('--input', help="--batch: 이미지 폴더")
+    parser.add_argument('--out', help="--batch: 결과 폴더 (results.csv + 주석 이미지)")
+    parser.add_argument('--workers', type=int, default=None, help="--batch: 작업자 프로세스 수 (기본: CPU 수)")
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv', help="--batch: 결과 표 형식")
+    parser.add_argument('--no-align', action='store_true', help="--batch: 도면 재정합 없이 템플릿 위치 그대로 측정")
+    parser.add_argument('--export-log', metavar='OUT',
+                        help="측정 기록을 표로 내보내기 (.csv / .parquet, 창 없이 실행)")
+    parser.add_argument('--since', help="--export-log: 시작 (YYYY-MM-DD[THH:MM], 기본 오늘 0시)")
+    parser.add_argument('--until', help="--export-log: 끝 (기본 지금)")
+    parser.add_argument('--image-format', choices=list(IMAGE_FORMATS), default='jpg',
+                        help="이미지 저장 형식 (webp 는 무손실)")
+    parser.add_argument('--image-dir', default=SAVE_DIR, help="이미지 저장 폴더")
+    parser.add_argument('--image-name', default=SAVE_PATTERN,
+                        help="저장 이름 규칙 ({prefix}, {time:%%Y%%m%%d_%%H%%M%%S}, {seq:04d})")
+    parser.add_argument('--scale', metavar='PORT', help="시작할 때 연결할 저울 시리얼 포트 (예: COM3, /dev/pts/3)")
+    parser.add_argument('--scale-baud', type=int, default=9600, help="--scale: 통신 속도")
+    args, _ = parser.parse_known_args()
+
+    if args.batch:
+        if not args.input or not args.out:
+            parser.error("--batch 에는 --input 과 --out 이 필요합니다")
+        try:
+            run_batch(args.batch, args.input, args.out, workers=args.workers,
+                      fmt=args.format, realign=not args.no_align)
+        except (ValueError, ImportError) as ex:
+            print(f"일괄 측정 실패: {ex}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(0)
+
+    if args.export_log:
+        try:
+            since = datetime.fromisoformat(args.since) if args.since else datetime.combine(
+                datetime.now().date(), datetime.min.time())
+            until = datetime.fromisoformat(args.until) if args.until else datetime.now()
+            count = export_log(args.export_log, since, until)
+        except (ValueError, ImportError, OSError, sqlite3.Error) as ex:
+            print(f"기록 내보내기 실패: {ex}", file=sys.stderr)
+            sys.exit(1)
+        print(f"{count}건 ({since} ~ {until}) → {args.export_log}")
+        sys.exit(0)
+
+    source = None
+    if args.source:
+        try:
+            source = open_frame_source(args.source, args.fps)
+        except ValueError as ex:
+            messagebox.showerror("영상 소스 오류", str(ex))
+            sys.exit(1)
+
+    try:
+        saver = ImageSaver(args.image_dir, args.image_format, args.image_name)
+    except ValueError as ex:
+        parser.error(str(ex))
+    inspector = VisionInspector(args.dxf, source=source, image_saver=saver)
+    if args.scale:
+        inspector.connect_scale(args.scale, args.scale_baud)
     inspector.run()
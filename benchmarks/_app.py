@@ -0,0 +1,18 @@
+"""벤치마크에서 'Vison Camera.py' 를 모듈로 불러오기 위한 도우미"""
+import importlib.util
+import os
+import sys
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "Vison Camera.py")
+
+
+def load_app():
+    """메인 스크립트를 'vision_app' 모듈로 불러옴 (한 번만 실행)"""
+    module = sys.modules.get("vision_app")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("vision_app", APP_PATH)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["vision_app"] = module
+        spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,108 @@
+"""DXF 자동 정합(register_dxf) 벤치마크
+
+합성 부품 도면을 알려진 배율·회전·이동으로 프레임에 그린 뒤,
+어긋난 초기값에서 정합을 돌려 복원 오차와 소요 시간을 출력한다.
+
+    python benchmarks/bench_autofit.py --trials 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app  # noqa: E402
+
+
+def make_part_dxf(path):
+    """모서리 라운드 판재 + 구멍 + 비대칭 홈이 있는 부품 도면"""
+    import ezdxf
+
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    w, h, r = 120.0, 80.0, 8.0
+    msp.add_line((r, 0), (w - r, 0))
+    msp.add_line((w, r), (w, h - r))
+    msp.add_line((w - r, h), (30, h))
+    msp.add_line((30, h), (30, h - 15))
+    msp.add_line((30, h - 15), (15, h - 15))
+    msp.add_line((15, h - 15), (15, h))
+    msp.add_line((15, h), (r, h))
+    msp.add_line((0, h - r), (0, r))
+    msp.add_arc((r, r), r, 180, 270)
+    msp.add_arc((w - r, r), r, 270, 360)
+    msp.add_arc((w - r, h - r), r, 0, 90)
+    msp.add_arc((r, h - r), r, 90, 180)
+    for x, y, rad in ((20, 20, 5), (100, 20, 5), (100, 60, 5), (60, 40, 12), (45, 62, 3)):
+        msp.add_circle((x, y), rad)
+    msp.add_lwpolyline([(70, 10), (90, 10), (90, 16), (70, 16)], close=True)
+    doc.saveas(path)
+
+
+def render_part(app, contours, size, truth, rng):
+    """정답 파라미터로 부품 실루엣(밝은 판재 + 구멍)을 그린 잡음 프레임"""
+    w, h = size
+    scale, angle, ox, oy = truth
+    outline = np.zeros((h + 2, w + 2), dtype=np.uint8)
+    holes = []
+    for ctype, pts in contours:
+        xy = np.rint(app._project(pts, scale, angle, w // 2 + ox, h // 2 + oy)).astype(np.int32)
+        cv2.polylines(outline[1:-1, 1:-1], [xy], ctype == 'poly', 255, 1)
+        if ctype == 'poly':
+            holes.append(xy)
+    # 바깥쪽을 채운 뒤 반전하면 외곽선 안쪽이 부품, 닫힌 윤곽선(구멍)은 다시 비움
+    outside = outline.copy()
+    cv2.floodFill(outside, None, (0, 0), 128)
+    part = (outside[1:-1, 1:-1] != 128).astype(np.uint8)
+    cv2.fillPoly(part, holes, 0)
+    frame = np.where(part[..., None] > 0, 190, 70).astype(np.float64) * np.ones(3)
+    frame += rng.normal(0, 12, frame.shape)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+    return cv2.GaussianBlur(frame, (3, 3), 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DXF 자동 정합 벤치마크")
+    parser.add_argument('--trials', type=int, default=5)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    app = load_app()
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "part.dxf")
+        make_part_dxf(path)
+        geom = app.parse_dxf(path)
+    flip = np.array([1, -1], dtype=np.float32)
+    contours = [(c, (p - geom.center.astype(np.float32)) * flip) for c, p in geom.contours]
+
+    print(f"{'trial':>5}{'time ms':>10}{'d_scale %':>11}{'d_angle':>9}{'d_xy px':>9}"
+          f"{'score':>8}{'inliers':>9}")
+    errors = []
+    for i in range(args.trials):
+        # 부품이 화면 안에 다 들어오는 범위 (실루엣을 채우려면 외곽선이 닫혀 보여야 함)
+        truth = (rng.uniform(3.5, 6.0), rng.uniform(0, 360),
+                 rng.uniform(-200, 200), rng.uniform(-80, 80))
+        frame = render_part(app, contours, (args.width, args.height), truth, rng)
+        # 초기값: 배율 ±15%, 각도 임의, 위치 중앙
+        init_scale = truth[0] * rng.uniform(0.85, 1.15)
+        res = app.register_dxf(frame, contours, init_scale, rng.uniform(0, 360), 0.0, 0.0)
+        d_scale = (res['scale'] / truth[0] - 1) * 100
+        d_angle = (res['angle'] - truth[1] + 180) % 360 - 180
+        d_xy = np.hypot(res['offset_x'] - truth[2], res['offset_y'] - truth[3])
+        errors.append((res['elapsed'], abs(d_scale), abs(d_angle), d_xy))
+        print(f"{i:>5}{res['elapsed'] * 1000:>10.1f}{d_scale:>11.3f}{d_angle:>9.3f}{d_xy:>9.2f}"
+              f"{res['score']:>8.3f}{res['inliers']:>9.2f}")
+
+    e = np.array(errors)
+    print(f"\nmedian {np.median(e[:, 0]) * 1000:.1f} ms, max {e[:, 0].max() * 1000:.1f} ms, "
+          f"|d_scale| {np.median(e[:, 1]):.3f}%, |d_angle| {np.median(e[:, 2]):.3f} deg, "
+          f"|d_xy| {np.median(e[:, 3]):.2f} px (median)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""일괄 측정(run_batch) 벤치마크
+
+합성 부품을 임의 위치·회전으로 찍은 이미지 폴더와 검사 템플릿을 만든 뒤,
+작업자 수별 처리량과 측정 오차(정답 길이 대비)를 출력한다.
+
+    python benchmarks/bench_batch.py --images 32 --workers 1 2 4
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app  # noqa: E402
+from bench_autofit import make_part_dxf, render_part  # noqa: E402
+
+SCALE = 4.5   # px/mm
+# 도면 중심 기준 좌표(mm, Y 아래 +): 판재 전체 폭 120mm, 가운데 구멍 지름 24mm
+MEASURES = [('MEAS_P2P', (-60.0, 0.0), (60.0, 0.0), 120.0),
+            ('MEAS_HV', (0.0, -12.0), (0.0, 12.0), 24.0)]
+
+
+def make_template(app, dxf_path, size):
+    w, h = size
+    to_px = app._pose_affine(SCALE, 0.0, w // 2, h // 2)
+    meas = []
+    for mode, a, b, mm in MEASURES:
+        p1, p2 = app._apply_affine(to_px, a), app._apply_affine(to_px, b)
+        meas.append({'mode': mode, 'p1': list(p1), 'p2': list(p2),
+                     'label': [p2[0] + 8, p2[1] - 8], 'value_mm': mm})
+    return {'version': app.TEMPLATE_VERSION, 'frame_size': [w, h], 'scale': SCALE,
+            'measurements': meas, 'crosshairs': [[w // 2, h // 2, 0.0, 1.0]],
+            'dxf': {'path': dxf_path, 'angle': 0.0, 'offset_x': 0.0, 'offset_y': 0.0,
+                    'hidden_layers': []},
+            'inspect_tol_mm': 0.3}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="일괄 측정 벤치마크")
+    parser.add_argument('--images', type=int, default=16)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    app = load_app()
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dxf_path = os.path.join(tmp, "part.dxf")
+        make_part_dxf(dxf_path)
+        geom = app.load_dxf_geometry(dxf_path)
+        contours, _ = app.dxf_model_contours(geom)
+
+        # 고정 지그에서 부품이 조금씩 밀리고 돌아간 상황
+        img_dir = os.path.join(tmp, "images")
+        os.makedirs(img_dir)
+        expected = {}
+        for i in range(args.images):
+            truth = (SCALE, rng.uniform(-8, 8), rng.uniform(-60, 60), rng.uniform(-40, 40))
+            frame = render_part(app, contours, (args.width, args.height), truth, rng)
+            name = f"part_{i:03d}.png"
+            cv2.imwrite(os.path.join(img_dir, name), frame)
+            # 수평수직 측정은 돌아간 부품에서 축 방향 성분을 재므로 정답도 같은 식으로 계산
+            rot = app._pose_affine(1.0, truth[1], 0.0, 0.0)
+            expected[name] = [app.measure_length(app._apply_affine(rot, a), app._apply_affine(rot, b), mode)
+                              for mode, a, b, _ in MEASURES]
+
+        tpl_path = os.path.join(tmp, "template.json")
+        app._write_json(tpl_path, make_template(app, dxf_path, (args.width, args.height)))
+
+        for workers in args.workers:
+            out_dir = os.path.join(tmp, f"out_{workers}")
+            t0 = time.perf_counter()
+            table = app.run_batch(tpl_path, img_dir, out_dir, workers=workers)
+            elapsed = time.perf_counter() - t0
+            with open(table, encoding='utf-8-sig') as f:
+                rows = list(csv.DictReader(f))
+            ok = sum(r['status'] == 'ok' for r in rows)
+            errs = np.array([[abs(float(r[f'm{i + 1}_mm']) - mm) for i, mm in enumerate(expected[r['file']])]
+                             for r in rows if r['status'] == 'ok'])
+            per_meas = ", ".join(f"m{i + 1} {np.median(e):.3f}/{e.max():.3f}" for i, e in enumerate(errs.T))
+            print(f"\nworkers={workers}: {len(rows) / elapsed:.2f} img/s, ok {ok}/{len(rows)}, "
+                  f"|err| mm median/max: {per_meas}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""VisionInspector 프레임 루프 헤드리스 벤치마크
+
+카메라·디스플레이 없이 합성 프레임과 합성 DXF 로 render_frame() 을 돌려
+구간별 p50/p99(ms), FPS, 프레임당 메모리 할당량을 출력한다.
+
+    python benchmarks/bench_render.py
+    python benchmarks/bench_render.py --entities 1000 5000 20000 --frames 300
+    python benchmarks/bench_render.py --json result.json
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from _app import load_app
+
+
+def make_synthetic_dxf(path, n_entities, size=200.0, seed=0):
+    """LINE/CIRCLE/ARC/LWPOLYLINE/SPLINE 을 섞은 합성 도면 저장"""
+    import ezdxf
+
+    rng = np.random.default_rng(seed)
+    doc = ezdxf.new()
+    msp = doc.modelspace()
+    for kind in rng.integers(0, 5, n_entities):
+        x, y = rng.random(2) * size
+        if kind == 0:
+            dx, dy = (rng.random(2) - 0.5) * 40
+            msp.add_line((x, y), (x + dx, y + dy))
+        elif kind == 1:
+            msp.add_circle((x, y), 0.5 + rng.random() * 10)
+        elif kind == 2:
+            start = rng.random() * 360
+            msp.add_arc((x, y), 0.5 + rng.random() * 10, start, start + 30 + rng.random() * 270)
+        elif kind == 3:
+            if rng.integers(0, 2):
+                n = int(rng.integers(3, 40))
+                pts = np.column_stack([x + np.cumsum(rng.random(n) - 0.5) * 3,
+                                       y + np.cumsum(rng.random(n) - 0.5) * 3])
+            else:
+                # CAD 에서 내보낸 곡선처럼 거의 일직선인 점이 촘촘한 폴리선
+                n = int(rng.integers(200, 1000))
+                t = np.linspace(0, 1, n)
+                pts = np.column_stack([x + t * 30, y + np.sin(t * np.pi * rng.random() * 2) * 5])
+            msp.add_lwpolyline(pts.tolist(), close=bool(rng.integers(0, 2)))
+        else:
+            pts = np.column_stack([x + np.arange(6) * 4, y + (rng.random(6) - 0.5) * 8])
+            msp.add_spline([(px, py, 0) for px, py in pts])
+    doc.saveas(path)
+
+
+def build_inspector(app, width, height):
+    """합성 영상 소스를 물린 VisionInspector (캡처 스레드 없이 직접 구동)"""
+    cap = app.SyntheticSource(width, height)
+    insp = app.VisionInspector(source=cap)
+    insp._stop_grabber()
+
+    # 측정선·십자선·확대경이 모두 그려지는 상태로 설정
+    insp.measurements = [
+        ((100 + i * 60, 200), (400 + i * 60, 700), 12.345, 'MEAS_P2P' if i % 2 else 'MEAS_HV',
+         (300 + i * 60, 450))
+        for i in range(10)
+    ]
+    insp.crosshairs = [(500 + i * 90, 500, 15.0 * i, 1.0) for i in range(5)]
+    insp.curr_mx = insp.view_w // 2
+    insp.curr_my = insp.cam_y_offset + insp.cam_display_h // 2
+    return insp, cap
+
+
+def run_scenario(insp, cap, frames, pan, zoom=1.0, warmup=20):
+    base_scale = insp.scale
+    insp.scale = base_scale * zoom
+    frame = None
+    for _ in range(warmup):
+        _, frame = cap.read(frame)
+        insp.render_frame(frame)
+
+    # ── 시간 측정 ─────────────────────────────
+    insp.timer.frames.clear()
+    t0 = time.perf_counter()
+    for _ in range(frames):
+        _, frame = cap.read(frame)
+        if pan:
+            insp.offset_x += 1.0
+        insp.render_frame(frame)
+    wall = time.perf_counter() - t0
+    stages = insp.timer.summary()
+
+    # ── 할당량 측정 (tracemalloc 은 느리므로 별도 패스) ──
+    tracemalloc.start()
+    transient = []
+    for _ in range(min(frames, 50)):
+        _, frame = cap.read(frame)
+        if pan:
+            insp.offset_x += 1.0
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        insp.render_frame(frame)
+        transient.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    insp.scale = base_scale
+
+    frame_bytes = frame.nbytes
+    return {
+        'stages': stages,
+        'fps': frames / wall if wall > 0 else 0.0,
+        'alloc_kb_per_frame': float(np.mean(transient)) / 1024,
+        'alloc_kb_max': float(np.max(transient)) / 1024,
+        'frame_buffers_per_frame': float(np.mean(transient)) / frame_bytes,
+    }
+
+
+def print_result(title, res):
+    print(f"\n== {title}")
+    print(f"{'stage':<12}{'p50 ms':>10}{'p99 ms':>10}")
+    order = ['undistort', 'canvas', 'dxf', 'inspect', 'measure', 'crosshair', 'weight', 'resize', 'ui', 'magnifier', 'total']
+    for name in order + sorted(set(res['stages']) - set(order)):
+        if name in res['stages']:
+            p50, p99 = res['stages'][name]
+            print(f"{name:<12}{p50:>10.3f}{p99:>10.3f}")
+    print(f"FPS {res['fps']:.1f}   alloc/frame {res['alloc_kb_per_frame']:.1f} KB "
+          f"(max {res['alloc_kb_max']:.1f} KB, {res['frame_buffers_per_frame']:.2f} frame buffers)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VisionInspector 렌더 루프 벤치마크")
+    parser.add_argument('--entities', type=int, nargs='+', default=[0, 1000, 5000, 20000],
+                        help="합성 DXF 엔티티 수 (여러 개 지정 가능)")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--json', help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    app = load_app()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.entities:
+            insp, cap = build_inspector(app, args.width, args.height)
+            load_s = cache_s = 0.0
+            if n > 0:
+                path = os.path.join(tmp, f"synthetic_{n}.dxf")
+                make_synthetic_dxf(path, n)
+                t0 = time.perf_counter()
+                insp._set_dxf_geometry(app.parse_dxf(path))
+                load_s = time.perf_counter() - t0
+                app.load_dxf_geometry(path)          # 캐시 생성
+                t0 = time.perf_counter()
+                app.load_dxf_geometry(path)
+                cache_s = time.perf_counter() - t0
+            # 광각 렌즈 정도의 왜곡 (k1=-0.25)
+            f = args.width * 0.75
+            insp.lens = app.LensCorrector([[f, 0, args.width / 2], [0, f, args.height / 2], [0, 0, 1]],
+                                          [-0.25, 0.08, 0, 0, 0], (args.width, args.height))
+            for scenario, pan, zoom in (('static', False, 1.0), ('pan', True, 1.0),
+                                        ('zoom8-pan', True, 8.0), ('inspect', False, 1.0),
+                                        ('undistort', False, 1.0)):
+                insp.inspect_enabled = scenario == 'inspect' and n > 0
+                insp._set_undistort_mode('remap' if scenario == 'undistort' else 'off')
+                res = run_scenario(insp, cap, args.frames, pan, zoom)
+                overlay = insp.dxf_overlay
+                res.update(entities=n, scenario=scenario, load_s=load_s, cache_load_s=cache_s,
+                           contours=len(insp.dxf_contours),
+                           lod=overlay.level, vertices=overlay.vertex_count,
+                           visible=overlay.visible_count,
+                           raw_vertices=overlay.level_stats[overlay.level][0])
+                print_result(f"entities={n} contours={len(insp.dxf_contours)} "
+                             f"lod={overlay.level} visible={overlay.visible_count} "
+                             f"vertices={overlay.vertex_count}/{overlay.level_stats[overlay.level][0]} "
+                             f"scenario={scenario} load={load_s:.2f}s cached={cache_s:.2f}s "
+                             f"({args.width}x{args.height}, {args.frames} frames)", res)
+                results.append(res)
+            insp._stop_scale_source()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
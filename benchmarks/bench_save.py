@@ -0,0 +1,83 @@
+"""이미지 저장(ImageSaver) 벤치마크
+
+1080p 화면을 형식별로
+  - 기존 방식: UI 스레드에서 imencode + 파일 쓰기
+  - ImageSaver.submit(): UI 스레드는 버퍼 복사만
+으로 저장해 호출 스레드가 멈추는 시간을 비교하고, 카메라 속도 연속 저장에서
+끝까지 걸린 시간과 버린 프레임 수를 출력한다.
+
+    python benchmarks/bench_save.py --saves 10 --burst 30 --fps 30
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app  # noqa: E402
+
+
+def make_canvas(width, height, rng):
+    """카메라 영상 비슷한 잡음 + 선이 있는 화면 (단색은 압축이 너무 잘 돼서 부적합)"""
+    img = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (0, 0), 3)
+    for i in range(40):
+        cv2.line(img, (int(rng.integers(width)), int(rng.integers(height))),
+                 (int(rng.integers(width)), int(rng.integers(height))), (0, 255, 0), 2)
+    return img
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이미지 저장 벤치마크")
+    parser.add_argument('--saves', type=int, default=10)
+    parser.add_argument('--burst', type=int, default=30)
+    parser.add_argument('--fps', type=float, default=30.0, help="연속 저장 때 프레임 간격")
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    args = parser.parse_args()
+
+    app = load_app()
+    canvas = make_canvas(args.width, args.height, np.random.default_rng(0))
+    print(f"{'fmt':>5}{'sync ms':>10}{'submit ms':>11}{'submit max':>12}{'KB':>8}"
+          f"{'burst s':>10}{'saved':>7}{'dropped':>9}")
+    for fmt in app.IMAGE_FORMATS:
+        with tempfile.TemporaryDirectory() as tmp:
+            ext, params = app.IMAGE_FORMATS[fmt]
+            sync = []
+            for i in range(args.saves):
+                t0 = time.perf_counter()
+                ok, buf = cv2.imencode(ext, canvas, params)
+                with open(os.path.join(tmp, f"sync_{i}{ext}"), 'wb') as f:
+                    f.write(buf.tobytes())
+                sync.append(time.perf_counter() - t0)
+
+            saver = app.ImageSaver(tmp, fmt, workers=args.workers)
+            submit = []
+            for _ in range(args.saves):
+                t0 = time.perf_counter()
+                saver.submit(canvas)
+                submit.append(time.perf_counter() - t0)
+                time.sleep(0.2)    # 사람이 누르는 간격
+            saver.flush()
+            size = os.path.getsize(saver.last_path) / 1024
+
+            # 연속 저장: 카메라 프레임 간격으로 제출, 끝까지 걸린 시간
+            saver.saved = 0
+            period = 1.0 / args.fps
+            t0 = time.perf_counter()
+            for i in range(args.burst):
+                saver.submit(canvas, prefix="연속", force=True)
+                time.sleep(max(0.0, t0 + (i + 1) * period - time.perf_counter()))
+            saver.flush()
+            burst_s = time.perf_counter() - t0
+            saver.close()
+            print(f"{fmt:>5}{np.median(sync) * 1000:>10.1f}{np.median(submit) * 1000:>11.2f}"
+                  f"{max(submit) * 1000:>12.2f}{size:>8.0f}{burst_s:>10.2f}{saver.saved:>7}{saver.dropped:>9}")
+
+
+if __name__ == "__main__":
+    main()
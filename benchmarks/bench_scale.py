@@ -0,0 +1,152 @@
+"""저울 읽기 경로(ScaleReader → ScaleFrameParser → WeightFeed) 벤치마크 (Linux)
+
+별도 프로세스의 pty 가상 저울(scale_emulator.py)이 잡음·조각난 줄·쓰레기 바이트를 섞어
+보내고, 이 프로세스는 실제 pyserial 포트로 읽는다. 출력 속도별로
+  - 받은 값 / 보낸 줄, 값·안정 표시 불일치 (하나라도 있으면 종료 코드 1), 파서 카운터
+  - 갱신 지연: 가상 저울이 마지막 바이트를 쓴 시각 → 구독 콜백 (p50 / p99 / max)
+  - 이 프로세스의 CPU 사용률 (읽기 스레드 + 파서 + 발행)
+를 출력하고, 끝으로 파서 단독 처리량(줄/s, MB/s)을 잰다. 먼저 앱의 기본 시뮬레이션 저울(0.5 s 간격)로
+안정 판정과 자동 저장 신호가 나오는지 확인한다 (pty 불필요, --check-only 로 이것만 실행).
+두 프로세스의 시각 비교는 perf_counter 가 시스템 전체 CLOCK_MONOTONIC 인 Linux 기준이다.
+
+    python benchmarks/bench_scale.py --rates 10 100 500 --seconds 5
+"""
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _app import load_app  # noqa: E402
+from scale_emulator import FORMATS, ScaleEmulator, expected_flag  # noqa: E402
+
+
+def _emulate(conn, rate, fmt, fragment, garbage, seconds):
+    """자식 프로세스: 가상 저울을 열고 포트 경로를 알린 뒤, 시작 신호를 받으면 seconds 동안 송신"""
+    emu = ScaleEmulator(rate, fmt, fragment=fragment, garbage=garbage)
+    conn.send(emu.port)
+    conn.recv()
+    emu.run(seconds)
+    conn.send((emu.sent, emu.bytes_sent))
+    conn.recv()          # 읽는 쪽이 포트를 닫을 때까지 슬레이브를 유지
+    emu.close()
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run_rate(app, rate, fmt, fragment, garbage, seconds):
+    conn, child_conn = mp.Pipe()
+    proc = mp.Process(target=_emulate, args=(child_conn, rate, fmt, fragment, garbage, seconds))
+    proc.start()
+    port = conn.recv()
+
+    received = []
+    feed = app.WeightFeed()
+    feed.subscribe(lambda r: received.append((time.perf_counter(), r.value, r.stable)))
+    errors = []
+    reader = app.ScaleReader(port, feed, on_error=errors.append)
+    reader.start()
+
+    cpu0, t0 = _cpu_seconds(), time.perf_counter()
+    conn.send('go')
+    sent, bytes_sent = conn.recv()
+    time.sleep(0.1)      # 마지막 줄이 도착할 여유
+    cpu, wall = _cpu_seconds() - cpu0, time.perf_counter() - t0
+
+    reader.stop()
+    conn.send('done')
+    proc.join()
+
+    # 쓰레기 바이트는 숫자·줄 끝이 없으므로 보낸 줄과 받은 값은 순서대로 1:1 이어야 함
+    n = min(len(sent), len(received))
+    mismatched = sum(abs(s[1] - r[1]) > 1e-9 for s, r in zip(sent[:n], received[:n]))
+    flag_mismatched = sum(expected_flag(fmt, s[2]) != r[2] for s, r in zip(sent[:n], received[:n]))
+    lat = np.array([r[0] - s[0] for s, r in zip(sent[:n], received[:n])]) * 1000
+    p = reader.parser
+    print(f"{rate:>7g}{len(sent) / seconds:>9.1f}{len(received):>7}/{len(sent):<7}{mismatched:>6}{flag_mismatched:>6}"
+          f"{np.percentile(lat, 50):>8.3f}{np.percentile(lat, 99):>8.3f}{lat.max():>8.2f}"
+          f"{cpu / wall * 100:>7.2f}{cpu / max(len(received), 1) * 1e6:>9.1f}"
+          f"{p.frames:>8}{p.rejected:>6}{p.dropped:>6}{bytes_sent / seconds / 1024:>8.1f}"
+          + (f"  오류: {errors[0]}" if errors else ""))
+    return mismatched + flag_mismatched + abs(len(sent) - len(received)) + len(errors)
+
+
+def stabilizer_check(app, timeout=6.0):
+    """기본 SimulatedScale 에서 WeightStabilizer 가 안정에 이르고 자동 저장 신호가 나오는지 (성공 여부)"""
+    insp = app.VisionInspector(source=app.open_frame_source('synthetic:320x240', 0))
+    try:
+        # 자동 저장을 켠 뒤 빈 상태에서 기본 시뮬레이션 저울을 다시 시작 (올림 → 안정)
+        insp._stop_scale_source()
+        insp.stabilizer.reset()
+        insp.toggle_auto_save()
+        insp._start_scale_simulation()
+        t0 = time.perf_counter()
+        while insp.pending_capture is None and time.perf_counter() - t0 < timeout:
+            time.sleep(0.05)
+        elapsed = time.perf_counter() - t0
+        stab = insp.stabilizer
+        ok = stab.state == 'stable' and insp.pending_capture is not None
+        interval = f"{stab.interval:.2f}" if getattr(stab, 'interval', None) else "-"
+        print(f"안정 판정 (시뮬레이션 저울): {'OK' if ok else '실패'}  상태 {stab.state}, "
+              f"자동 저장 {insp.pending_capture} g, {elapsed:.1f} s, 간격 {interval} s, 창 {getattr(stab, 'span', stab.window_s):.2f} s\n")
+        return ok
+    finally:
+        insp._stop_grabber()
+        insp._stop_scale_source()
+        insp.logger.close()
+        insp.image_saver.close()
+
+
+def parser_throughput(app, fmt, lines=200000, chunk=64):
+    """pty 없이 파서만: 미리 만든 바이트열을 chunk 단위로 넣어 처리량 측정"""
+    emu_line = FORMATS[fmt]
+    rng = np.random.default_rng(0)
+    blob = b"".join(emu_line(round(12.34 + v, 2), True) for v in rng.normal(0, 0.02, lines))
+    parser = app.ScaleFrameParser()
+    t0 = time.perf_counter()
+    count = 0
+    for i in range(0, len(blob), chunk):
+        count += len(parser.feed(blob[i:i + chunk]))
+    elapsed = time.perf_counter() - t0
+    print(f"\n파서 단독 ({fmt}, {chunk} B 단위): {count / elapsed:,.0f} 줄/s, "
+          f"{len(blob) / elapsed / 1e6:.1f} MB/s, {elapsed / count * 1e6:.2f} us/줄")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="저울 읽기 경로 벤치마크 (pty 가상 저울)")
+    parser.add_argument('--rates', type=float, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--format', choices=sorted(FORMATS), default='and')
+    parser.add_argument('--fragment', type=float, default=0.3, help="줄이 조각나서 도착할 확률")
+    parser.add_argument('--garbage', type=float, default=0.05, help="쓰레기 바이트가 끼어들 확률")
+    parser.add_argument('--check-only', action='store_true', help="안정 판정 확인만 실행")
+    args = parser.parse_args()
+
+    app = load_app()
+    if not stabilizer_check(app):
+        sys.exit(1)
+    if args.check_only:
+        return
+    if not app.SERIAL_AVAILABLE:
+        sys.exit("pyserial 이 필요합니다: pip install pyserial")
+
+    print(f"형식 {args.format}, 조각 {args.fragment:.0%}, 쓰레기 {args.garbage:.0%}, {args.seconds:g} s\n")
+    print(f"{'Hz':>7}{'sent/s':>9}{'recv/sent':>14}{'mism':>6}{'flag':>6}{'p50 ms':>8}{'p99 ms':>8}{'max ms':>8}"
+          f"{'CPU %':>7}{'us/line':>9}{'frames':>8}{'rej':>6}{'drop':>6}{'KiB/s':>8}")
+    failures = sum(run_rate(app, rate, args.format, args.fragment, args.garbage, args.seconds)
+                   for rate in args.rates)
+    parser_throughput(app, args.format)
+    if failures:
+        print(f"\n실패: 값·안정 표시 불일치 또는 누락 {failures}건")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
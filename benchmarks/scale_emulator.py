@@ -0,0 +1,135 @@
+"""pty 가상 시리얼 저울 (Linux / macOS)
+
+실제 저울처럼 일정 주기로 무게 줄을 보내고, 잡음·줄 조각남·쓰레기 바이트를 섞을 수 있다.
+앱의 ScaleReader 가 그대로 열 수 있는 포트 경로(/dev/pts/N)를 만든다.
+
+    python benchmarks/scale_emulator.py --rate 10 --format sics
+    python "Vison Camera.py" --scale /dev/pts/N
+"""
+import argparse
+import os
+import random
+import threading
+import time
+
+# 형식별 한 줄 (값, 안정 여부) → bytes
+FORMATS = {
+    'and': lambda v, st: f"{'ST' if st else 'US'},{v:+09.2f}  g\r\n".encode('ascii'),
+    'sics': lambda v, st: f"S {'S' if st else 'D'} {v:>10.3f} g\r\n".encode('ascii'),
+    'ohaus': lambda v, st: f"{v:>10.2f} g{'' if st else '  ?'}\r\n".encode('ascii'),
+}
+
+
+def expected_flag(fmt, stable):
+    """보낸 줄을 파서가 읽었을 때 나와야 할 stable 값 (Ohaus 는 불안정 '?' 만 표시)"""
+    if fmt == 'ohaus':
+        return None if stable else False
+    return stable
+
+# 쓰레기 바이트: 숫자·부호·줄 끝이 없는 값만 (회선 잡음 흉내, 파서가 무게로 오인하지 않아야 함)
+# 부호는 Sartorius 처럼 숫자와 떨어져 오는 형식("-     12.34 g")과 구별할 수 없어 뺀다
+GARBAGE = bytes(b for b in range(256) if not (0x30 <= b <= 0x39 or b in b'+-\r\n'))
+
+
+class ScaleEmulator:
+    """pty 마스터 쪽에서 저울 출력을 흘려보내는 스레드
+
+    sent 에는 (마지막 바이트를 쓴 시각 perf_counter, 값, 안정 여부) 가 보낸 순서대로 쌓인다.
+    """
+
+    def __init__(self, rate=10.0, fmt='and', base=12.34, noise=0.02, unstable=0.1,
+                 fragment=0.0, garbage=0.0, seed=0):
+        import pty
+        import tty
+
+        self.rate = rate
+        self.line = FORMATS[fmt]
+        self.base = base
+        self.noise = noise
+        self.unstable = unstable      # 불안정 줄 비율
+        self.fragment = fragment      # 줄을 2~3 조각으로 나눠 보낼 확률
+        self.garbage = garbage        # 줄 앞에 쓰레기 바이트(1~8개)를 끼울 확률
+        self.rng = random.Random(seed)
+        self.master, self._slave = pty.openpty()
+        tty.setraw(self._slave)       # CR/LF 변환 없이 바이트 그대로 전달
+        self.port = os.ttyname(self._slave)
+        self.sent = []
+        self.bytes_sent = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def close(self):
+        self.stop()
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _write(self, data):
+        while data:
+            n = os.write(self.master, data)
+            self.bytes_sent += n
+            data = data[n:]
+
+    def run(self, duration=None):
+        """rate Hz 로 보냄 (밀리면 다음 주기를 당겨서 평균 속도를 맞춤)"""
+        rng = self.rng
+        period = 1.0 / self.rate
+        next_t = time.perf_counter()
+        end_t = None if duration is None else next_t + duration
+        while not self._stop.is_set() and (end_t is None or next_t < end_t):
+            value = round(self.base + rng.gauss(0.0, self.noise), 2)
+            stable = rng.random() >= self.unstable
+            data = self.line(value, stable)
+            if self.garbage and rng.random() < self.garbage:
+                data = bytes(rng.choice(GARBAGE) for _ in range(rng.randint(1, 8))) + data
+            if self.fragment and rng.random() < self.fragment:
+                cuts = sorted(rng.sample(range(1, len(data)), rng.randint(1, 2)))
+                parts = [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+                for part in parts[:-1]:
+                    self._write(part)
+                    time.sleep(0.0005)
+                data = parts[-1]
+            self._write(data)
+            self.sent.append((time.perf_counter(), value, stable))
+
+            next_t += period
+            delay = next_t - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="pty 가상 시리얼 저울")
+    parser.add_argument('--rate', type=float, default=10.0, help="초당 출력 줄 수")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='and')
+    parser.add_argument('--base', type=float, default=12.34, help="기준 무게 (g)")
+    parser.add_argument('--noise', type=float, default=0.02, help="잡음 표준편차 (g)")
+    parser.add_argument('--fragment', type=float, default=0.0, help="줄이 조각나서 도착할 확률")
+    parser.add_argument('--garbage', type=float, default=0.0, help="쓰레기 바이트가 끼어들 확률")
+    args = parser.parse_args()
+
+    emu = ScaleEmulator(args.rate, args.format, args.base, args.noise,
+                        fragment=args.fragment, garbage=args.garbage)
+    print(f"가상 저울: {emu.port}  ({args.format}, {args.rate:g} Hz)  Ctrl+C 로 종료", flush=True)
+    try:
+        emu.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emu.close()
+
+
+if __name__ == "__main__":
+    main()